@@ -6,6 +6,8 @@ import re
 import os
 import subprocess
 
+from keyword_tiers import KeywordTiers
+
 try:
     import psutil  # type: ignore
 except Exception:
@@ -109,6 +111,18 @@ def _detect_generation(model: str) -> str:
     return ""
 
 
+# Model keyword -> score bonus, first match wins
+MODEL_BONUS_TIERS = (
+    (15, ["i9", "ryzen 9", "threadripper", "epyc", "xeon w", "m3 max", "m2 ultra", "m3 ultra", "m4 max"]),
+    (10, ["i7", "ryzen 7", "m1 pro", "m2 pro", "m3 pro", "m4 pro"]),
+    (6, ["i5", "ryzen 5", "m1", "m2", "m3", "m4"]),
+    (3, ["i3", "ryzen 3"]),
+    (-10, ["pentium", "celeron", "atom"]),
+    (-5, ["n100", "n200", "n95", "n97"]),  # low-power Intel Alder Lake-N
+)
+_MODEL_BONUS = KeywordTiers([keywords for _, keywords in MODEL_BONUS_TIERS])
+
+
 def _score_cpu(model: str, max_ghz: float, cores: int, threads: int) -> int:
     """
     Compute a 0-100 score combining clock, cores, threads, and known model heuristics.
@@ -122,20 +136,8 @@ def _score_cpu(model: str, max_ghz: float, cores: int, threads: int) -> int:
     base = clock_score + core_score + thread_score  # max 85
 
     # Model bonus
-    m = model.lower()
-    bonus = 0
-    if any(k in m for k in ["i9", "ryzen 9", "threadripper", "epyc", "xeon w", "m3 max", "m2 ultra", "m3 ultra", "m4 max"]):
-        bonus = 15
-    elif any(k in m for k in ["i7", "ryzen 7", "m1 pro", "m2 pro", "m3 pro", "m4 pro"]):
-        bonus = 10
-    elif any(k in m for k in ["i5", "ryzen 5", "m1", "m2", "m3", "m4"]):
-        bonus = 6
-    elif any(k in m for k in ["i3", "ryzen 3"]):
-        bonus = 3
-    elif any(k in m for k in ["pentium", "celeron", "atom"]):
-        bonus = -10
-    elif "n100" in m or "n200" in m or "n95" in m or "n97" in m:
-        bonus = -5  # low-power Intel Alder Lake-N
+    tier = _MODEL_BONUS.best(model.lower())
+    bonus = 0 if tier is None else MODEL_BONUS_TIERS[tier][0]
 
     score = max(0, min(100, int(base + bonus)))
     return score
@@ -0,0 +1,298 @@
+# distro_catalog.py
+# Compact on-disk distro catalog, read through mmap.
+#
+# Layout (little-endian, every section 8-byte aligned):
+#   magic    b"LHCAT\x01\x00\x00"
+#   u32      header length, followed by a JSON header:
+#            {"count": n, "columns": [{"name", "kind", "offset", ...}]}
+#   columns  kind "d" (float64), "q" (int64) or "b" (bool, stored as int64):
+#              n fixed-width values
+#            kind "s" (string): n+1 uint32 byte offsets, then the UTF-8 blob
+#
+# Numeric columns are memoryviews straight over the mapping, so processes
+# that open the same file share one page-cache copy. Strings are only
+# decoded when a field is read.
+#
+#   python distro_catalog.py build catalog.lhcat            (built-in DISTROS)
+#   python distro_catalog.py build catalog.lhcat --from variants.json
+#   python distro_catalog.py info catalog.lhcat
+
+import json
+import mmap
+import os
+import struct
+from collections.abc import ItemsView, Mapping, ValuesView
+from typing import Any, Dict, Iterator, List, Optional
+
+MAGIC = b"LHCAT\x01\x00\x00"
+_ITEMSIZE = 8
+_KIND_CODES = {"d": "d", "q": "q", "b": "q"}
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _kind(values: List[Any]) -> str:
+    if all(isinstance(v, bool) for v in values):
+        return "b"
+    if all(isinstance(v, str) for v in values):
+        return "s"
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        return "q"
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+        return "d"
+    raise ValueError("mixed or unsupported values")
+
+
+def write_catalog(distros: Dict[str, Dict[str, Any]], path: str) -> int:
+    """
+    Convert a DISTROS-shaped mapping (or a distro_variants.VariantCatalog)
+    to the binary format. Every entry must have the same fields. Returns the
+    file size in bytes.
+    """
+    names = list(distros.keys())
+    records = list(distros.values())
+    fields = list(records[0].keys()) if records else []
+    for name, d in zip(names, records):
+        if set(d) != set(fields):
+            raise ValueError(f"{name}: fields differ from the first entry")
+
+    sections: List[bytes] = []
+    columns = []
+    offset = 0
+
+    def add(data: bytes) -> int:
+        nonlocal offset
+        start = offset
+        data += b"\0" * (_align(len(data)) - len(data))
+        sections.append(data)
+        offset += len(data)
+        return start
+
+    for field, values in [("name", names)] + [(f, [d[f] for d in records]) for f in fields]:
+        try:
+            kind = _kind(values)
+        except ValueError:
+            raise ValueError(f"field {field!r}: mixed or unsupported values") from None
+        col: Dict[str, Any] = {"name": field, "kind": kind}
+        if kind == "s":
+            encoded = [v.encode("utf-8") for v in values]
+            ends = [0]
+            for b in encoded:
+                ends.append(ends[-1] + len(b))
+            col["offset"] = add(struct.pack(f"<{len(ends)}I", *ends))
+            col["blob"] = add(b"".join(encoded))
+        else:
+            code = _KIND_CODES[kind]
+            cast = float if kind == "d" else int
+            col["offset"] = add(struct.pack(f"<{len(values)}{code}", *map(cast, values)))
+        columns.append(col)
+
+    header = json.dumps({"count": len(names), "columns": columns}).encode("utf-8")
+    data_start = _align(len(MAGIC) + 4 + len(header))
+    # Readers may have the old file mapped: build beside it and swap it in
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            f.write(b"\0" * (data_start - len(MAGIC) - 4 - len(header)))
+            for section in sections:
+                f.write(section)
+            size = f.tell()
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return size
+
+
+class DistroView(Mapping):
+    """One catalog entry; fields are read from the mapping on access."""
+
+    __slots__ = ("_catalog", "_index")
+
+    def __init__(self, catalog: "MappedCatalog", index: int):
+        self._catalog = catalog
+        self._index = index
+
+    def __getitem__(self, field):
+        return self._catalog.value(field, self._index)
+
+    def __getattr__(self, field):
+        # Attribute access like recommender_engine.Distro
+        if field.startswith("_"):
+            raise AttributeError(field)
+        try:
+            return self._catalog.value(field, self._index)
+        except KeyError:
+            raise AttributeError(field) from None
+
+    def __iter__(self):
+        return iter(self._catalog.fields)
+
+    def __len__(self):
+        return len(self._catalog.fields)
+
+    def __repr__(self):
+        return f"DistroView({self._catalog.name(self._index)!r})"
+
+
+class _Values(ValuesView):
+    def __iter__(self):
+        catalog = self._mapping
+        return (DistroView(catalog, i) for i in range(catalog.count))
+
+
+class _Items(ItemsView):
+    def __iter__(self):
+        catalog = self._mapping
+        return ((catalog.name(i), DistroView(catalog, i)) for i in range(catalog.count))
+
+
+class MappedCatalog(Mapping):
+    """
+    Read-only name -> DistroView mapping over a catalog file. Drop-in for
+    DISTROS (see recommender_engine.load_catalog).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mm)
+        if bytes(buf[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path}: not a distro catalog")
+        (header_len,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(bytes(buf[start:start + header_len]).decode("utf-8"))
+        base = _align(start + header_len)
+
+        self.count: int = header["count"]
+        self._kinds: Dict[str, str] = {}
+        self._numbers: Dict[str, memoryview] = {}
+        self._strings: Dict[str, Any] = {}
+        n = self.count
+        for col in header["columns"]:
+            field, kind, off = col["name"], col["kind"], base + col["offset"]
+            self._kinds[field] = kind
+            if kind == "s":
+                ends = buf[off:off + (n + 1) * 4].cast("I")
+                blob = base + col["blob"]
+                self._strings[field] = (ends, blob)
+            else:
+                self._numbers[field] = buf[off:off + n * _ITEMSIZE].cast(_KIND_CODES[kind])
+        self.fields = tuple(f for f in self._kinds if f != "name")
+        self._by_name: Optional[Dict[str, int]] = None
+
+    # ---- columns ----
+    def kind(self, field: str) -> str:
+        return self._kinds[field]
+
+    def column(self, field: str) -> memoryview:
+        """
+        Zero-copy view of a numeric column (float64 or int64, bools as 0/1).
+        numpy.asarray(view) wraps it without copying.
+        """
+        return self._numbers[field]
+
+    def strings(self, field: str) -> List[str]:
+        """Decode a whole string column."""
+        return [self._string(field, i) for i in range(self.count)]
+
+    def _string(self, field: str, i: int) -> str:
+        ends, blob = self._strings[field]
+        return self._mm[blob + ends[i]:blob + ends[i + 1]].decode("utf-8")
+
+    def value(self, field: str, i: int) -> Any:
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        kind = self._kinds.get(field)
+        if kind is None or field == "name":
+            raise KeyError(field)
+        if kind == "s":
+            return self._string(field, i)
+        v = self._numbers[field][i]
+        return bool(v) if kind == "b" else v
+
+    def name(self, i: int) -> str:
+        return self._string("name", i)
+
+    def record(self, i: int) -> DistroView:
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return DistroView(self, i)
+
+    def index(self, name: str) -> int:
+        if self._by_name is None:
+            self._by_name = {n: i for i, n in enumerate(self.strings("name"))}
+        return self._by_name[name]
+
+    # ---- Mapping ----
+    def __getitem__(self, name: str) -> DistroView:
+        return DistroView(self, self.index(name))
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.name(i) for i in range(self.count))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def values(self):
+        return _Values(self)
+
+    def items(self):
+        return _Items(self)
+
+    def close(self):
+        self._numbers.clear()
+        self._strings.clear()
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # column views still exported; the mapping goes with them
+
+
+def open_catalog(path: str) -> MappedCatalog:
+    return MappedCatalog(path)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="distro_catalog", description="Build or inspect a distro catalog file.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="write a catalog file")
+    build.add_argument("output")
+    build.add_argument("--from", dest="source",
+                       help="JSON object of name -> fields or variant spec (default: built-in DISTROS)")
+    info = sub.add_parser("info", help="show a catalog's size and columns")
+    info.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        if args.source:
+            from distro_variants import VariantCatalog
+
+            # Plain name -> fields objects are variant specs without overlays
+            distros = VariantCatalog.from_file(args.source)
+        else:
+            from recommender_engine import DISTROS as distros
+        size = write_catalog(distros, args.output)
+        print(f"{args.output}: {len(distros)} distros, {size} bytes")
+        return 0
+
+    cat = open_catalog(args.path)
+    print(f"{args.path}: {len(cat)} distros")
+    for field in ("name",) + cat.fields:
+        print(f"  {field:24} {cat.kind(field)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,290 @@
+# distro_similarity.py
+# "What else is like Pop!_OS but lighter?"
+# Nearest neighbours over the distros' numeric attributes, each feature
+# z-normalized across the catalog so no single scale dominates.
+#
+#   similar("Pop!_OS", k=3, constraints={"min_ram_gb": (None, 2.0)})
+#
+# With numpy the catalog, rotated onto its principal axes, is split into a
+# k-d tree with small leaves, and runs of leaves form an upper level of
+# boxes. A query bounds every upper box at once (distance to the box, or
+# infinity when its constraint ranges cannot match), then reads boxes
+# nearest-first in growing chunks, skipping leaves whose own bound already
+# exceeds the k-th best distance.
+# Without numpy it falls back to a linear scan with the same results.
+#
+# Speed: queries are not sub-millisecond at 100k entries. On a 100k-variant
+# recommender_bench.gen_catalog, k=5, p50 is about 1.5 ms and p99 about
+# 4 ms (vectorized brute force: about 5 ms). Variants there jitter every
+# feature, so in 16 dimensions the k-th distance is wide compared with the
+# leaf boxes, and a query still reads about 9k points.
+
+import heapq
+import math
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None
+
+from recommender_engine import _record, _records, catalog_version, get_catalog
+
+FEATURES = (
+    "weight_low_hw", "weight_mid_hw", "weight_high_hw",
+    "beginner", "stability", "cutting_edge",
+    "office", "development", "gaming", "creative",
+    "visual_polish", "privacy", "free_software_purity", "lts", "rolling",
+    "battery_friendly",
+)
+# Numeric fields constraints may use besides FEATURES
+CONSTRAINT_FIELDS = ("min_ram_gb", "ideal_ram_gb", "min_storage_gb", "good_for_old_hw")
+
+_GROUP = 32  # leaves per upper-level box
+
+Constraints = Dict[str, Tuple[Optional[float], Optional[float]]]
+
+
+def _columns(catalog, fields: Sequence[str]) -> Dict[str, List[float]]:
+    if hasattr(catalog, "column"):
+        return {f: [float(v) for v in catalog.column(f)] for f in fields}
+    records = _records() if catalog is get_catalog() else [_record(d) for d in catalog.values()]
+    return {f: [float(getattr(d, f)) for d in records] for f in fields}
+
+
+def _loose(d):
+    # Box bounds come from rotated coordinates, so they may round a hair
+    # above the exact distance; never skip a box over that
+    return d * (1 + 1e-9) + 1e-12
+
+
+def _matches(value: float, bounds) -> bool:
+    lo, hi = bounds
+    return (lo is None or value >= lo) and (hi is None or value <= hi)
+
+
+class SimilarityIndex:
+    """
+    kNN index over one catalog. Constraints map a numeric field to an
+    inclusive (low, high) range; either end may be None.
+    """
+
+    def __init__(self, catalog=None, features: Sequence[str] = FEATURES, leaf_size: int = 16):
+        catalog = get_catalog() if catalog is None else catalog
+        self.names: List[str] = (
+            catalog.strings("name") if hasattr(catalog, "strings") else list(catalog.keys())
+        )
+        self.features = tuple(features)
+        fields = self.features + tuple(f for f in CONSTRAINT_FIELDS if f not in self.features)
+        cols = _columns(catalog, fields)
+        self.fields = fields
+        self._index = {name: j for j, name in enumerate(self.names)}
+
+        # Per-feature mean / std (std 0 -> 1, the feature then adds nothing)
+        n = len(self.names)
+        self._mean, self._scale = [], []
+        for f in self.features:
+            values = cols[f]
+            mean = sum(values) / n if n else 0.0
+            var = sum((v - mean) ** 2 for v in values) / n if n else 0.0
+            self._mean.append(mean)
+            self._scale.append(math.sqrt(var) or 1.0)
+
+        if np is None:
+            self._points = [
+                [(cols[f][j] - m) / s for f, m, s in zip(self.features, self._mean, self._scale)]
+                for j in range(n)
+            ]
+            self._values = cols
+            return
+
+        x = np.empty((n, len(self.features)), dtype=np.float64)
+        for i, f in enumerate(self.features):
+            x[:, i] = (np.asarray(cols[f]) - self._mean[i]) / self._scale[i]
+        values = np.array([cols[f] for f in fields], dtype=np.float64).reshape(len(fields), n).T
+        # The tree and its boxes live on the principal axes: the first splits
+        # then follow the directions the catalog varies most along instead of
+        # one raw feature at a time. Distances are still computed on x.
+        centered = x - x.mean(axis=0) if n else x
+        self._rot = np.linalg.eigh(centered.T @ centered)[1][:, ::-1]
+        xr = x @ self._rot
+        order, leaves = self._build(xr, leaf_size)
+        # Points stored leaf by leaf, so a leaf is one contiguous slice
+        self._order = order
+        self._pos = np.empty_like(order)
+        self._pos[order] = np.arange(n)
+        self._x = x[order]
+        xr = xr[order]
+        self._values = values[order]
+        self._leaf_start = np.array([a for a, _ in leaves], dtype=np.intp)
+        self._leaf_stop = np.array([b for _, b in leaves], dtype=np.intp)
+        self._lo = np.array([xr[a:b].min(axis=0) for a, b in leaves]).reshape(len(leaves), -1)
+        self._hi = np.array([xr[a:b].max(axis=0) for a, b in leaves]).reshape(len(leaves), -1)
+        self._vmin = np.array([self._values[a:b].min(axis=0) for a, b in leaves]).reshape(len(leaves), -1)
+        self._vmax = np.array([self._values[a:b].max(axis=0) for a, b in leaves]).reshape(len(leaves), -1)
+        # Upper level: runs of _GROUP consecutive leaves (subtrees of the
+        # k-d tree), so a query bounds a few hundred boxes, not every leaf
+        heads = np.arange(0, len(leaves), _GROUP)
+        self._glo = np.minimum.reduceat(self._lo, heads) if len(leaves) else self._lo
+        self._ghi = np.maximum.reduceat(self._hi, heads) if len(leaves) else self._hi
+        self._gvmin = np.minimum.reduceat(self._vmin, heads) if len(leaves) else self._vmin
+        self._gvmax = np.maximum.reduceat(self._vmax, heads) if len(leaves) else self._vmax
+
+    @staticmethod
+    def _build(x, leaf_size: int):
+        """k-d split on the widest dimension at the median; returns (order, leaf slices)."""
+        order = np.arange(len(x))
+        leaves = []
+        stack = [(0, len(x))]
+        while stack:
+            a, b = stack.pop()
+            if b - a <= leaf_size:
+                if b > a:
+                    leaves.append((a, b))
+                continue
+            pts = x[order[a:b]]
+            dim = int(np.argmax(pts.max(axis=0) - pts.min(axis=0)))
+            mid = (b - a) // 2
+            part = np.argpartition(pts[:, dim], mid)
+            order[a:b] = order[a:b][part]
+            stack.append((a + mid, b))
+            stack.append((a, a + mid))
+        leaves.sort()
+        return order, leaves
+
+    def __len__(self):
+        return len(self.names)
+
+    def vector(self, name: str) -> List[float]:
+        """Raw (unnormalized) feature values of one distro, in FEATURES order."""
+        j = self._index[name]
+        if np is None:
+            return [self._values[f][j] for f in self.features]
+        return self._values[self._pos[j], :len(self.features)].tolist()
+
+    def query(self, target, k: int = 5, constraints: Optional[Constraints] = None,
+              exclude: Sequence[str] = ()) -> List[Dict[str, Any]]:
+        """
+        k nearest distros to target (a catalog name or a dict of raw feature
+        values; missing features count as the catalog mean). Returns
+        [{"name", "distance"}], nearest first, ties in catalog order. A name
+        target is excluded from its own results.
+        """
+        if isinstance(target, str):
+            raw = dict(zip(self.features, self.vector(target)))
+            exclude = tuple(exclude) + (target,)
+        else:
+            raw = target
+        q = [
+            (float(raw[f]) - m) / s if f in raw else 0.0
+            for f, m, s in zip(self.features, self._mean, self._scale)
+        ]
+        constraints = dict(constraints or {})
+        unknown = set(constraints) - set(self.fields)
+        if unknown:
+            raise ValueError(f"unknown constraint fields: {sorted(unknown)}")
+        skip = {self._index[name] for name in exclude if name in self._index}
+        if k <= 0:
+            return []
+        if np is None:
+            found = self._scan(q, k, constraints, skip)
+        else:
+            found = self._search(np.array(q), k, constraints, skip)
+        return [{"name": self.names[j], "distance": round(math.sqrt(d), 4)} for d, j in found]
+
+    def _scan(self, q, k, constraints, skip):
+        best = []
+        for j, p in enumerate(self._points):
+            if j in skip or not all(_matches(self._values[f][j], b) for f, b in constraints.items()):
+                continue
+            best.append((sum((a - b) ** 2 for a, b in zip(p, q)), j))
+        return heapq.nsmallest(k, best)
+
+    @staticmethod
+    def _bounds(q, lo, hi, vmin, vmax, cols):
+        """Squared distance from q to each box; inf where constraints cannot match."""
+        gap = np.maximum(np.maximum(lo - q, q - hi), 0.0)
+        bound = np.einsum("ij,ij->i", gap, gap)
+        for c, low, high in cols:
+            if low is not None:
+                bound[vmax[:, c] < low] = math.inf
+            if high is not None:
+                bound[vmin[:, c] > high] = math.inf
+        return bound
+
+    def _search(self, q, k, constraints, skip):
+        cols = [(self.fields.index(f), lo, hi) for f, (lo, hi) in constraints.items()]
+        qr = q @ self._rot
+        gbound = self._bounds(qr, self._glo, self._ghi, self._gvmin, self._gvmax, cols)
+        groups = np.argsort(gbound, kind="stable")
+        n_leaves = len(self._leaf_start)
+
+        best_d = np.empty(0)
+        best_j = np.empty(0, dtype=np.intp)
+        kth = math.inf
+        # Groups nearest-first, in chunks that double in size; inside a chunk
+        # only leaves whose own bound can still beat the k-th best are read
+        i, step = 0, 2
+        while i < len(groups) and gbound[groups[i]] <= _loose(kth):
+            chunk = groups[i:i + step]
+            i += step
+            step *= 2
+            chunk = chunk[gbound[chunk] <= _loose(kth)]
+            leaves = (chunk[:, None] * _GROUP + np.arange(_GROUP)).ravel()
+            leaves = leaves[leaves < n_leaves]
+            bound = self._bounds(qr, self._lo[leaves], self._hi[leaves],
+                                 self._vmin[leaves], self._vmax[leaves], cols)
+            leaves = leaves[bound <= _loose(kth)]
+            starts = self._leaf_start[leaves]
+            sizes = self._leaf_stop[leaves] - starts
+            offsets = np.cumsum(sizes) - sizes
+            rows = np.repeat(starts - offsets, sizes) + np.arange(sizes.sum())
+            diff = np.take(self._x, rows, axis=0)
+            diff -= q
+            d = np.einsum("ij,ij->i", diff, diff)
+            keep = d <= kth
+            for c, lo, hi in cols:
+                v = self._values[rows, c]
+                if lo is not None:
+                    keep &= v >= lo
+                if hi is not None:
+                    keep &= v <= hi
+            j = self._order[rows[keep]]
+            d = d[keep]
+            for s in skip:
+                mask = j != s
+                j, d = j[mask], d[mask]
+            best_d = np.concatenate((best_d, d))
+            best_j = np.concatenate((best_j, j))
+            if len(best_d) >= k:
+                # Everything tied with the k-th distance survives, so the
+                # catalog-order tie break below stays exact
+                kth = np.partition(best_d, k - 1)[k - 1]
+                mask = best_d <= kth
+                best_d, best_j = best_d[mask], best_j[mask]
+        top = np.lexsort((best_j, best_d))[:k]
+        return list(zip(best_d[top].tolist(), best_j[top].tolist()))
+
+
+@lru_cache(maxsize=1)
+def _index_for(version) -> SimilarityIndex:
+    return SimilarityIndex()
+
+
+def similarity_index() -> SimilarityIndex:
+    """Index over the active catalog, rebuilt after the catalog changes."""
+    return _index_for(catalog_version())
+
+
+def similar(name: str, k: int = 5, constraints: Optional[Constraints] = None) -> List[Dict[str, Any]]:
+    """k distros most like name in the active catalog (see SimilarityIndex.query)."""
+    return similarity_index().query(name, k, constraints)
+
+
+if __name__ == "__main__":
+    for hit in similar("Pop!_OS", k=3):
+        print(f"{hit['name']:28} {hit['distance']}")
+    print("lighter (min RAM <= 2 GB):")
+    for hit in similar("Pop!_OS", k=3, constraints={"min_ram_gb": (None, 2.0)}):
+        print(f"{hit['name']:28} {hit['distance']}")
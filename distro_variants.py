@@ -0,0 +1,300 @@
+# distro_variants.py
+# Catalog entries as a base distro plus desktop and edition overlays.
+#
+#   "Linux Mint": {
+#       "base": {...fields every variant shares...},
+#       "desktops": {"Cinnamon": {...}, "XFCE": {...}},
+#       "editions": {"": {}, "Edge": {"cutting_edge": 5}},      (optional)
+#   }
+#
+# A variant is one (base, desktop, edition) combination, named
+# "Linux Mint XFCE Edge" (empty labels are left out). Its fields are the
+# base's, overridden by the desktop overlay, then by the edition overlay; a
+# desktop overlay's "desktop" field defaults to its label. Entries without
+# "base" are plain distros with one variant, so a DISTROS-shaped dict is a
+# valid spec too. Variant names must be unique.
+#
+# VariantCatalog is a read-only name -> record mapping that never expands
+# the product up front: variant i is found by bisecting per-base offsets,
+# names are parsed back into their parts, and values()/column() stream from
+# generators, so a ranking holds one record at a time.
+#
+# Desktop strings are parsed once into desktop IDs ("KDE/GNOME" -> kde,
+# gnome; "KDE Plasma" -> kde plasma, kde), which is what desktop_pref and
+# windows_like match against instead of substring tests per call.
+#
+#   python distro_variants.py variants.json
+#   python distro_catalog.py build variants.lhcat --from variants.json
+
+import json
+import re
+from bisect import bisect_right
+from collections.abc import ItemsView, Mapping, ValuesView
+from functools import lru_cache
+from itertools import accumulate
+from typing import Any, Dict, FrozenSet, Iterator, List, NamedTuple, Tuple
+
+# ---------- Desktop IDs ----------
+# Matched against the first desktop of a "/" list ("KDE/GNOME" is Windows-like)
+WINDOWS_LIKE_IDS = frozenset({"cinnamon", "kde", "gnome (custom)"})
+XFCE_IDS = frozenset({"xfce"})
+
+_QUALIFIER = re.compile(r"\s*\([^)]*\)")
+
+
+class DesktopProfile(NamedTuple):
+    ids: FrozenSet[str]
+    windows_like: bool  # Cinnamon, KDE or customized GNOME first
+    xfce: bool          # XFCE first (the smaller windows_like bonus)
+
+
+def _component_ids(part: str) -> List[str]:
+    # "GNOME (custom)" -> "gnome (custom)", "gnome"; "KDE Plasma" -> "kde plasma", "kde"
+    part = part.strip().lower()
+    bare = _QUALIFIER.sub("", part).strip()
+    ids = [part, bare]
+    if bare:
+        ids.append(bare.split()[0])
+    return [i for i in ids if i]
+
+
+@lru_cache(maxsize=None)
+def desktop_profile(desktop: str) -> DesktopProfile:
+    """Desktop IDs and Windows-likeness of a desktop string, parsed once per distinct string."""
+    parts = desktop.split("/")
+    primary = frozenset(_component_ids(parts[0]))
+    ids = frozenset(i for part in parts for i in _component_ids(part))
+    windows = bool(primary & WINDOWS_LIKE_IDS)
+    return DesktopProfile(ids, windows, not windows and bool(primary & XFCE_IDS))
+
+
+def desktop_matches(desktop: str, pref: str) -> bool:
+    """True when a lowercased desktop_pref names one of desktop's IDs ("any" never does)."""
+    return pref != "any" and pref in desktop_profile(desktop).ids
+
+
+# ---------- Variant specs ----------
+Layer = Dict[str, Any]
+_NO_OVERLAY: List[Tuple[str, Layer]] = [("", {})]
+
+
+def is_variant_entry(entry) -> bool:
+    return isinstance(entry.get("base"), Mapping)
+
+
+def _parts(entry) -> Tuple[Layer, List[Tuple[str, Layer]], List[Tuple[str, Layer]]]:
+    """(base fields, [(desktop label, overlay)], [(edition label, overlay)])."""
+    if not is_variant_entry(entry):
+        return dict(entry), _NO_OVERLAY, _NO_OVERLAY
+    desktops = []
+    for label, overlay in (entry.get("desktops") or {"": {}}).items():
+        overlay = dict(overlay)
+        if label and "desktop" not in overlay:
+            overlay["desktop"] = label
+        desktops.append((label, overlay))
+    editions = [(label, dict(overlay)) for label, overlay in (entry.get("editions") or {"": {}}).items()]
+    return dict(entry["base"]), desktops, editions
+
+
+def variant_name(base: str, desktop: str = "", edition: str = "") -> str:
+    return " ".join(part for part in (base, desktop, edition) if part)
+
+
+class VariantView(Mapping):
+    """
+    One variant, built when it is read. Fields resolve edition overlay ->
+    desktop overlay -> base and double as attributes (like
+    recommender_engine.Distro): the merged fields are the instance
+    __dict__, so an attribute read is a plain instance lookup.
+    """
+
+    def __init__(self, base: Layer, desktop: Layer, edition: Layer):
+        fields = dict(base)
+        fields.update(desktop)
+        fields.update(edition)
+        object.__setattr__(self, "__dict__", fields)
+
+    def __setattr__(self, field, value):
+        raise AttributeError("catalog variants are read-only")
+
+    def __getitem__(self, field):
+        return self.__dict__[field]
+
+    def __iter__(self):
+        return iter(self.__dict__)
+
+    def __len__(self):
+        return len(self.__dict__)
+
+    def __repr__(self):
+        return f"VariantView({self.__dict__!r})"
+
+
+class _Values(ValuesView):
+    def __iter__(self):
+        return self._mapping._views()
+
+
+class _Items(ItemsView):
+    def __iter__(self):
+        return self._mapping._expand()
+
+
+class VariantCatalog(Mapping):
+    """
+    Read-only name -> VariantView mapping over every variant of a spec, in
+    spec order (bases, then desktops, then editions). Drop-in for DISTROS
+    (see recommender_engine.use_catalog / load_catalog).
+    """
+
+    def __init__(self, spec: Dict[str, Dict[str, Any]]):
+        self._bases = [(name,) + _parts(entry) for name, entry in spec.items()]
+        sizes = [len(desktops) * len(editions) for _, _, desktops, editions in self._bases]
+        self._starts = list(accumulate(sizes, initial=0))
+        self.count: int = self._starts[-1]
+        self._by_base = {name: b for b, (name, *_) in enumerate(self._bases)}
+        self.fields = tuple(dict.fromkeys(
+            field
+            for _, base, desktops, editions in self._bases
+            for layer in [base] + [o for _, o in desktops] + [o for _, o in editions]
+            for field in layer
+        ))
+
+    @classmethod
+    def from_file(cls, path: str) -> "VariantCatalog":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    # ---- variants ----
+    def _expand(self) -> Iterator[Tuple[str, VariantView]]:
+        for name, base, desktops, editions in self._bases:
+            for d_label, desktop in desktops:
+                for e_label, edition in editions:
+                    yield variant_name(name, d_label, e_label), VariantView(base, desktop, edition)
+
+    def _views(self) -> Iterator[VariantView]:
+        for _, base, desktops, editions in self._bases:
+            for _, desktop in desktops:
+                for _, edition in editions:
+                    yield VariantView(base, desktop, edition)
+
+    def _locate(self, i: int) -> Tuple[int, int, int]:
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        b = bisect_right(self._starts, i) - 1
+        d, e = divmod(i - self._starts[b], len(self._bases[b][3]))
+        return b, d, e
+
+    def name(self, i: int) -> str:
+        b, d, e = self._locate(i)
+        name, _, desktops, editions = self._bases[b]
+        return variant_name(name, desktops[d][0], editions[e][0])
+
+    def record(self, i: int) -> VariantView:
+        b, d, e = self._locate(i)
+        _, base, desktops, editions = self._bases[b]
+        return VariantView(base, desktops[d][1], editions[e][1])
+
+    def index(self, name: str) -> int:
+        """Catalog position of a variant name, parsed into base / desktop / edition."""
+        pos = len(name)
+        while pos > 0:
+            b = self._by_base.get(name[:pos])
+            if b is not None:
+                found = self._match(b, name[pos:])
+                if found is not None:
+                    return found
+            pos = name.rfind(" ", 0, pos)
+        raise KeyError(name)
+
+    def _match(self, b: int, rest: str):
+        _, _, desktops, editions = self._bases[b]
+        for d, (d_label, _) in enumerate(desktops):
+            tail = rest
+            if d_label:
+                if not tail.startswith(" " + d_label):
+                    continue
+                tail = tail[len(d_label) + 1:]
+            for e, (e_label, _) in enumerate(editions):
+                if tail == (" " + e_label if e_label else ""):
+                    return self._starts[b] + d * len(editions) + e
+        return None
+
+    # ---- columns ----
+    def _column_values(self, field: str) -> Iterator[Any]:
+        for _, base, desktops, editions in self._bases:
+            for _, desktop in desktops:
+                for _, edition in editions:
+                    for layer in (edition, desktop, base):
+                        if field in layer:
+                            yield layer[field]
+                            break
+                    else:
+                        raise KeyError(field)
+
+    def kind(self, field: str) -> str:
+        """Column kind as distro_catalog stores it ("d", "q", "b" or "s")."""
+        from distro_catalog import _kind
+
+        return _kind(list(self._column_values(field)))
+
+    def column(self, field: str) -> List[Any]:
+        """One field for every variant, in catalog order."""
+        return list(self._column_values(field))
+
+    def strings(self, field: str) -> List[str]:
+        if field == "name":
+            return [name for name, _ in self._expand()]
+        return [str(v) for v in self._column_values(field)]
+
+    def value(self, field: str, i: int) -> Any:
+        return self.record(i)[field]
+
+    # ---- Mapping ----
+    def __getitem__(self, name: str) -> VariantView:
+        return self.record(self.index(name))
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name, _ in self._expand())
+
+    def __len__(self) -> int:
+        return self.count
+
+    def values(self):
+        return _Values(self)
+
+    def items(self):
+        return _Items(self)
+
+
+def expand_variants(spec: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Every variant of spec as a plain name -> fields dict (for small catalogs
+    like DISTROS). A spec without variant entries is returned as is.
+    """
+    if not any(is_variant_entry(entry) for entry in spec.values()):
+        return spec
+    return {name: dict(view) for name, view in VariantCatalog(spec).items()}
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="distro_variants",
+                                     description="Show what a variant spec expands to.")
+    parser.add_argument("spec", help="JSON object of base name -> entry")
+    parser.add_argument("--list", action="store_true", help="print every variant name")
+    args = parser.parse_args(argv)
+
+    catalog = VariantCatalog.from_file(args.spec)
+    for name, _, desktops, editions in catalog._bases:
+        print(f"{name:28} {len(desktops)} desktops x {len(editions)} editions")
+    print(f"{len(catalog)} variants, {len(catalog.fields)} fields")
+    if args.list:
+        for name in catalog:
+            print(f"  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,326 @@
+# fleet_planner.py
+# Standardize a fleet of machines on one distro, or on a small set of them.
+#
+#   python fleet_planner.py machines.jsonl --objective min
+#   python fleet_planner.py machines.jsonl --objective p10 --portfolio 3 -o plan.json
+#
+# Input: one machine per line, {"id", "state", "prefs"} or a flat app state
+# with the answers inside (the same records recommender_batch reads). The
+# objective is the worst score over the fleet ("min"), a low percentile
+# ("p10", "p5", ...) or the average ("mean"); higher is better.
+#
+# The machines x distros score matrix comes from one vectorized pass
+# (recommender_batch.score_profiles). Machines that share prefs, hardware
+# band, RAM and free space score identically, so they are scored once and
+# carried as a count. A K-distro portfolio gives every machine its best
+# distro from the set; small catalogs are searched exhaustively, larger
+# ones greedily with swap refinement.
+
+import itertools
+import json
+import math
+import sys
+from typing import Any, Dict, List, Sequence
+
+from recommender_batch import (
+    _require_numpy,
+    _split_record,
+    _threshold_masks,
+    check_profile,
+    compile_catalog,
+    encode_profiles,
+    np,
+    score_profiles,
+)
+from recommender_engine import load_catalog
+
+EXHAUSTIVE_LIMIT = 200000   # portfolios tried one by one before going greedy
+_BLOCK_BYTES = 64 << 20
+
+
+def load_fleet(path: str):
+    """
+    (ids, states, prefs_list, skipped): ids default to the line number.
+    Unparseable lines and machines whose fields cannot be scored are skipped.
+    """
+    ids, states, prefs_list = [], [], []
+    skipped = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+                state, prefs = _split_record(rec)
+                check_profile(state, prefs)
+            except Exception:
+                skipped += 1
+                continue
+            ids.append(rec.get("id", number))
+            states.append(state)
+            prefs_list.append(prefs)
+    return ids, states, prefs_list, skipped
+
+
+class FleetScores:
+    """
+    Scores of a fleet against the active catalog, one row per distinct
+    machine profile. counts[u] machines share row u; inverse maps machine
+    i to its row.
+    """
+
+    def __init__(self, states: Sequence[Dict[str, Any]], prefs_list: Sequence[Dict[str, Any]]):
+        _require_numpy()
+        self.catalog = catalog = compile_catalog()
+        enc = encode_profiles(states, prefs_list)
+        # Everything a score depends on: prefs, hardware band, RAM, free space
+        key = np.column_stack([
+            enc["prefs_code"], enc["hardware_weights"], enc["ram_gb"], enc["storage_free_gb"],
+        ])
+        _, first, self.inverse, counts = np.unique(
+            key, axis=0, return_index=True, return_inverse=True, return_counts=True
+        )
+        self.inverse = self.inverse.ravel()
+        self.counts = counts.astype(np.float64)
+        distinct = dict(enc)
+        for k in ("hardware_weights", "ram_gb", "storage_free_gb", "prefs_code"):
+            distinct[k] = enc[k][first]
+        self.scores = score_profiles(catalog, distinct)
+        self.ram_low, _, self.storage_low = _threshold_masks(catalog, distinct)
+
+    @property
+    def machines(self) -> int:
+        return len(self.inverse)
+
+    def matrix(self):
+        """The full (machines x distros) score matrix."""
+        return self.scores[self.inverse]
+
+
+def objective_values(values, counts, objective: str):
+    """
+    objective for every column of values (profiles x C), each row counted
+    counts[u] times. Percentiles use the lower value, so the result is a
+    score some machine actually gets.
+    """
+    if objective == "mean":
+        return counts @ values / counts.sum()
+    if objective == "min":
+        return values.min(axis=0)
+    q = _percentile(objective) / 100.0
+    k = math.floor(q * (counts.sum() - 1))
+    order = np.argsort(values, axis=0, kind="stable")
+    cum = np.cumsum(counts[order], axis=0)
+    pos = (cum <= k).sum(axis=0)
+    return np.take_along_axis(values, order, axis=0)[pos, np.arange(values.shape[1])]
+
+
+def check_objective(objective: str):
+    """Raise ValueError unless objective is min, mean or p<0-100>."""
+    if objective not in ("min", "mean"):
+        _percentile(objective)
+
+
+def _percentile(objective: str) -> float:
+    if objective.startswith("p"):
+        try:
+            q = float(objective[1:])
+        except ValueError:
+            q = -1.0
+        if 0 <= q <= 100:
+            return q
+    raise ValueError(f"unknown objective {objective!r} (use min, mean or p<0-100>)")
+
+
+def _best_column(values, means) -> int:
+    """Highest objective, then highest mean; the earliest column wins ties."""
+    return int(np.lexsort((np.arange(len(values)), -means, -values))[0])
+
+
+def rank_distros(fleet: FleetScores, objective: str = "min") -> List[Dict[str, Any]]:
+    """Every distro with its fleet statistics, best first (ties in catalog order)."""
+    s, counts = fleet.scores, fleet.counts
+    value = objective_values(s, counts, objective)
+    mean = objective_values(s, counts, "mean")
+    worst = s.min(axis=0)
+    ram_low = counts @ fleet.ram_low
+    storage_low = counts @ fleet.storage_low
+    order = np.lexsort((np.arange(len(value)), -mean, -value))
+    return [
+        {
+            "name": fleet.catalog.names[j],
+            "index": int(j),
+            "objective": float(value[j]),
+            "min": float(worst[j]),
+            "mean": round(float(mean[j]), 2),
+            "below_min_ram": int(ram_low[j]),
+            "below_min_storage": int(storage_low[j]),
+        }
+        for j in order
+    ]
+
+
+def _portfolio_values(fleet: FleetScores, combos, objective: str):
+    """(objective, mean) for each portfolio (rows of combos), in memory-bounded blocks."""
+    s, counts = fleet.scores, fleet.counts
+    u, k = s.shape[0], combos.shape[1]
+    size = max(1, _BLOCK_BYTES // max(1, u * k * 8))
+    values, means = [], []
+    for start in range(0, len(combos), size):
+        best = s[:, combos[start:start + size]].max(axis=2)
+        values.append(objective_values(best, counts, objective))
+        means.append(objective_values(best, counts, "mean"))
+    return np.concatenate(values), np.concatenate(means)
+
+
+def best_portfolio(fleet: FleetScores, k: int, objective: str = "min",
+                   exhaustive_limit: int = EXHAUSTIVE_LIMIT) -> Dict[str, Any]:
+    """
+    The k distros that maximize the objective of each machine's best
+    score among them (then the mean). Returns {indices (catalog order),
+    objective, mean, method}.
+    """
+    m = fleet.scores.shape[1]
+    k = max(1, min(k, m))
+    if math.comb(m, k) <= exhaustive_limit:
+        combos = np.array(list(itertools.combinations(range(m), k)), dtype=np.intp)
+        values, means = _portfolio_values(fleet, combos, objective)
+        best = _best_column(values, means)
+        chosen, method = combos[best].tolist(), "exhaustive"
+        value, mean = values[best], means[best]
+    else:
+        chosen, value, mean = _greedy_portfolio(fleet, k, objective)
+        method = "greedy+swap"
+    return {"indices": sorted(chosen), "objective": float(value),
+            "mean": round(float(mean), 2), "method": method}
+
+
+def _greedy_portfolio(fleet: FleetScores, k: int, objective: str):
+    s, counts = fleet.scores, fleet.counts
+    chosen: List[int] = []
+    current = np.full(s.shape[0], -np.inf)
+    for _ in range(k):
+        # Every candidate added to the current set, evaluated at once
+        cand = np.maximum(current[:, None], s)
+        values = objective_values(cand, counts, objective)
+        means = objective_values(cand, counts, "mean")
+        values[chosen] = means[chosen] = -np.inf
+        j = _best_column(values, means)
+        chosen.append(j)
+        current = cand[:, j]
+    value = objective_values(current[:, None], counts, objective)[0]
+    mean = objective_values(current[:, None], counts, "mean")[0]
+
+    improved = True
+    while improved:
+        improved = False
+        for pos in range(k):
+            rest = [c for i, c in enumerate(chosen) if i != pos]
+            base = s[:, rest].max(axis=1) if rest else np.full(s.shape[0], -np.inf)
+            cand = np.maximum(base[:, None], s)
+            values = objective_values(cand, counts, objective)
+            means = objective_values(cand, counts, "mean")
+            values[rest] = means[rest] = -np.inf
+            j = _best_column(values, means)
+            if (values[j], means[j]) > (value, mean):
+                chosen[pos], value, mean = j, values[j], means[j]
+                improved = True
+    return chosen, value, mean
+
+
+def assign(fleet: FleetScores, indices: Sequence[int]):
+    """Each machine's best distro from indices (catalog order breaks ties), as catalog indices."""
+    indices = np.asarray(sorted(indices), dtype=np.intp)
+    per_profile = indices[np.argmax(fleet.scores[:, indices], axis=1)]
+    return per_profile[fleet.inverse]
+
+
+def plan(ids: Sequence[Any], states, prefs_list, objective: str = "min",
+         top: int = 5, portfolio: int = 1) -> Dict[str, Any]:
+    """
+    Full report: the top distros by objective, the machines below the
+    best one's RAM/storage minimums, and (portfolio > 1) the best
+    portfolio with each machine's assignment.
+    """
+    check_objective(objective)
+    fleet = FleetScores(states, prefs_list)
+    ranked = rank_distros(fleet, objective)
+    names = fleet.catalog.names
+
+    def below(j, mask):
+        rows = mask[:, j][fleet.inverse]
+        return [ids[i] for i in np.flatnonzero(rows)]
+
+    best = dict(ranked[0]) if ranked else None
+    if best is not None:
+        j = best.pop("index")
+        best["machines_below_min_ram"] = below(j, fleet.ram_low)
+        best["machines_below_min_storage"] = below(j, fleet.storage_low)
+    report = {
+        "machines": fleet.machines,
+        "profiles": len(fleet.counts),
+        "objective": objective,
+        "best": best,
+        "distros": [{k: v for k, v in r.items() if k != "index"} for r in ranked[:top]],
+    }
+    if portfolio > 1 and ranked:
+        p = best_portfolio(fleet, portfolio, objective)
+        assigned = assign(fleet, p["indices"])
+        picked = [names[j] for j in p["indices"]]
+        ram_low = fleet.ram_low[fleet.inverse, assigned]
+        storage_low = fleet.storage_low[fleet.inverse, assigned]
+        report["portfolio"] = {
+            "distros": picked,
+            "objective": p["objective"],
+            "mean": p["mean"],
+            "method": p["method"],
+            "machines_per_distro": {
+                names[j]: int(c) for j, c in zip(*np.unique(assigned, return_counts=True))
+            },
+            "assignment": {ids[i]: names[j] for i, j in enumerate(assigned.tolist())},
+            "machines_below_min_ram": [ids[i] for i in np.flatnonzero(ram_low)],
+            "machines_below_min_storage": [ids[i] for i in np.flatnonzero(storage_low)],
+        }
+    return report
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="fleet_planner",
+                                     description="Pick the distro (or K distros) that serve a whole fleet best.")
+    parser.add_argument("machines", help="JSONL of {id, state, prefs}")
+    parser.add_argument("-o", "--output", help="write the report JSON here (default: stdout)")
+    parser.add_argument("--objective", default="min", help="min, mean or p<0-100> (default: min)")
+    parser.add_argument("--top", type=int, default=5, help="distros to list")
+    parser.add_argument("--portfolio", type=int, default=1, metavar="K",
+                        help="also pick the best K distros and assign each machine one")
+    parser.add_argument("--catalog", help="catalog file built by distro_catalog.py")
+    args = parser.parse_args(argv)
+
+    _require_numpy()
+    try:
+        check_objective(args.objective)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.catalog:
+        load_catalog(args.catalog)
+    ids, states, prefs_list, skipped = load_fleet(args.machines)
+    if not states:
+        parser.error("no machines in the input")
+    report = plan(ids, states, prefs_list, args.objective, args.top, args.portfolio)
+    report["skipped"] = skipped
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        best = report["best"]
+        print(f"{best['name']}: {args.objective} {best['objective']} over {report['machines']} machines, "
+              f"{len(best['machines_below_min_ram'])} below its minimum RAM", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
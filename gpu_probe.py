@@ -5,6 +5,9 @@ import subprocess
 import re
 import os
 
+import pci_ids
+from keyword_tiers import KeywordTiers
+
 
 def _run(cmd, shell=False, timeout=10):
     try:
@@ -51,7 +54,121 @@ def _detect_windows_gpu():
     return gpus
 
 
-def _detect_linux_gpu():
+# ---------------- Linux: sysfs ----------------
+# Display controllers are PCI class 0x03 (VGA, XGA, 3D, other). Reading
+# them from sysfs costs a few file reads instead of forking lspci and
+# nvidia-smi; those only run in deep mode (probe_gpu(deep=True)). Names
+# come from the pci_ids index (the system pci.ids without one).
+SYSFS_PCI_DEVICES = "/sys/bus/pci/devices"
+SYSFS_DRM = "/sys/class/drm"
+
+PCI_VENDORS = {
+    "1002": "AMD", "1013": "Cirrus Logic", "102b": "Matrox", "106b": "Apple", "10de": "NVIDIA",
+    "1234": "QEMU", "15ad": "VMware", "1a03": "ASPEED", "1af4": "Red Hat Virtio", "5143": "Qualcomm",
+    "8086": "Intel",
+}
+
+_IORESOURCE_MEM = 0x200
+_IORESOURCE_PREFETCH = 0x2000
+
+
+def _read_sysfs(path: str) -> str:
+    try:
+        with open(path, "r", encoding="ascii", errors="replace") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _pci_id(path: str) -> str:
+    # "0x10de" -> "10de"
+    value = _read_sysfs(path).lower()
+    return value[2:] if value.startswith("0x") else value
+
+
+def _drm_vram() -> dict:
+    """PCI address -> VRAM bytes from the amdgpu mem_info_vram_total of each DRM card."""
+    out = {}
+    try:
+        cards = os.listdir(SYSFS_DRM)
+    except OSError:
+        return out
+    for card in cards:
+        if not re.fullmatch(r"card\d+", card):
+            continue
+        device = os.path.join(SYSFS_DRM, card, "device")
+        total = _read_sysfs(os.path.join(device, "mem_info_vram_total"))
+        if total.isdigit():
+            out[os.path.basename(os.path.realpath(device))] = int(total)
+    return out
+
+
+def _bar_vram(device: str) -> int:
+    """Size in bytes of the largest prefetchable memory BAR (the VRAM aperture), 0 if none."""
+    best = 0
+    text = _read_sysfs(os.path.join(device, "resource"))
+    # Lines 0-5 are the BARs, 6 the expansion ROM
+    for line in text.splitlines()[:6]:
+        try:
+            start, end, flags = (int(v, 16) for v in line.split()[:3])
+        except ValueError:
+            continue
+        if start and end > start and flags & _IORESOURCE_MEM and flags & _IORESOURCE_PREFETCH:
+            best = max(best, end - start + 1)
+    return best
+
+
+def _gpu_names(vendor: str, device: str, subvendor: str, subdevice: str):
+    """("Vendor Device" as lspci -mm prints it, subsystem name or None)."""
+    vendor_name = device_name = subsystem_name = None
+    try:
+        ids = [int(vendor, 16), int(device, 16)]
+    except ValueError:
+        ids = None
+    if ids is not None:
+        try:
+            ids += [int(subvendor, 16), int(subdevice, 16)]
+        except ValueError:
+            pass
+        vendor_name, device_name, subsystem_name = pci_ids.lookup(*ids)
+    vendor_name = vendor_name or PCI_VENDORS.get(vendor, "PCI")
+    if device_name:
+        return f"{vendor_name} {device_name}", subsystem_name
+    return f"{vendor_name} display device {vendor}:{device}", None
+
+
+def _detect_linux_gpu_sysfs():
+    """Display-class PCI devices from sysfs; None when sysfs is not readable."""
+    try:
+        slots = sorted(os.listdir(SYSFS_PCI_DEVICES))
+    except OSError:
+        return None
+    gpus = []
+    drm_vram = None
+    for slot in slots:
+        device = os.path.join(SYSFS_PCI_DEVICES, slot)
+        if not _read_sysfs(os.path.join(device, "class")).lower().startswith("0x03"):
+            continue
+        if drm_vram is None:
+            drm_vram = _drm_vram()
+        vendor = _pci_id(os.path.join(device, "vendor"))
+        dev_id = _pci_id(os.path.join(device, "device"))
+        name, board = _gpu_names(vendor, dev_id, _pci_id(os.path.join(device, "subsystem_vendor")),
+                                 _pci_id(os.path.join(device, "subsystem_device")))
+        vram = drm_vram.get(slot) or _bar_vram(device)
+        gpus.append({
+            "name": name,
+            "board": board,
+            "vram_mb": vram // (1024 * 1024),
+            "pci_id": f"{vendor}:{dev_id}",
+            "slot": slot,
+            "vram_source": "drm" if slot in drm_vram else ("bar" if vram else ""),
+        })
+    return gpus
+
+
+# ---------------- Linux: lspci / nvidia-smi (deep mode) ----------------
+def _detect_linux_gpu_tools():
     gpus = []
     # Try lspci for VGA/3D controllers
     out = _run(["lspci", "-mm"])
@@ -85,6 +202,26 @@ def _detect_linux_gpu():
     return gpus
 
 
+def _detect_linux_gpu(deep: bool = False):
+    """(gpus, source). sysfs only, unless deep or sysfs is unreadable."""
+    gpus = _detect_linux_gpu_sysfs()
+    if gpus is None:
+        return _detect_linux_gpu_tools(), "lspci/nvidia-smi"
+    if not deep:
+        return gpus, "sysfs"
+    tools = _detect_linux_gpu_tools()
+    if not gpus:
+        return tools, "lspci/nvidia-smi"
+    # Keep sysfs' device list; take nvidia-smi's names and VRAM for NVIDIA cards in order
+    nvidia = iter(g for g in tools if g.get("vram_mb"))
+    for g in gpus:
+        if g["pci_id"].startswith("10de:"):
+            better = next(nvidia, None)
+            if better is not None:
+                g.update(name=better["name"], vram_mb=better["vram_mb"], vram_source="nvidia-smi")
+    return gpus, "sysfs+lspci/nvidia-smi"
+
+
 def _detect_macos_gpu():
     out = _run(["system_profiler", "SPDisplaysDataType"])
     gpus = []
@@ -168,22 +305,29 @@ STRONG_KEYWORDS = [
 ]
 
 
+SOFTWARE_KEYWORDS = ["llvmpipe", "softpipe", "swrast", "virtio", "vmware svga", "microsoft basic display"]
+
+# Name tiers in priority order: software/virtual first, then strong (most
+# specific), mid and weak. The pattern tiers only apply when VRAM says nothing.
+_NAME_TIERS = KeywordTiers([
+    SOFTWARE_KEYWORDS,
+    STRONG_KEYWORDS,
+    MID_KEYWORDS,
+    WEAK_KEYWORDS,
+    [re.compile(r"rtx\s*[3-9]0\d{2}")],
+    [re.compile(r"rtx\s*\d{4}"), re.compile(r"gtx\s*1[0-9]\d{2}")],
+    ["intel"],
+])
+_KEYWORD_CATEGORIES = ("weak", "strong", "mid", "weak")
+_PATTERN_CATEGORIES = ("strong", "mid", "weak")
+
+
 def _categorize(name: str, vram_mb: int) -> str:
     if not name:
         return "nogpu"
-    n = name.lower()
-
-    # Software/virtual
-    if any(k in n for k in ["llvmpipe", "softpipe", "swrast", "virtio", "vmware svga", "microsoft basic display"]):
-        return "weak"
-
-    # Strong first (most specific)
-    if any(k in n for k in STRONG_KEYWORDS):
-        return "strong"
-    if any(k in n for k in MID_KEYWORDS):
-        return "mid"
-    if any(k in n for k in WEAK_KEYWORDS):
-        return "weak"
+    tier = _NAME_TIERS.best(name.lower())
+    if tier is not None and tier < len(_KEYWORD_CATEGORIES):
+        return _KEYWORD_CATEGORIES[tier]
 
     # Heuristics by VRAM
     if vram_mb >= 8000:
@@ -194,19 +338,15 @@ def _categorize(name: str, vram_mb: int) -> str:
         return "weak"
 
     # Pattern fallbacks
-    if re.search(r"rtx\s*[3-9]0\d{2}", n):
-        return "strong"
-    if re.search(r"rtx\s*\d{4}", n) or re.search(r"gtx\s*1[0-9]\d{2}", n):
-        return "mid"
-    if "intel" in n:
-        return "weak"
-
+    if tier is not None:
+        return _PATTERN_CATEGORIES[tier - len(_KEYWORD_CATEGORIES)]
     return "unknown"
 
 
-def probe_gpu():
+def probe_gpu(deep: bool = False):
     """
     Cross-platform GPU probe.
+    deep also runs lspci and nvidia-smi on Linux (sysfs alone otherwise).
     Returns: {ok, name, category, vram_mb, all_gpus, source, error}
     """
     sys = platform.system().lower()
@@ -215,8 +355,7 @@ def probe_gpu():
             gpus = _detect_windows_gpu()
             source = "wmi"
         elif sys == "linux":
-            gpus = _detect_linux_gpu()
-            source = "lspci/nvidia-smi"
+            gpus, source = _detect_linux_gpu(deep)
         elif sys == "darwin":
             gpus = _detect_macos_gpu()
             source = "system_profiler"
@@ -269,4 +408,6 @@ def probe_gpu():
 
 if __name__ == "__main__":
     import json
-    print(json.dumps(probe_gpu(), indent=2))
+    import sys
+
+    print(json.dumps(probe_gpu(deep="--deep" in sys.argv[1:]), indent=2))
@@ -166,8 +166,4 @@ class HardwareScreen(tk.Frame):
         self.after(800, self._tick)
 
     def _rescan_all(self):
-        self.controller.refresh_ram_async()
-        self.controller.refresh_cpu_async()
-        self.controller.refresh_gpu_async()
-        self.controller.refresh_storage_async()
-        self.controller.refresh_battery_async()
+        self.controller.start_probes(refresh=True)
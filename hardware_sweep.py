@@ -0,0 +1,211 @@
+# hardware_sweep.py
+# What-if hardware sweeps for procurement planning.
+# One prefs profile against a grid of hardware states: hardware score, tier
+# and the full ranking for every grid point in one vectorized pass, plus
+# the points along each axis where the ranking changes
+# ("Fedora Workstation overtakes Linux Mint Cinnamon at 8 GB RAM").
+
+from typing import Any, Dict, List, Optional, Sequence
+
+from recommender_batch import (
+    _require_numpy,
+    compile_catalog,
+    encode_columns,
+    np,
+    prefs_codes,
+    score_profiles,
+    top_n_indices,
+)
+from recommender_engine import _GPU_SCORES, _STORAGE_SCORES, _TIER_LIMITS, _TIER_NAMES
+
+# Axis name -> values, cheapest to best
+DEFAULT_AXES = {
+    "ram_total_gb": [2, 4, 8, 16, 32, 64],
+    "storage_cat": ["low", "mid", "fast", "high"],  # HDD -> NVMe
+    "gpu_cat": ["nogpu", "weak", "mid", "strong"],
+}
+DEFAULT_STATE = {
+    "cpu_score": 50,
+    "gpu_cat": "unknown",
+    "ram_total_gb": 8,
+    "storage_cat": "unknown",
+    "storage_free_gb": 0,
+}
+AXIS_KEYS = ("cpu_score", "gpu_cat", "ram_total_gb", "storage_cat", "storage_free_gb")
+
+_AXIS_FORMATS = {
+    "ram_total_gb": "{} GB RAM",
+    "storage_free_gb": "{} GB free",
+    "cpu_score": "CPU score {}",
+    "gpu_cat": "GPU {}",
+    "storage_cat": "storage {}",
+}
+
+
+def _axis_column(key: str, values: Sequence[Any]):
+    """Per-value column for one axis, in the units encode_columns() expects."""
+    if key == "gpu_cat":
+        return np.array([_GPU_SCORES.get((v or "").lower(), 35) for v in values], dtype=np.float64)
+    if key == "storage_cat":
+        return np.array([_STORAGE_SCORES.get((v or "").lower(), 50) for v in values], dtype=np.float64)
+    return np.array([float(v or 0) for v in values], dtype=np.float64)
+
+
+_COLUMN_NAMES = {"gpu_cat": "gpu_score", "storage_cat": "storage_score"}
+
+
+def hardware_tiers(hw_scores):
+    """Vectorized hardware_tier()."""
+    _require_numpy()
+    return np.array(_TIER_NAMES, dtype=object)[np.searchsorted(_TIER_LIMITS, hw_scores, side="right")]
+
+
+def sweep(
+    prefs: Dict[str, Any],
+    axes: Optional[Dict[str, Sequence[Any]]] = None,
+    base_state: Optional[Dict[str, Any]] = None,
+    top_n: Optional[int] = None,
+    catalog=None,
+    chunk_size: int = 65536,
+) -> Dict[str, Any]:
+    """
+    Rank the catalog for every point of a hardware grid.
+
+    axes maps state keys (see AXIS_KEYS) to the values to try; keys not in
+    axes come from base_state. Returns arrays shaped like the grid:
+      hardware_score, tier          grid shape
+      ranking, scores               grid shape + (top_n,), best first
+    ranking[i, j, ...] equals the order recommend() gives for that state.
+    """
+    _require_numpy()
+    axes = dict(DEFAULT_AXES if axes is None else axes)
+    unknown = set(axes) - set(AXIS_KEYS)
+    if unknown:
+        raise ValueError(f"unknown axes: {sorted(unknown)}")
+    state = dict(DEFAULT_STATE)
+    state.update(base_state or {})
+    catalog = catalog or compile_catalog()
+    names = list(axes)
+    shape = tuple(len(axes[a]) for a in names)
+    size = int(np.prod(shape)) if shape else 1
+    k = len(catalog) if top_n is None else min(top_n, len(catalog))
+
+    grid = np.indices(shape).reshape(len(shape), size) if shape else np.zeros((0, 1), dtype=np.intp)
+    columns = {}
+    for key in AXIS_KEYS:
+        col = _COLUMN_NAMES.get(key, key)
+        if key in axes:
+            columns[col] = _axis_column(key, axes[key])[grid[names.index(key)]]
+        else:
+            columns[col] = np.full(size, _axis_column(key, [state.get(key)])[0])
+
+    codes, keys = prefs_codes([prefs])
+    hw = np.empty(size, dtype=np.int64)
+    ranking = np.empty((size, k), dtype=np.int64)
+    scores = np.empty((size, k), dtype=np.float64)
+    for start in range(0, size, chunk_size):
+        stop = min(size, start + chunk_size)
+        enc = encode_columns(
+            {c: v[start:stop] for c, v in columns.items()},
+            np.zeros(stop - start, dtype=np.intp),
+            keys,
+        )
+        idx, sc = top_n_indices(score_profiles(catalog, enc), k)
+        hw[start:stop] = enc["hardware_score"]
+        ranking[start:stop] = idx
+        scores[start:stop] = sc
+
+    return {
+        "names": catalog.names,
+        "axes": [(a, list(axes[a])) for a in names],
+        "shape": shape,
+        "hardware_score": hw.reshape(shape),
+        "tier": hardware_tiers(hw).reshape(shape),
+        "ranking": ranking.reshape(shape + (k,)),
+        "scores": scores.reshape(shape + (k,)),
+    }
+
+
+def rank_changes(result: Dict[str, Any], axis: str, top_n: int = 3) -> List[Dict[str, Any]]:
+    """
+    Walk every line of the grid along one axis and report where a distro
+    moves above another within the top_n. Each event:
+      {"axis", "value", "previous", "at": {other axes}, "distro", "overtakes", "rank"}
+    "rank" is the overtaking distro's new 1-based position.
+    """
+    _require_numpy()
+    axis_names = [a for a, _ in result["axes"]]
+    if axis not in axis_names:
+        raise ValueError(f"{axis} is not an axis of this sweep")
+    a = axis_names.index(axis)
+    values = result["axes"][a][1]
+    others = [(n, v) for n, v in result["axes"] if n != axis]
+    names = result["names"]
+    top_n = min(top_n, result["ranking"].shape[-1])
+    # (lines, axis length, top_n)
+    rank = np.moveaxis(result["ranking"][..., :top_n], a, -2)
+    lines_shape = rank.shape[:-2]
+    rank = rank.reshape(-1, len(values), top_n)
+
+    events = []
+    for step in range(len(values) - 1):
+        before, after = rank[:, step], rank[:, step + 1]
+        for line in np.nonzero((before != after).any(axis=1))[0].tolist():
+            prev = {j: p for p, j in enumerate(before[line].tolist())}
+            where = np.unravel_index(line, lines_shape) if lines_shape else ()
+            at = {n: v[i] for (n, v), i in zip(others, where)}
+            for pos, j in enumerate(after[line].tolist()):
+                old_pos = prev.get(j, top_n)
+                for above in after[line, pos + 1:].tolist():
+                    if prev.get(above, top_n) < old_pos:
+                        events.append({
+                            "axis": axis,
+                            "value": values[step + 1],
+                            "previous": values[step],
+                            "at": at,
+                            "distro": names[j],
+                            "overtakes": names[above],
+                            "rank": pos + 1,
+                        })
+    return events
+
+
+def describe_change(event: Dict[str, Any]) -> str:
+    fmt = _AXIS_FORMATS.get(event["axis"], event["axis"] + "={}")
+    text = f"{event['distro']} overtakes {event['overtakes']} at {fmt.format(event['value'])}"
+    if event["at"]:
+        text += " (" + ", ".join(_AXIS_FORMATS.get(k, k + "={}").format(v) for k, v in event["at"].items()) + ")"
+    return text
+
+
+if __name__ == "__main__":
+    import time
+
+    prefs = {
+        "usage": "development",
+        "experience": "intermediate",
+        "update_pref": "balanced",
+        "gaming_intensity": "casual",
+    }
+    t0 = time.perf_counter()
+    res = sweep(prefs, base_state={"cpu_score": 55, "storage_free_gb": 100})
+    t1 = time.perf_counter()
+    print(f"{np.prod(res['shape'])} grid points in {(t1 - t0) * 1000:.1f} ms")
+    for event in rank_changes(res, "ram_total_gb", top_n=3):
+        if event["at"] == {"storage_cat": "high", "gpu_cat": "mid"}:
+            print(" ", describe_change(event))
+
+    big = {
+        "ram_total_gb": [1, 2, 3, 4, 6, 8, 12, 16, 24, 32, 48, 64],
+        "storage_cat": ["low", "mid", "fast", "high"],
+        "gpu_cat": ["nogpu", "weak", "mid", "strong"],
+        "cpu_score": list(range(0, 101, 5)),
+        "storage_free_gb": [5, 10, 15, 20, 25, 30, 40, 60, 120, 250, 500, 1000],
+    }
+    t0 = time.perf_counter()
+    res = sweep(prefs, big)
+    t1 = time.perf_counter()
+    events = rank_changes(res, "ram_total_gb", top_n=3)
+    t2 = time.perf_counter()
+    print(f"{np.prod(res['shape'])} grid points in {(t1 - t0) * 1000:.0f} ms, "
+          f"{len(events)} RAM rank changes in {(t2 - t1) * 1000:.0f} ms")
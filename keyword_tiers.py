@@ -0,0 +1,134 @@
+# keyword_tiers.py
+# Ordered keyword tiers matched in one regex scan.
+#
+#   tiers = KeywordTiers([["rtx 4090", "titan"], ["gtx 1650"], ["intel hd", re.compile(r"rtx\s*\d{4}")]])
+#   tiers.best("nvidia geforce rtx 4090")  -> 0   (index of the first tier with a hit)
+#
+# The classifiers used to test each keyword list with `any(k in name ...)`
+# and then several regexes, one pass per list. Here all literal keywords
+# go into one trie, compiled to a regex, and the whole table into a single
+# lookahead that is tried at every position of the name:
+#
+#   (?=[first chars])(?=(?:(literal trie)|(regex)|...))
+#
+# Priority rules:
+# - A lower tier always wins, wherever in the name it matches.
+# - Two literals can only match at the same position if one is a prefix
+#   of the other. A longer literal is kept only if its tier beats every
+#   shorter one on its path ("m1 pro" over "m1"). The trie is greedy, so
+#   at each position it reports the best literal that matches there.
+# - Regex keywords get their own groups. They sit between runs of literal
+#   tiers in tier order, so the first group that matches at a position is
+#   also the best one there.
+# Being zero-width, the scan sees overlapping keywords too, and the lowest
+# tier over all positions is what testing the tiers one by one returns.
+# Literals match as plain substrings; callers lowercase names first as
+# before. Results are memoized per name, since inventories repeat the same
+# few thousand names.
+#
+# Speed: a name seen before is a cache hit, several million per second.
+# A new name costs one regex scan, a few hundred thousand per second for
+# the probe tables. That loses to a handful of plain `in` tests, so short
+# lists (cpu_probe's vendor check) keep those; the probes use KeywordTiers
+# for the long GPU name and CPU model tables only.
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Pattern, Sequence, Union
+
+Keyword = Union[str, Pattern]
+
+
+def trie_pattern(words: Dict[str, int]) -> str:
+    """
+    Regex for a literal -> tier mapping that matches, at any position, the
+    literal with the best tier among those starting there.
+    """
+    trie: Dict[str, dict] = {}
+    for word, tier in words.items():
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = min(tier, node.get("", tier))
+
+    def emit(node, above: Optional[int]) -> Optional[str]:
+        end = node.get("")
+        if end is not None and above is not None and end >= above:
+            end = None  # a shorter literal on this path already does as well
+        if end is not None:
+            above = end
+        branches = []
+        for ch, child in sorted((ch, child) for ch, child in node.items() if ch):
+            rest = emit(child, above)
+            if rest is not None:
+                branches.append(re.escape(ch) + rest)
+        if not branches:
+            return "" if end is not None else None
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy: a longer (better) literal is tried before stopping here
+        return f"(?:{body})?" if end is not None else body
+
+    return emit(trie, None) or ""
+
+
+def _first_char(pattern: str) -> Optional[str]:
+    # The character every match starts with, for simple regexes like r"rtx\s*\d{4}"
+    if "|" not in pattern and re.match(r"[a-z0-9](?![*?{])", pattern):
+        return pattern[0]
+    return None
+
+
+class KeywordTiers:
+    """
+    Tiers of keywords in priority order. A keyword is a literal substring
+    or a compiled regex without capturing groups or flags. best(text) is
+    the index of the first tier that has any keyword in text, or None.
+    """
+
+    def __init__(self, tiers: Sequence[Sequence[Keyword]], cache_size: int = 1 << 16):
+        self.tiers = [list(tier) for tier in tiers]
+        # Per regex group: a literal -> tier dict (a trie run) or a regex's tier
+        groups: List[Union[Dict[str, int], int]] = []
+        parts: List[str] = []
+        for i, tier in enumerate(self.tiers):
+            literals = [k for k in tier if isinstance(k, str)]
+            if literals:
+                if not groups or not isinstance(groups[-1], dict):
+                    groups.append({})
+                    parts.append("")
+                for k in literals:
+                    groups[-1].setdefault(k, i)
+            for k in tier:
+                if isinstance(k, str):
+                    continue
+                if k.groups or k.flags & ~re.UNICODE:
+                    raise ValueError("keyword regexes must not have capturing groups or flags")
+                groups.append(i)
+                parts.append(k.pattern)
+
+        starts = set()
+        for i, group in enumerate(groups):
+            if isinstance(group, dict):
+                parts[i] = trie_pattern(group)
+                starts.update(k[:1] for k in group)
+            else:
+                starts.add(_first_char(parts[i]))
+        guard = ""
+        if starts and not starts & {"", None}:
+            guard = "(?=[" + "".join(re.escape(c) for c in sorted(starts)) + "])"
+        body = "|".join(f"({part})" for part in parts) or "(?!)"
+        self.regex = re.compile(guard + "(?=(?:" + body + "))")
+        self._groups = [None] + groups  # indexed by match.lastindex
+        self.best = lru_cache(maxsize=cache_size)(self._best)
+
+    def _best(self, text: str) -> Optional[int]:
+        best = None
+        groups = self._groups
+        for m in self.regex.finditer(text):
+            group = groups[m.lastindex]
+            tier = group if type(group) is int else group[m.group(m.lastindex)]
+            if best is None or tier < best:
+                best = tier
+                if tier == 0:
+                    break
+        return best
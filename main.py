@@ -12,16 +12,14 @@ import urllib.error
 import urllib.request
 from tkinter import filedialog, messagebox, ttk
 
-from battery_probe import probe_battery
-from cpu_probe import probe_cpu
-from gpu_probe import probe_gpu
 from hardware_screen import HardwareScreen
 from iso_resolver import resolve_iso
 from preferences_screen import PreferencesScreen
-from ram_probe import probe_ram
+from probe_cache import cached_probes
+from probe_orchestrator import PROBE_NAMES, ProbeRun
 from recommendation_screen import RecommendationScreen
+from recommender_engine import load_ranking_table
 from sha_verify import ShaVerifyDialog, fetch_expected_hash
-from storage_probe import probe_storage_type
 from theme import COLORS, FONTS, apply_theme
 from warning_screen import WarningScreen
 from welcome_screen import WelcomeScreen
@@ -84,6 +82,15 @@ class MainWindow(tk.Tk):
         self.rowconfigure(0, weight=1)
         self.columnconfigure(0, weight=1)
 
+        # Precomputed rankings, if shipped next to the app (see ranking_table.py)
+        table_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ranking_table.lhtab")
+        if os.path.exists(table_path):
+            try:
+                load_ranking_table(table_path)
+            except Exception as e:
+                # Rankings are still scored live; just say why the table was skipped
+                print(f"Ranking table not used ({table_path}): {e}", file=sys.stderr)
+
         self.state = {
             # User prefs (added more settings!)
             "visual": None,
@@ -126,6 +133,8 @@ class MainWindow(tk.Tk):
             "battery_percent": None,
             "battery_plugged": None,
         }
+        self.pending_probes = set()
+        self.probe_run = None
 
         self.container = tk.Frame(self, bg=COLORS["bg"])
         self.container.grid(row=0, column=0, sticky="nsew")
@@ -158,109 +167,47 @@ class MainWindow(tk.Tk):
         )
         status.grid(row=1, column=0, sticky="ew")
 
-        # Initial hardware checks
-        self.refresh_ram_async()
-        self.refresh_gpu_async()
-        self.refresh_storage_async()
-        self.refresh_cpu_async()
-        self.refresh_battery_async()
+        # Initial hardware checks. Screens read pending_probes to show
+        # provisional results until every probe has reported.
+        self.current_frame = None
+        self.start_probes()
 
         self.show_frame("WelcomeScreen")
 
     def show_frame(self, name: str):
+        self.current_frame = name
         self.frames[name].tkraise()
 
     # ---------- Probe refresh ----------
-    def _categorize_ram(self, total_gb):
-        if total_gb is None:
-            return "unknown"
-        if total_gb <= 2.0:
-            return "very_low"
-        if total_gb <= 4.0:
-            return "low"
-        if total_gb <= 8.0:
-            return "mid"
-        if total_gb <= 16.0:
-            return "good"
-        return "high"
-
-    def refresh_ram_async(self):
-        def worker():
-            d = probe_ram()
-            if d and d.get("ok"):
-                self.state["ram_total_gb"] = d.get("total_gb")
-                self.state["ram_avail_gb"] = d.get("available_gb")
-                self.state["ram_used_percent"] = d.get("used_percent")
-                self.state["ram_cat"] = self._categorize_ram(d.get("total_gb"))
-                self.state["ram_speed_mhz"] = d.get("speed_mhz")
-                self.state["ram_type"] = d.get("type")
-            else:
-                self.state["ram_cat"] = "unknown"
+    def start_probes(self, names=PROBE_NAMES, refresh=False):
+        """
+        (Re)scan the hardware. A scan still running is cancelled. Static
+        results come from the probe cache unless refresh is set.
+        """
+        if self.probe_run is not None:
+            self.probe_run.cancel()
+
+        def deliver(result):
+            # Called from a probe thread; hand over to the Tk thread
             try:
-                self.after(0, self._update_statusbar)
+                self.after(0, self._on_probe_done, run, result)
             except Exception:
                 pass
 
-        threading.Thread(target=worker, daemon=True).start()
-
-    def refresh_cpu_async(self, on_done=None):
-        def worker():
-            try:
-                d = probe_cpu()
-                if d and d.get("ok"):
-                    self.state["cpu_model"] = d.get("model")
-                    self.state["max_ghz"] = d.get("max_ghz")
-                    self.state["cores"] = d.get("cores")
-                    self.state["threads"] = d.get("threads")
-                    self.state["cpu_cat"] = d.get("category")
-                    self.state["cpu_score"] = d.get("score")
-                    self.state["cpu_gen"] = d.get("generation")
-                    self.state["cpu_vendor"] = d.get("vendor")
-                else:
-                    self.state["cpu_cat"] = "unknown"
-            finally:
-                if on_done:
-                    try:
-                        self.after(0, on_done)
-                    except Exception:
-                        pass
-
-        threading.Thread(target=worker, daemon=True).start()
-
-    def refresh_gpu_async(self):
-        def worker():
-            d = probe_gpu()
-            if d and d.get("ok"):
-                self.state["gpu_name"] = d.get("name")
-                self.state["gpu_cat"] = d.get("category")
-                self.state["gpu_vram_mb"] = d.get("vram_mb")
-            else:
-                self.state["gpu_cat"] = "nogpu"
-
-        threading.Thread(target=worker, daemon=True).start()
-
-    def refresh_storage_async(self):
-        def worker():
-            d = probe_storage_type()
-            if d and d.get("ok"):
-                self.state["storage_type"] = d.get("type")
-                self.state["storage_cat"] = d.get("category")
-                self.state["storage_size_gb"] = d.get("size_gb")
-                self.state["storage_free_gb"] = d.get("free_gb")
-            else:
-                self.state["storage_cat"] = "unknown"
-
-        threading.Thread(target=worker, daemon=True).start()
-
-    def refresh_battery_async(self):
-        def worker():
-            d = probe_battery()
-            if d and d.get("ok"):
-                self.state["has_battery"] = d.get("has_battery", False)
-                self.state["battery_percent"] = d.get("percent")
-                self.state["battery_plugged"] = d.get("plugged")
-
-        threading.Thread(target=worker, daemon=True).start()
+        run = ProbeRun(names, on_result=deliver, probes=cached_probes(refresh))
+        self.probe_run = run
+        self.pending_probes.update(run.names)
+        run.start()
+
+    def _on_probe_done(self, run, result):
+        if run is not self.probe_run:
+            return  # superseded by a rescan
+        self.state.update(result["fields"])
+        self.pending_probes.discard(result["name"])
+        if result["name"] == "ram":
+            self._update_statusbar()
+        if self.current_frame == "RecommendationScreen":
+            self.frames["RecommendationScreen"].refresh()
 
     def _update_statusbar(self):
         ram = self.state.get("ram_total_gb")
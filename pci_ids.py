@@ -0,0 +1,346 @@
+# pci_ids.py
+# GPU names from a compact pci.ids index, read through mmap.
+#
+# pci.ids (from pciutils/hwdata) is a 1.3 MB text file. build_index() keeps
+# the part a GPU probe can ask about and writes it as sorted binary keys,
+# so a lookup is a binary search over the mapping instead of a text scan.
+# pci.ids does not record device classes, so "display" means: devices of
+# the vendors in DISPLAY_VENDORS whose names do not look like another
+# function (audio, USB, bridges, ...). Anything missing from the index is
+# looked up in the text file as before.
+#
+# Layout (little-endian, every section 8-byte aligned):
+#   magic    b"LHPCI\x01\x00\x00"
+#   u32      header length, followed by a JSON header:
+#            {"source", "counts", "sections": {name: {"offset", "length", "code"}}}
+#   per table (vendors, devices, subsystems):
+#     keys   sorted: vendor (uint16), vendor << 16 | device (uint32),
+#            vendor << 48 | device << 32 | subvendor << 16 | subdevice (uint64)
+#     ends   n+1 uint32 byte offsets into the table's UTF-8 blob
+#     blob   the names
+#
+#   python pci_ids.py build                      (system pci.ids -> ~/.cache/linuxhelper/pci_ids.lhpci)
+#   python pci_ids.py build pci_ids.lhpci --from pci.ids
+#   python pci_ids.py lookup 10de:2684
+#   python pci_ids.py info pci_ids.lhpci
+
+import json
+import mmap
+import os
+import re
+import struct
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional, Tuple
+
+MAGIC = b"LHPCI\x01\x00\x00"
+
+PCI_IDS_PATHS = ("/usr/share/hwdata/pci.ids", "/usr/share/misc/pci.ids", "/usr/share/pci.ids")
+# A copy built next to this file ships with the app; the cache one is built on the machine
+INDEX_PATHS = (
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "pci_ids.lhpci"),
+    os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+        "linuxhelper", "pci_ids.lhpci",
+    ),
+)
+
+# Vendors with display controllers (GPUs, server BMC video, virtual adapters)
+DISPLAY_VENDORS = frozenset({
+    0x1002,  # AMD/ATI
+    0x1013,  # Cirrus Logic
+    0x1039,  # SiS
+    0x102b,  # Matrox
+    0x106b,  # Apple
+    0x10de,  # NVIDIA
+    0x1106,  # VIA
+    0x1234,  # QEMU
+    0x1414,  # Microsoft (Hyper-V)
+    0x15ad,  # VMware
+    0x18ca,  # XGI
+    0x1a03,  # ASPEED
+    0x1af4,  # Red Hat Virtio
+    0x1b36,  # Red Hat QEMU
+    0x1d17,  # Zhaoxin
+    0x1ed5,  # Moore Threads
+    0x5143,  # Qualcomm
+    0x5333,  # S3
+    0x80ee,  # VirtualBox
+    0x8086,  # Intel
+})
+_NOT_DISPLAY = re.compile(
+    r"\b(audio|azalia|usb|[xeo]hci|sata|ahci|ide|raid|nvme|smbus|i2c|spi|uart|serial|ethernet|network"
+    r"|wireless|wi-?fi|bluetooth|lan|modem|bridge|lpc|isa|root port|switch|host|dram|memory controller"
+    r"|thermal|sensor|watchdog|dma|iommu|power management|pmc|crypto|heci|mei|sram|trace hub|nvlink"
+    r"|infiniband|firewire|card reader|sd host|tpm|gpio|timer|storage|scsi|sas)\b",
+    re.I,
+)
+
+_HEX4 = re.compile(r"[0-9a-fA-F]{4}$")
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def find_pci_ids() -> Optional[str]:
+    for path in PCI_IDS_PATHS:
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def iter_pci_ids(path: str) -> Iterator[Tuple[int, ...]]:
+    """
+    (vendor, name), (vendor, device, name) and (vendor, device, subvendor,
+    subdevice, name) tuples from a pci.ids file, in file order. Stops at the
+    device class list.
+    """
+    vendor = device = None
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            line = line.rstrip("\n")
+            if line.startswith("C "):
+                return
+            if line.startswith("\t\t"):
+                ids, _, name = line[2:].partition("  ")
+                sub = ids.split()
+                if device is not None and len(sub) == 2 and all(_HEX4.match(s) for s in sub):
+                    yield vendor, device, int(sub[0], 16), int(sub[1], 16), name.strip()
+            elif line.startswith("\t"):
+                ids, _, name = line[1:].partition("  ")
+                if vendor is not None and _HEX4.match(ids):
+                    device = int(ids, 16)
+                    yield vendor, device, name.strip()
+            else:
+                ids, _, name = line.partition("  ")
+                vendor, device = (int(ids, 16), None) if _HEX4.match(ids) else (None, None)
+                if vendor is not None:
+                    yield vendor, name.strip()
+
+
+def is_display_device(vendor: int, name: str) -> bool:
+    return vendor in DISPLAY_VENDORS and not _NOT_DISPLAY.search(name)
+
+
+def build_index(source: str, path: str) -> Dict[str, int]:
+    """Write the display-device index of pci.ids source to path. Returns entry counts and size."""
+    vendors: Dict[int, str] = {}
+    devices: Dict[int, str] = {}
+    subsystems: Dict[int, str] = {}
+    kept = False
+    for entry in iter_pci_ids(source):
+        if len(entry) == 2:
+            vendor, name = entry
+            if vendor in DISPLAY_VENDORS:
+                vendors[vendor] = name
+        elif len(entry) == 3:
+            vendor, device, name = entry
+            kept = is_display_device(vendor, name)
+            if kept:
+                devices[vendor << 16 | device] = name
+        elif kept:
+            vendor, device, subvendor, subdevice, name = entry
+            subsystems[vendor << 48 | device << 32 | subvendor << 16 | subdevice] = name
+
+    sections: List[bytes] = []
+    layout: Dict[str, Dict[str, object]] = {}
+    offset = 0
+
+    def add(name: str, code: str, values) -> None:
+        nonlocal offset
+        data = array(code, values).tobytes()
+        layout[name] = {"offset": offset, "length": len(values), "code": code}
+        sections.append(data + b"\0" * (_align(len(data)) - len(data)))
+        offset += _align(len(data))
+
+    for table, code, entries in (("vendors", "H", vendors), ("devices", "I", devices), ("subsystems", "Q", subsystems)):
+        keys = sorted(entries)
+        encoded = [entries[k].encode("utf-8") for k in keys]
+        ends = [0]
+        for b in encoded:
+            ends.append(ends[-1] + len(b))
+        add(f"{table}.keys", code, keys)
+        add(f"{table}.ends", "I", ends)
+        add(f"{table}.blob", "B", b"".join(encoded))
+
+    counts = {"vendors": len(vendors), "devices": len(devices), "subsystems": len(subsystems)}
+    header = json.dumps({"source": os.path.abspath(source), "counts": counts,
+                         "sections": layout}).encode("utf-8")
+    data_start = _align(len(MAGIC) + 4 + len(header))
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(b"\0" * (data_start - len(MAGIC) - 4 - len(header)))
+        for section in sections:
+            f.write(section)
+        size = f.tell()
+    os.replace(tmp, path)
+    return dict(counts, bytes=size)
+
+
+class PciIndex:
+    """Read-only view of an index file. Lookups are binary searches over the mapping."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path}: not a pci.ids index")
+        (header_len,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = h = json.loads(self._mm[start:start + header_len].decode("utf-8"))
+        base = _align(start + header_len)
+        buf = memoryview(self._mm)
+        self._views: Dict[str, memoryview] = {}
+        for name, sec in h["sections"].items():
+            at = base + sec["offset"]
+            self._views[name] = buf[at:at + sec["length"] * array(sec["code"]).itemsize].cast(sec["code"])
+        self._tables = {
+            table: (self._views[f"{table}.keys"], self._views[f"{table}.ends"], base + h["sections"][f"{table}.blob"]["offset"])
+            for table in ("vendors", "devices", "subsystems")
+        }
+
+    def _find(self, table: str, key: int) -> Optional[str]:
+        keys, ends, blob = self._tables[table]
+        i = bisect_left(keys, key)
+        if i == len(keys) or keys[i] != key:
+            return None
+        return self._mm[blob + ends[i]:blob + ends[i + 1]].decode("utf-8")
+
+    def vendor(self, vendor: int) -> Optional[str]:
+        return self._find("vendors", vendor)
+
+    def device(self, vendor: int, device: int) -> Optional[str]:
+        return self._find("devices", vendor << 16 | device)
+
+    def subsystem(self, vendor: int, device: int, subvendor: int, subdevice: int) -> Optional[str]:
+        return self._find("subsystems", vendor << 48 | device << 32 | subvendor << 16 | subdevice)
+
+    def close(self):
+        for view in self._views.values():
+            view.release()
+        self._views.clear()
+        self._tables.clear()
+        self._mm.close()
+
+
+def open_index(path: str) -> PciIndex:
+    return PciIndex(path)
+
+
+_default_index: Optional[PciIndex] = None
+_default_checked = False
+
+
+def default_index() -> Optional[PciIndex]:
+    """The first readable index in INDEX_PATHS, opened once; None if there is none."""
+    global _default_index, _default_checked
+    if not _default_checked:
+        _default_checked = True
+        _default_index = None
+        for path in INDEX_PATHS:
+            try:
+                _default_index = PciIndex(path)
+                break
+            except (OSError, ValueError):
+                continue
+    return _default_index
+
+
+def scan_pci_ids(vendor: int, device: int, subvendor: Optional[int] = None,
+                 subdevice: Optional[int] = None, path: Optional[str] = None):
+    """lookup() straight from the text file, reading only up to the vendor's entries."""
+    path = path or find_pci_ids()
+    names = [None, None, None]
+    if path is None:
+        return tuple(names)
+    try:
+        for entry in iter_pci_ids(path):
+            if entry[0] != vendor:
+                if names[0] is not None:
+                    break  # past the vendor
+                continue
+            if len(entry) == 2:
+                names[0] = entry[1]
+            elif entry[1] != device:
+                continue
+            elif len(entry) == 3:
+                names[1] = entry[2]
+            elif entry[2:4] == (subvendor, subdevice):
+                names[2] = entry[4]
+    except OSError:
+        pass
+    return tuple(names)
+
+
+def lookup(vendor: int, device: int, subvendor: Optional[int] = None, subdevice: Optional[int] = None):
+    """
+    (vendor name, device name, subsystem name), None for anything unknown.
+    Uses the index and falls back to the system pci.ids for devices not in it.
+    """
+    index = default_index()
+    if index is not None:
+        device_name = index.device(vendor, device)
+        if device_name is not None:
+            subsystem_name = None
+            if subvendor is not None and subdevice is not None:
+                subsystem_name = index.subsystem(vendor, device, subvendor, subdevice)
+            return index.vendor(vendor), device_name, subsystem_name
+    return scan_pci_ids(vendor, device, subvendor, subdevice)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="pci_ids", description="Build or query the GPU pci.ids index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="convert pci.ids into an index file")
+    build.add_argument("output", nargs="?", default=INDEX_PATHS[-1])
+    build.add_argument("--from", dest="source", help="pci.ids to read (default: the system one)")
+    find = sub.add_parser("lookup", help="name a vendor:device[:subvendor:subdevice]")
+    find.add_argument("ids")
+    find.add_argument("--index", help="index file (default: the installed one)")
+    info = sub.add_parser("info", help="show an index's size and entry counts")
+    info.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        source = args.source or find_pci_ids()
+        if source is None:
+            parser.error("no pci.ids found; pass --from")
+        r = build_index(source, args.output)
+        print(f"{args.output}: {r['vendors']} vendors, {r['devices']} devices, "
+              f"{r['subsystems']} subsystems, {r['bytes']} bytes")
+        return 0
+
+    if args.command == "lookup":
+        try:
+            ids = [int(part, 16) for part in args.ids.split(":")]
+        except ValueError:
+            ids = []
+        if len(ids) not in (2, 4):
+            parser.error("ids must be vendor:device or vendor:device:subvendor:subdevice (hex)")
+        if args.index:
+            global _default_index, _default_checked
+            _default_index, _default_checked = open_index(args.index), True
+        print(json.dumps(dict(zip(("vendor", "device", "subsystem"), lookup(*ids))), indent=2))
+        return 0
+
+    index = open_index(args.path)
+    counts = index.header["counts"]
+    print(f"{args.path}: from {index.header['source']}, {os.path.getsize(args.path)} bytes")
+    for table in ("vendors", "devices", "subsystems"):
+        print(f"  {table:12} {counts[table]}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
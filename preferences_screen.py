@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk
 from theme import COLORS, FONTS, make_card
+from ranking_session import RankingSession
 
 
 # Question definitions - displayed in a vertical scrollable list
@@ -125,6 +126,11 @@ class PreferencesScreen(tk.Frame):
         tk.Label(header, text="The more we know, the better the recommendation.",
                  font=FONTS["small"], bg=COLORS["bg"],
                  fg=COLORS["text_muted"]).pack(anchor="w")
+        # Live ranking preview, updated as answers change
+        self.preview = tk.Label(header, text="", font=FONTS["small"],
+                                bg=COLORS["bg"], fg=COLORS["primary"], anchor="w")
+        self.preview.pack(anchor="w", pady=(4, 0))
+        self._session = None
 
         # Scrollable area
         scroll_outer = tk.Frame(self, bg=COLORS["bg"])
@@ -182,6 +188,7 @@ class PreferencesScreen(tk.Frame):
 
         var = tk.StringVar(value=q.get("default", ""))
         self.vars[q["key"]] = var
+        var.trace_add("write", lambda *_, k=q["key"]: self._on_answer(k))
 
         if q["type"] == "radio":
             for value, text in q["options"]:
@@ -197,6 +204,31 @@ class PreferencesScreen(tk.Frame):
                               state="readonly", width=24)
             cb.pack(anchor="w")
 
+    def tkraise(self):
+        super().tkraise()
+        # Hardware may have changed since the last visit
+        self._session = None
+        self._update_preview()
+
+    def _current_prefs(self):
+        return {k: v.get() for k, v in self.vars.items()}
+
+    def _on_answer(self, key):
+        if self._session is None:
+            self._update_preview()
+            return
+        self._session.update_state(self.controller.state)
+        self._session.update_pref(key, self.vars[key].get())
+        self._update_preview()
+
+    def _update_preview(self):
+        if self._session is None:
+            self._session = RankingSession(self.controller.state, self._current_prefs())
+        top = self._session.top_names(3)
+        self.preview.config(
+            text="Live preview: " + "  ·  ".join(f"{i}. {n}" for i, n in enumerate(top, 1))
+        )
+
     def _on_next(self):
         prefs = {k: v.get() for k, v in self.vars.items()}
         # Sanity: usage and visual must be set
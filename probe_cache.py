@@ -0,0 +1,156 @@
+# probe_cache.py
+# Probe results that survive restarts.
+#
+# The CPU model and clocks, the GPU, RAM size/type/speed and the disk model
+# only change with the hardware. They are kept on disk under a key built
+# from this boot's ID (/proc/sys/kernel/random/boot_id), the DMI product
+# UUID (readable by root only on most systems; left out otherwise) and the
+# PCI device list. A reboot, another machine or a changed PCI device set
+# starts over. On a hit only the volatile values are measured again:
+# available RAM and free space. The battery is never cached.
+#
+#   ProbeRun(probes=cached_probes())            # what MainWindow does
+#   python probe_orchestrator.py --refresh      # re-probe, then rewrite the cache
+#
+# The file is $XDG_CACHE_HOME/linuxhelper/probes.json (~/.cache/...). The
+# key sources only exist on Linux; elsewhere the probes run uncached.
+
+import hashlib
+import json
+import os
+import platform
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from probe_orchestrator import PROBES
+from ram_probe import probe_ram_usage
+from storage_probe import probe_free_space
+
+CACHE_VERSION = 1
+CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "linuxhelper", "probes.json",
+)
+CACHED_PROBES = ("cpu", "ram", "gpu", "storage")
+
+_PCI_DEVICES = "/sys/bus/pci/devices"
+
+
+def _read(path: str) -> str:
+    try:
+        with open(path, "r", encoding="ascii", errors="replace") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def hardware_key() -> Optional[str]:
+    """Hash of boot ID, DMI product UUID and PCI devices; None where there is no boot ID."""
+    if platform.system().lower() != "linux":
+        return None
+    boot_id = _read("/proc/sys/kernel/random/boot_id")
+    if not boot_id:
+        return None
+    parts = [boot_id, _read("/sys/class/dmi/id/product_uuid")]
+    try:
+        devices = sorted(os.listdir(_PCI_DEVICES))
+    except OSError:
+        devices = []
+    for dev in devices:
+        base = os.path.join(_PCI_DEVICES, dev)
+        parts.append(" ".join((dev, _read(f"{base}/vendor"), _read(f"{base}/device"), _read(f"{base}/class"))))
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def _refresh_volatile(name: str, cached: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """cached with its volatile values measured again; None to run the full probe."""
+    out = dict(cached)
+    if name == "ram":
+        usage = probe_ram_usage()
+        if not usage.get("ok"):
+            return None
+        out["available_gb"] = usage["available_gb"]
+        out["used_percent"] = usage["used_percent"]
+    elif name == "storage":
+        out["free_gb"] = probe_free_space()
+    out["cached"] = True
+    return out
+
+
+class ProbeCache:
+    """Static probe outputs for this boot and hardware, loaded from and saved to path."""
+
+    def __init__(self, path: str = CACHE_PATH, key: Optional[str] = None):
+        self.path = path
+        self.key = hardware_key() if key is None else key
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self.key is None:
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION or data.get("key") != self.key:
+            return {}
+        return dict(data.get("probes") or {})
+
+    @property
+    def enabled(self) -> bool:
+        return self.key is not None
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Cached output of probe name with fresh volatile values, or None."""
+        with self._lock:
+            cached = self._entries.get(name)
+        return None if cached is None else _refresh_volatile(name, cached)
+
+    def put(self, name: str, output) -> None:
+        """Store a successful probe output and rewrite the file."""
+        if not (self.enabled and output and output.get("ok")):
+            return
+        with self._lock:
+            self._entries[name] = dict(output)
+            self._save()
+
+    def _save(self):
+        data = {"version": CACHE_VERSION, "key": self.key, "saved": time.time(), "probes": self._entries}
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def wrap(self, name: str, probe: Callable[[], Any], refresh: bool = False) -> Callable[[], Any]:
+        """probe served from the cache when possible; fresh results are stored."""
+        def cached_probe():
+            if not refresh:
+                hit = self.get(name)
+                if hit is not None:
+                    return hit
+            output = probe()
+            self.put(name, output)
+            return output
+
+        return cached_probe
+
+    def probes(self, names: Iterable[str] = CACHED_PROBES, refresh: bool = False) -> Dict[str, Callable[[], Any]]:
+        """Cache-backed probes for ProbeRun(probes=...); empty when the cache is unavailable."""
+        if not self.enabled:
+            return {}
+        return {name: self.wrap(name, PROBES[name][0], refresh) for name in names if name in CACHED_PROBES}
+
+
+def cached_probes(refresh: bool = False, path: str = CACHE_PATH) -> Dict[str, Callable[[], Any]]:
+    """Probes for ProbeRun(probes=...) backed by the on-disk cache. refresh re-probes and rewrites it."""
+    return ProbeCache(path).probes(refresh=refresh)
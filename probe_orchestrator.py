@@ -0,0 +1,305 @@
+# probe_orchestrator.py
+# Runs the hardware probes concurrently and turns their output into app
+# state fields. The GUI and the headless tools share it.
+#
+#   run = ProbeRun(on_result=show).start()     # results arrive as they land
+#   run = probe_all(); run.state               # block until every probe reported
+#   python probe_orchestrator.py               # state + per-probe timings as JSON
+#
+# Every probe gets its own daemon thread, a per-probe timeout and the run's
+# global deadline. A probe that misses its time is reported with "unknown"
+# fields right away, and cancel() settles everything still pending.
+# Python threads cannot be killed, so a straggler keeps running in the
+# background; its late result is dropped. Each probe is delivered exactly
+# once, with all of its state fields in one dict, and callbacks run one at
+# a time in delivery order, so a caller applies each result as one update.
+# probe_all() and the app serve static results from probe_cache.
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from battery_probe import probe_battery
+from cpu_probe import probe_cpu
+from gpu_probe import probe_gpu
+from ram_probe import probe_ram
+from storage_probe import probe_storage_type
+
+# Names match recommender_engine.PROBE_FIELDS
+PROBE_NAMES = ("ram", "gpu", "storage", "cpu", "battery")
+# Seconds. The probes' own subprocesses time out after 10 s.
+DEFAULT_TIMEOUTS = {"cpu": 5.0, "ram": 12.0, "gpu": 12.0, "storage": 12.0, "battery": 5.0}
+DEADLINE = 15.0
+
+Result = Dict[str, Any]
+
+
+# ---------- Probe output -> state fields ----------
+def ram_category(total_gb) -> str:
+    if total_gb is None:
+        return "unknown"
+    if total_gb <= 2.0:
+        return "very_low"
+    if total_gb <= 4.0:
+        return "low"
+    if total_gb <= 8.0:
+        return "mid"
+    if total_gb <= 16.0:
+        return "good"
+    return "high"
+
+
+def _cpu_fields(d) -> Dict[str, Any]:
+    if not (d and d.get("ok")):
+        return {"cpu_cat": "unknown"}
+    return {
+        "cpu_model": d.get("model"),
+        "max_ghz": d.get("max_ghz"),
+        "cores": d.get("cores"),
+        "threads": d.get("threads"),
+        "cpu_cat": d.get("category"),
+        "cpu_score": d.get("score"),
+        "cpu_gen": d.get("generation"),
+        "cpu_vendor": d.get("vendor"),
+    }
+
+
+def _ram_fields(d) -> Dict[str, Any]:
+    if not (d and d.get("ok")):
+        return {"ram_cat": "unknown"}
+    return {
+        "ram_total_gb": d.get("total_gb"),
+        "ram_avail_gb": d.get("available_gb"),
+        "ram_used_percent": d.get("used_percent"),
+        "ram_cat": ram_category(d.get("total_gb")),
+        "ram_speed_mhz": d.get("speed_mhz"),
+        "ram_type": d.get("type"),
+    }
+
+
+def _gpu_fields(d) -> Dict[str, Any]:
+    if not (d and d.get("ok")):
+        return {"gpu_cat": "nogpu"}
+    return {"gpu_name": d.get("name"), "gpu_cat": d.get("category"), "gpu_vram_mb": d.get("vram_mb")}
+
+
+def _storage_fields(d) -> Dict[str, Any]:
+    if not (d and d.get("ok")):
+        return {"storage_cat": "unknown"}
+    return {
+        "storage_type": d.get("type"),
+        "storage_cat": d.get("category"),
+        "storage_size_gb": d.get("size_gb"),
+        "storage_free_gb": d.get("free_gb"),
+    }
+
+
+def _battery_fields(d) -> Dict[str, Any]:
+    if not (d and d.get("ok")):
+        return {}
+    return {
+        "has_battery": d.get("has_battery", False),
+        "battery_percent": d.get("percent"),
+        "battery_plugged": d.get("plugged"),
+    }
+
+
+# name -> (probe, output -> state fields)
+PROBES: Dict[str, Tuple[Callable[[], Any], Callable[[Any], Dict[str, Any]]]] = {
+    "cpu": (probe_cpu, _cpu_fields),
+    "ram": (probe_ram, _ram_fields),
+    "gpu": (probe_gpu, _gpu_fields),
+    "storage": (probe_storage_type, _storage_fields),
+    "battery": (probe_battery, _battery_fields),
+}
+# Fields for a probe that timed out: nothing is known
+TIMEOUT_FIELDS = {
+    "cpu": {"cpu_cat": "unknown"},
+    "ram": {"ram_cat": "unknown"},
+    "gpu": {"gpu_cat": "unknown"},
+    "storage": {"storage_cat": "unknown"},
+    "battery": {},
+}
+
+
+# ---------- Orchestration ----------
+class ProbeRun:
+    """
+    One concurrent run of the hardware probes.
+
+    on_result(result) is called once per probe, from a background thread,
+    when it finishes, fails, times out or is cancelled; on_done(run) once
+    after the last one. A result is {name, status ("ok", "failed",
+    "timeout" or "cancelled"), fields, elapsed_ms, error}; cancelled
+    probes carry no fields.
+    """
+
+    def __init__(self, names: Iterable[str] = PROBE_NAMES,
+                 timeouts: Optional[Dict[str, float]] = None, deadline: float = DEADLINE,
+                 on_result: Optional[Callable[[Result], None]] = None,
+                 on_done: Optional[Callable[["ProbeRun"], None]] = None,
+                 probes: Optional[Dict[str, Callable[[], Any]]] = None):
+        self.names = tuple(names)
+        unknown = set(self.names) - set(PROBES)
+        if unknown:
+            raise ValueError(f"unknown probes: {sorted(unknown)}")
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.deadline = deadline
+        self.on_result = on_result
+        self.on_done = on_done
+        self._probes = {n: (probes or {}).get(n, PROBES[n][0]) for n in self.names}
+        self._results: Dict[str, Result] = {}
+        # Held while a result is recorded and delivered, so callbacks never overlap
+        self._lock = threading.RLock()
+        self._changed = threading.Event()
+        self._done = threading.Event()
+        self._started: Optional[float] = None
+        self._due: Dict[str, float] = {}
+
+    def start(self) -> "ProbeRun":
+        if self._started is not None:
+            raise RuntimeError("probe run already started")
+        self._started = time.monotonic()
+        for name in self.names:
+            self._due[name] = self._started + min(self.timeouts[name], self.deadline)
+        if not self.names:
+            self._complete()
+            return self
+        for name in self.names:
+            threading.Thread(target=self._run_probe, args=(name,), name=f"probe-{name}",
+                             daemon=True).start()
+        threading.Thread(target=self._supervise, name="probe-deadline", daemon=True).start()
+        return self
+
+    def cancel(self):
+        """Settle every pending probe as cancelled; their late results are dropped."""
+        for name in self.pending:
+            self._finish(name, "cancelled", {}, "cancelled")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until every probe has a result (at most the deadline after start())."""
+        return self._done.wait(timeout)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def pending(self) -> Tuple[str, ...]:
+        with self._lock:
+            return tuple(n for n in self.names if n not in self._results)
+
+    @property
+    def results(self) -> Dict[str, Result]:
+        with self._lock:
+            return {n: dict(self._results[n]) for n in self.names if n in self._results}
+
+    @property
+    def state(self) -> Dict[str, Any]:
+        """State fields of every probe delivered so far."""
+        out: Dict[str, Any] = {}
+        for result in self.results.values():
+            out.update(result["fields"])
+        return out
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        """Milliseconds from start() to each probe's result."""
+        return {n: r["elapsed_ms"] for n, r in self.results.items()}
+
+    def _run_probe(self, name: str):
+        try:
+            d = self._probes[name]()
+            ok = bool(d and d.get("ok"))
+            error = "" if ok else ((d or {}).get("error") or "probe reported no result")
+            self._finish(name, "ok" if ok else "failed", PROBES[name][1](d), error)
+        except Exception as e:
+            self._finish(name, "failed", PROBES[name][1](None), str(e))
+
+    def _supervise(self):
+        while not self._done.is_set():
+            now = time.monotonic()
+            pending = self.pending
+            late = [n for n in pending if self._due[n] <= now]
+            for name in late:
+                limit = self._due[name] - self._started
+                self._finish(name, "timeout", dict(TIMEOUT_FIELDS[name]), f"no result after {limit:.1f} s")
+            if late or not pending:
+                continue
+            self._changed.wait(min(self._due[n] for n in pending) - now)
+            self._changed.clear()
+
+    def _finish(self, name: str, status: str, fields: Dict[str, Any], error: str):
+        with self._lock:
+            if name in self._results:
+                return  # already timed out or cancelled
+            result = {
+                "name": name,
+                "status": status,
+                "fields": fields,
+                "elapsed_ms": round((time.monotonic() - self._started) * 1000.0, 1),
+                "error": error,
+            }
+            self._results[name] = result
+            self._changed.set()
+            try:
+                if self.on_result is not None:
+                    self.on_result(dict(result))
+            finally:
+                # A callback that cancels the run completes it from inside
+                if len(self._results) == len(self.names) and not self._done.is_set():
+                    self._complete()
+
+    def _complete(self):
+        self._done.set()
+        self._changed.set()
+        if self.on_done is not None:
+            self.on_done(self)
+
+
+def probe_all(names: Iterable[str] = PROBE_NAMES, timeouts: Optional[Dict[str, float]] = None,
+              deadline: float = DEADLINE, cache: bool = True, refresh: bool = False) -> ProbeRun:
+    """
+    Run the probes and return once every one has reported or timed out.
+    Static results come from probe_cache unless cache is False; refresh
+    re-probes them and rewrites the cache.
+    """
+    probes = None
+    if cache:
+        from probe_cache import cached_probes
+
+        probes = cached_probes(refresh)
+    run = ProbeRun(names, timeouts, deadline, probes=probes).start()
+    run.wait()
+    return run
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(prog="probe_orchestrator",
+                                     description="Probe this machine's hardware.")
+    parser.add_argument("--deadline", type=float, default=DEADLINE, help="seconds for the whole run")
+    parser.add_argument("--only", help="comma-separated probes (default: all)")
+    parser.add_argument("--no-cache", action="store_true", help="ignore and keep the probe cache")
+    parser.add_argument("--refresh", action="store_true", help="re-probe everything and rewrite the probe cache")
+    args = parser.parse_args(argv)
+
+    names = args.only.split(",") if args.only else PROBE_NAMES
+    unknown = set(names) - set(PROBES)
+    if unknown:
+        parser.error(f"unknown probes: {sorted(unknown)}")
+    t0 = time.perf_counter()
+    run = probe_all(names, deadline=args.deadline, cache=not args.no_cache, refresh=args.refresh)
+    report = {
+        "state": run.state,
+        "probes": {n: {k: r[k] for k in ("status", "elapsed_ms", "error")} for n, r in run.results.items()},
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000.0, 1),
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -113,13 +113,12 @@ def _probe_with_procfs() -> RamInfo:
     }
 
 
-def probe_ram() -> RamInfo:
-    out: RamInfo = {"ok": False, "total_gb": 0.0, "available_gb": 0.0, "used_percent": 0.0,
-                    "speed_mhz": 0, "type": "Unknown", "slots_used": 0, "source": ""}
+def probe_ram_usage() -> RamInfo:
+    """Total / available / used only: no dmidecode or PowerShell, cheap enough to repeat."""
     try:
         import psutil  # type: ignore
         vm = psutil.virtual_memory()
-        out = {
+        return {
             "ok": True,
             "total_gb": _bytes_to_gb(vm.total),
             "available_gb": _bytes_to_gb(vm.available),
@@ -130,8 +129,11 @@ def probe_ram() -> RamInfo:
             "source": "psutil",
         }
     except Exception:
-        out = _probe_with_procfs()
+        return _probe_with_procfs()
+
 
+def probe_ram() -> RamInfo:
+    out = probe_ram_usage()
     if not out.get("ok"):
         return out
 
@@ -0,0 +1,127 @@
+# ranking_session.py
+# Stateful ranking for live previews and what-if tools.
+# Keeps every distro's per-criterion score contributions, so changing one
+# preference only re-evaluates that criterion and repairs the sorted order.
+
+from bisect import bisect_left, insort
+from typing import Any, Dict, List, Tuple
+
+from recommender_engine import (
+    CRITERIA,
+    _context,
+    _prefs_context,
+    _records,
+    _result,
+    get_catalog,
+    hardware_tier,
+)
+
+# Which criterion each preference feeds
+PREF_CRITERIA = {
+    "usage": "usage",
+    "gaming_intensity": "gaming",
+    "visual": "visual",
+    "experience": "experience",
+    "update_pref": "updates",
+    "privacy": "privacy",
+    "free_software_only": "free_software",
+    "battery_priority": "battery",
+    "windows_like": "windows_like",
+    "desktop_pref": "desktop",
+}
+HARDWARE_CRITERIA = ("hardware", "ram", "storage", "old_hw")
+_HARDWARE_KEYS = ("hw_score", "ram_gb", "storage_free")
+
+
+class RankingSession:
+    """
+    Ranking for one machine that can be re-ranked cheaply as answers change.
+
+        session = RankingSession(state, prefs)
+        session.update_pref("battery_priority", "yes")
+        session.ranking(top_n=5)   # same shape as recommend()
+    """
+
+    def __init__(self, state, prefs):
+        self.prefs = dict(prefs)
+        self.ctx = _context(state, self.prefs)
+        catalog = get_catalog()
+        self.names = list(catalog.keys())
+        self._records = _records()
+        self._criterion_index = {name: i for i, (name, _) in enumerate(CRITERIA)}
+        # contributions[j][c] = points criterion c gives distro j
+        self.contributions = [
+            [fn(d, self.ctx) for _, fn in CRITERIA] for d in self._records
+        ]
+        self.totals = [sum(row) for row in self.contributions]
+        # Sorted like recommend(): best rounded score first, ties in catalog order
+        self._keys: List[Tuple[float, int]] = [
+            (-round(t, 1), j) for j, t in enumerate(self.totals)
+        ]
+        self._order = sorted(self._keys)
+        self.rescored = 0  # criterion evaluations since construction
+
+    def _apply(self, criteria) -> List[int]:
+        """Re-evaluate the given criteria for every distro; returns changed indices."""
+        changed = []
+        for name in criteria:
+            c = self._criterion_index[name]
+            fn = CRITERIA[c][1]
+            for j, d in enumerate(self._records):
+                new = fn(d, self.ctx)
+                old = self.contributions[j][c]
+                if new != old:
+                    self.contributions[j][c] = new
+                    self.totals[j] += new - old
+                    changed.append(j)
+            self.rescored += len(self._records)
+        changed = sorted(set(changed))
+        self._repair(changed)
+        return changed
+
+    def _repair(self, changed: List[int]):
+        if not changed:
+            return
+        if len(changed) * 4 > len(self._order):
+            # Most of the list moved: re-sorting nearly sorted data is cheaper
+            self._keys = [(-round(t, 1), j) for j, t in enumerate(self.totals)]
+            self._order = sorted(self._keys)
+            return
+        for j in changed:
+            del self._order[bisect_left(self._order, self._keys[j])]
+            self._keys[j] = (-round(self.totals[j], 1), j)
+            insort(self._order, self._keys[j])
+
+    def update_pref(self, key: str, value: Any) -> List[str]:
+        """
+        Change one answer. Returns the names of distros whose score moved.
+        Unknown keys are stored but do not affect scoring.
+        """
+        self.prefs[key] = value
+        criterion = PREF_CRITERIA.get(key)
+        if criterion is None:
+            return []
+        self.ctx.update(_prefs_context(self.prefs))
+        return [self.names[j] for j in self._apply((criterion,))]
+
+    def update_state(self, state) -> List[str]:
+        """New probe data. Only the hardware criteria are re-evaluated, and only if they can change."""
+        fresh = _context(state, self.prefs)
+        if all(fresh[k] == self.ctx[k] for k in _HARDWARE_KEYS):
+            return []
+        self.ctx.update({k: fresh[k] for k in _HARDWARE_KEYS})
+        return [self.names[j] for j in self._apply(HARDWARE_CRITERIA)]
+
+    def ranking(self, top_n=5) -> Dict[str, Any]:
+        hw_score = self.ctx["hw_score"]
+        results = []
+        for _, j in self._order[:top_n]:
+            results.append(_result(self.names[j], self._records[j], self.totals[j], self.ctx))
+        return {
+            "hardware_score": hw_score,
+            "tier": hardware_tier(hw_score),
+            "recommendations": results,
+        }
+
+    def top_names(self, top_n=3) -> List[str]:
+        return [self.names[j] for _, j in self._order[:top_n]]
@@ -0,0 +1,313 @@
+# ranking_table.py
+# Precomputed rankings for every answer combination, read through mmap.
+#
+# Apart from the hardware numbers, every input to recommend() is an
+# enumeration, and the hardware only matters through the hardware band
+# (see recommender_engine._hw_band) and where RAM / free storage sit
+# relative to the catalog's min/ideal thresholds. build_table() enumerates
+# that whole space once and stores the top-N catalog indices per cell, so a
+# lookup is a handful of dict/bisect operations and two array reads.
+# Inputs outside the table (an unlisted desktop, top_n above the stored N,
+# another catalog or other coefficients) return None and the engine scores
+# live.
+#
+# Layout (little-endian, every section 8-byte aligned):
+#   magic    b"LHTAB\x01\x00\x00"
+#   u32      header length, followed by a JSON header (dimensions,
+#            thresholds, catalog fingerprint, section offsets)
+#   rows     distinct rankings, rows x N catalog indices (uint8/16/32)
+#   starts   per prefs combination, where its palette begins (uint32)
+#   palette  row numbers used by each prefs combination (uint16/32)
+#   cells    per cell, a position within its palette (uint8/16); cells
+#            are ordered prefs-major, hardware-minor
+#
+#   python ranking_table.py build ranking_table.lhtab --top 8
+#   python ranking_table.py info ranking_table.lhtab
+
+import hashlib
+import itertools
+import json
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+MAGIC = b"LHTAB\x01\x00\x00"
+
+# Enumerated prefs dimensions, in cell order. For experience and
+# update_pref the last value stands for "anything else": the criteria only
+# single out the other ones.
+BOOL_KEYS = ("gaming_serious", "visual", "privacy", "free_software_only", "battery", "windows_like")
+EXPERIENCE = ("beginner", "advanced", "intermediate")
+UPDATE_PREFS = ("stable", "cutting_edge", "balanced")
+# PreferencesScreen's desktop choices, lowercased like _prefs_context does
+DESKTOP_PREFS = ("any", "gnome", "kde", "cinnamon", "xfce", "lxqt", "pantheon")
+HW_BANDS = (0, 35, 50, 80)
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _code_for(limit: int, codes: Sequence[str]) -> str:
+    for code in codes:
+        if limit < 1 << (8 * array(code).itemsize):
+            return code
+    raise ValueError("table too large")
+
+
+def _representatives(thresholds: Sequence[float]) -> List[float]:
+    """
+    One value per RAM/storage code: 0 (unknown), then one truthy value per
+    gap between thresholds. Code 1 + bisect_right(thresholds, v) lands on
+    the same side of every threshold as the value listed for it.
+    """
+    out = [0.0]
+    for i in range(len(thresholds) + 1):
+        low = thresholds[i - 1] if i else None
+        high = thresholds[i] if i < len(thresholds) else None
+        if low:
+            out.append(float(low))
+        elif high is None:
+            out.append(1.0)
+        else:
+            out.append(high / 2 if high > 0 else high - 1.0)
+    return out
+
+
+def _plain(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return value
+    return float(value)
+
+
+def catalog_fingerprint(catalog, coefficients) -> str:
+    """
+    Hash of the scoring coefficients and the catalog's names and fields,
+    equal for a dict catalog and its .lhcat file.
+    """
+    h = hashlib.sha1(json.dumps(coefficients, sort_keys=True).encode("utf-8"))
+    for name, d in catalog.items():
+        fields = {k: _plain(d[k]) for k in d}
+        h.update(json.dumps([name, fields], sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _dimensions(usage_keys, desktops, ram_thresholds, storage_thresholds):
+    return (
+        [("usage_key", len(usage_keys))]
+        + [(k, 2) for k in BOOL_KEYS]
+        + [
+            ("experience", len(EXPERIENCE)),
+            ("update_pref", len(UPDATE_PREFS)),
+            ("desktop_pref", len(desktops)),
+            ("hw_band", len(HW_BANDS)),
+            ("ram", len(ram_thresholds) + 2),
+            ("storage", len(storage_thresholds) + 2),
+        ]
+    )
+
+
+def build_table(path: str, top_n: int = 8, desktops: Sequence[str] = DESKTOP_PREFS) -> Dict[str, Any]:
+    """
+    Rank the active catalog for every cell and write the table. Takes about
+    a minute for the built-in catalog; meant as an offline build step.
+    Returns the header.
+    """
+    from recommender_engine import (
+        _USAGE_KEYS,
+        COEFFICIENTS,
+        CompiledScorer,
+        constraint_index,
+        get_catalog,
+    )
+
+    catalog = get_catalog()
+    m = len(catalog)
+    n = min(top_n, m)
+    index = constraint_index()
+    ram_thresholds = sorted(set(index.min_ram) | set(index.ideal_ram))
+    storage_thresholds = sorted(set(index.min_storage))
+    usage_keys = sorted(set(_USAGE_KEYS.values()))
+    desktops = [d.lower() for d in desktops]
+    hardware = list(itertools.product(
+        HW_BANDS, _representatives(ram_thresholds), _representatives(storage_thresholds)
+    ))
+
+    rows: Dict[tuple, int] = {}
+    starts = array("I")   # per prefs cell: where its palette begins
+    palette = array("I")  # global row numbers used by each prefs cell
+    cells = array("I")    # per cell: position within its palette
+    for combo in itertools.product(
+        usage_keys, *[(False, True)] * len(BOOL_KEYS), EXPERIENCE, UPDATE_PREFS, desktops
+    ):
+        prefs_ctx = dict(zip(("usage_key",) + BOOL_KEYS, combo))
+        prefs_ctx.update(experience=combo[-3], update_pref=combo[-2], desktop_pref=combo[-1])
+        scorer = CompiledScorer(prefs_ctx)
+        local: Dict[int, int] = {}
+        starts.append(len(palette))
+        for hw, ram, free in hardware:
+            scores = [round(s, 1) for s in scorer.scores(hw, ram, free)]
+            # Stable sort: ties keep catalog order, like recommend()
+            ranked = tuple(sorted(range(m), key=scores.__getitem__, reverse=True)[:n])
+            row = rows.setdefault(ranked, len(rows))
+            if row not in local:
+                local[row] = len(local)
+                palette.append(row)
+            cells.append(local[row])
+
+    sections = {
+        "rows": array(_code_for(m, "BHI"), itertools.chain.from_iterable(rows)),
+        "starts": starts,
+        "palette": array(_code_for(len(rows), "HI"), palette),
+        "cells": array(_code_for(max(cells) + 1, "BH"), cells),
+    }
+    header = {
+        "fingerprint": catalog_fingerprint(catalog, COEFFICIENTS),
+        "count": m,
+        "top_n": n,
+        "rows": len(rows),
+        "cells": len(cells),
+        "usage_keys": usage_keys,
+        "desktops": desktops,
+        "ram_thresholds": ram_thresholds,
+        "storage_thresholds": storage_thresholds,
+        "sections": {},
+    }
+    offset = 0
+    for name, data in sections.items():
+        header["sections"][name] = {"code": data.typecode, "offset": offset, "length": len(data)}
+        offset += _align(len(data) * data.itemsize)
+    raw = json.dumps(header).encode("utf-8")
+    data_start = _align(len(MAGIC) + 4 + len(raw))
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(raw)))
+        f.write(raw)
+        f.write(b"\0" * (data_start - len(MAGIC) - 4 - len(raw)))
+        for data in sections.values():
+            if sys.byteorder != "little":
+                data.byteswap()
+            data = data.tobytes()
+            f.write(data + b"\0" * (_align(len(data)) - len(data)))
+    return header
+
+
+class RankingTable:
+    """Read-only view of a table file. lookup() is O(1) in the catalog size."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path}: not a ranking table")
+        (header_len,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = h = json.loads(self._mm[start:start + header_len].decode("utf-8"))
+        base = _align(start + header_len)
+        buf = memoryview(self._mm)
+        self.top_n: int = h["top_n"]
+        self.count: int = h["count"]
+        self.fingerprint: str = h["fingerprint"]
+        sections = {}
+        for name, sec in h["sections"].items():
+            at = base + sec["offset"]
+            sections[name] = buf[at:at + sec["length"] * array(sec["code"]).itemsize].cast(sec["code"])
+        self._rows = sections["rows"]
+        self._starts = sections["starts"]
+        self._palette = sections["palette"]
+        self._cells = sections["cells"]
+
+        self._usage = {k: i for i, k in enumerate(h["usage_keys"])}
+        self._desktops = {k: i for i, k in enumerate(h["desktops"])}
+        self._experience = {k: i for i, k in enumerate(EXPERIENCE[:-1])}
+        self._updates = {k: i for i, k in enumerate(UPDATE_PREFS[:-1])}
+        self._bands = {b: i for i, b in enumerate(HW_BANDS)}
+        self._ram = h["ram_thresholds"]
+        self._storage = h["storage_thresholds"]
+        self._radix = _dimensions(h["usage_keys"], h["desktops"], self._ram, self._storage)
+        self._slab = len(HW_BANDS) * (len(self._ram) + 2) * (len(self._storage) + 2)
+
+    def matches(self, catalog, coefficients) -> bool:
+        return (
+            len(catalog) == self.count
+            and catalog_fingerprint(catalog, coefficients) == self.fingerprint
+        )
+
+    def cell(self, ctx) -> Optional[Tuple[int, int]]:
+        """(prefs cell, hardware cell) for a recommend() context, or None if not in the table."""
+        from recommender_engine import _hw_band
+
+        usage = self._usage.get(ctx["usage_key"])
+        desktop = self._desktops.get(ctx["desktop_pref"])
+        ram, free = ctx["ram_gb"], ctx["storage_free"]
+        if usage is None or desktop is None or ram != ram or free != free:
+            return None
+        prefs = usage
+        for key in BOOL_KEYS:
+            prefs = prefs * 2 + (1 if ctx[key] else 0)
+        prefs = prefs * len(EXPERIENCE) + self._experience.get(ctx["experience"], len(EXPERIENCE) - 1)
+        prefs = prefs * len(UPDATE_PREFS) + self._updates.get(ctx["update_pref"], len(UPDATE_PREFS) - 1)
+        prefs = prefs * len(self._desktops) + desktop
+        hw = self._bands[_hw_band(ctx["hw_score"])]
+        hw = hw * (len(self._ram) + 2) + (1 + bisect_right(self._ram, ram) if ram else 0)
+        hw = hw * (len(self._storage) + 2) + (1 + bisect_right(self._storage, free) if free else 0)
+        return prefs, hw
+
+    def lookup(self, ctx, top_n) -> Optional[List[int]]:
+        """Catalog indices of the top_n, best first, or None to score live."""
+        if type(top_n) is not int or top_n < 0 or (top_n > self.top_n and self.top_n < self.count):
+            return None
+        cell = self.cell(ctx)
+        if cell is None:
+            return None
+        prefs, hw = cell
+        row = self._palette[self._starts[prefs] + self._cells[prefs * self._slab + hw]]
+        start = row * self.top_n
+        return self._rows[start:start + min(top_n, self.top_n)].tolist()
+
+    def close(self):
+        for view in (self._rows, self._starts, self._palette, self._cells):
+            view.release()
+        self._mm.close()
+
+
+def open_table(path: str) -> RankingTable:
+    return RankingTable(path)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="ranking_table", description="Build or inspect a precomputed ranking table.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="rank every answer combination and write the table")
+    build.add_argument("output")
+    build.add_argument("--top", type=int, default=8, help="rankings stored per cell")
+    build.add_argument("--catalog", help="catalog file built by distro_catalog.py (default: built-in DISTROS)")
+    info = sub.add_parser("info", help="show a table's size and dimensions")
+    info.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        if args.catalog:
+            from recommender_engine import load_catalog
+
+            load_catalog(args.catalog)
+        h = build_table(args.output, args.top)
+        print(f"{args.output}: {h['cells']} cells, {h['rows']} distinct rankings, top {h['top_n']}")
+        return 0
+
+    table = open_table(args.path)
+    h = table.header
+    print(f"{args.path}: {h['cells']} cells, {h['rows']} distinct rankings, top {h['top_n']} of {h['count']} distros")
+    for name, size in table._radix:
+        print(f"  {name:20} {size}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,7 +3,15 @@ import tkinter as tk
 from tkinter import ttk
 
 from theme import COLORS, FONTS, make_card
-from recommender_engine import recommend
+from distro_similarity import similar
+from recommender_engine import (
+    PROBE_FIELDS,
+    explain,
+    prefs_from_state,
+    recommend_cached,
+    recommend_provisional,
+)
+from recommender_robustness import robustness, uncertain_fields
 
 
 class RecommendationScreen(tk.Frame):
@@ -73,6 +81,7 @@ class RecommendationScreen(tk.Frame):
                    ).pack(side="left")
 
         self.recommendations = []
+        self.stability = {}
         self.selected_idx = 0
 
     def _render_detail_placeholder(self):
@@ -86,28 +95,41 @@ class RecommendationScreen(tk.Frame):
         super().tkraise()
         self._render()
 
-    def _render(self):
+    def refresh(self):
+        """Re-rank after a probe reports, keeping the selected distro in view."""
+        selected = None
+        if 0 <= self.selected_idx < len(self.recommendations):
+            selected = self.recommendations[self.selected_idx]["name"]
+        self._render(selected)
+
+    def _render(self, selected=None):
         s = self.controller.state
-        prefs = {
-            "usage": s.get("usage") or "office",
-            "visual": s.get("visual") or "no",
-            "experience": s.get("experience") or "beginner",
-            "update_pref": s.get("update_pref") or "balanced",
-            "privacy": s.get("privacy") or "no",
-            "free_software_only": s.get("free_software_only") or "no",
-            "battery_priority": s.get("battery_priority") or "no",
-            "windows_like": s.get("windows_like") or "no",
-            "gaming_intensity": s.get("gaming_intensity") or "none",
-            "desktop_pref": (s.get("desktop_pref") or "any").lower(),
-        }
-        result = recommend(s, prefs, top_n=8)
-        self.recommendations = result["recommendations"]
-        hw_score = result["hardware_score"]
-        tier = result["tier"]
-        self.subtitle.config(
-            text=f"Hardware score: {hw_score}/100 ({tier.replace('_', ' ')})  ·  "
-                 f"Showing top {len(self.recommendations)} matches."
+        prefs = prefs_from_state(s)
+        # Only probes that feed the scores (battery does not)
+        pending = sorted(
+            p for p in getattr(self.controller, "pending_probes", ()) if PROBE_FIELDS.get(p)
         )
+        # Reasons are built in _show_detail, only for the item being viewed
+        if pending:
+            # Probes still running: provisional ranking, refined via refresh()
+            result = recommend_provisional(s, prefs, top_n=8, pending=pending)
+            self.recommendations = result["recommendations"]
+            self.stability = {}
+            lo, hi = result["hardware_score_range"]
+            self.subtitle.config(
+                text=f"Hardware score: {lo}-{hi}/100 so far  ·  "
+                     f"Still detecting: {', '.join(pending)}. Rankings may change."
+            )
+        else:
+            result = recommend_cached(s, prefs, top_n=8, reasons=False)
+            self.recommendations = result["recommendations"]
+            self.stability = self._stability(s, prefs, len(self.recommendations))
+            hw_score = result["hardware_score"]
+            tier = result["tier"]
+            self.subtitle.config(
+                text=f"Hardware score: {hw_score}/100 ({tier.replace('_', ' ')})  ·  "
+                     f"Showing top {len(self.recommendations)} matches."
+            )
 
         # Clear list
         for w in self.list_frame.winfo_children():
@@ -124,7 +146,19 @@ class RecommendationScreen(tk.Frame):
         for i, rec in enumerate(self.recommendations):
             self._render_item(rec, i, max_score)
 
-        self._show_detail(0)
+        names = [rec["name"] for rec in self.recommendations]
+        self._show_detail(names.index(selected) if selected in names else 0)
+
+    @staticmethod
+    def _stability(state, prefs, top_n):
+        """{name: robustness entry} when some probe results are uncertain."""
+        if not top_n or not uncertain_fields(state):
+            return {}
+        try:
+            report = robustness(state, prefs, samples=10000, top_n=top_n)
+        except RuntimeError:  # numpy missing
+            return {}
+        return {e["name"]: e for e in report["recommendations"]}
 
     def _render_item(self, rec, idx, max_score):
         item = tk.Frame(self.list_frame, bg=COLORS["surface"],
@@ -140,6 +174,10 @@ class RecommendationScreen(tk.Frame):
                  width=2, anchor="w").pack(side="left")
         tk.Label(top, text=rec["name"], font=FONTS["h2"],
                  bg=COLORS["surface"], fg=COLORS["text"]).pack(side="left", padx=(4, 0))
+        if self.stability.get(rec["name"], {}).get("fragile"):
+            tk.Label(top, text="uncertain", font=FONTS["small"],
+                     bg=COLORS["warn_bg"], fg=COLORS["warn"],
+                     padx=4).pack(side="right")
 
         # Score bar
         bar_outer = tk.Frame(item, bg=COLORS["surface"])
@@ -181,10 +219,24 @@ class RecommendationScreen(tk.Frame):
 
         tk.Label(self.detail, text=rec["name"], font=FONTS["title"],
                  bg=COLORS["surface"], fg=COLORS["text"]).pack(anchor="w")
-        tk.Label(self.detail, text=f"Match score: {rec['score']:.1f}",
+        score_text = f"Match score: {rec['score']:.1f}"
+        if rec.get("score_low", rec["score"]) != rec.get("score_high", rec["score"]):
+            score_text += (f"  (between {rec['score_low']:.1f} and {rec['score_high']:.1f} "
+                           f"until detection finishes)")
+        tk.Label(self.detail, text=score_text,
                  font=FONTS["small"], bg=COLORS["surface"],
                  fg=COLORS["text_muted"]).pack(anchor="w", pady=(2, 12))
 
+        stab = self.stability.get(rec["name"])
+        if stab and stab["fragile"]:
+            tk.Label(self.detail,
+                     text=f"Some hardware could not be detected. This pick stays in the top "
+                          f"{len(self.recommendations)} for {stab['top_share']:.0%} of the machines "
+                          f"that match what was detected (average rank {stab['expected_rank']:.1f}).",
+                     font=FONTS["small"], bg=COLORS["warn_bg"], fg=COLORS["warn"],
+                     wraplength=380, justify="left", anchor="w",
+                     padx=8, pady=6).pack(fill="x", pady=(0, 12))
+
         tk.Label(self.detail, text=rec["summary"], font=FONTS["body"],
                  bg=COLORS["surface"], fg=COLORS["text"],
                  wraplength=380, justify="left", anchor="w").pack(anchor="w", pady=(0, 12))
@@ -207,6 +259,9 @@ class RecommendationScreen(tk.Frame):
                      fg=COLORS["text"], anchor="w").pack(side="left")
 
         # Why this distro
+        if "reasons" not in rec:
+            s = self.controller.state
+            rec["reasons"] = explain(s, prefs_from_state(s), rec["name"])
         if rec.get("reasons"):
             tk.Label(self.detail, text="Why this match",
                      font=FONTS["body_b"], bg=COLORS["surface"],
@@ -216,6 +271,17 @@ class RecommendationScreen(tk.Frame):
                          bg=COLORS["surface"], fg=COLORS["text"],
                          anchor="w").pack(anchor="w")
 
+        # Nearby alternatives
+        alternatives = [hit["name"] for hit in similar(rec["name"], k=3)]
+        if alternatives:
+            tk.Label(self.detail, text="Similar distros",
+                     font=FONTS["body_b"], bg=COLORS["surface"],
+                     fg=COLORS["text"]).pack(anchor="w", pady=(14, 4))
+            tk.Label(self.detail, text="  " + "  ·  ".join(alternatives),
+                     font=FONTS["small"], bg=COLORS["surface"],
+                     fg=COLORS["text_muted"], wraplength=380, justify="left",
+                     anchor="w").pack(anchor="w")
+
         # Action buttons
         btn_frame = tk.Frame(self.detail, bg=COLORS["surface"])
         btn_frame.pack(fill="x", pady=(18, 0))
@@ -0,0 +1,757 @@
+# recommender_batch.py
+# Vectorized batch scoring for the recommender engine.
+# - Compiles the catalog once into a NumPy feature matrix (straight from the
+#   mapped columns when it is a distro_catalog file).
+# - Turns each (state, prefs) pair into a weight vector + penalty masks.
+# - Scores N profiles x M distros with matrix operations.
+#
+# Results match the scalar recommend() exactly: every term in the scoring
+# model is a multiple of 0.5, so float64 sums are exact in any order.
+# score_components() splits the same scores per coefficient for
+# weight_calibration.py.
+#
+# Speed: the 50x+ figure is for score_profiles() + top_n_indices() on
+# already encoded profiles (encode_profiles() output or state columns),
+# about 1 us per profile against 100+ us for recommend(). recommend_batch()
+# from (state, prefs) dicts is about 20-25x faster: reading the fields out
+# of every dict and encoding each distinct prefs tuple is Python work that
+# costs three times the scoring. `python recommender_batch.py` prints both.
+
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None
+
+from recommender_engine import (
+    COEFFICIENTS,
+    _GPU_SCORES,
+    _STORAGE_SCORES,
+    _context,
+    _reasons,
+    _record,
+    _records,
+    catalog_version,
+    configure,
+    get_catalog,
+    hardware_tier,
+    prefs_from_state,
+    recommend,
+)
+from distro_variants import desktop_profile
+
+# ---------- Linear terms ----------
+# (term, coefficient, distro feature). A profile switches a term on or off,
+# the coefficient (a key of recommender_engine.COEFFICIENTS) scales it and
+# the feature comes from the distro.
+TERMS = [
+    ("hw_low", "hardware", "weight_low_hw"),
+    ("hw_mid", "hardware", "weight_mid_hw"),
+    ("hw_high", "hardware", "weight_high_hw"),
+    ("usage_office", "usage", "office"),
+    ("usage_development", "usage", "development"),
+    ("usage_gaming", "usage", "gaming"),
+    ("usage_creative", "usage", "creative"),
+    ("gaming_serious", "gaming_serious", "gaming"),
+    ("visual", "visual", "visual_polish"),
+    ("beginner", "beginner", "beginner"),
+    ("advanced", "advanced", "cutting_edge"),
+    ("stable_stability", "stable_stability", "stability"),
+    ("stable_lts", "stable_lts", "lts"),
+    ("cutting_cutting_edge", "cutting_cutting_edge", "cutting_edge"),
+    ("cutting_rolling", "cutting_rolling", "rolling"),
+    ("balanced_stability", "balanced_stability", "stability"),
+    ("balanced_cutting_edge", "balanced_cutting_edge", "cutting_edge"),
+    ("privacy", "privacy", "privacy"),
+    ("free_software", "free_software", "free_software_purity"),
+    ("free_software_penalty", "free_software_penalty", "_fsp_below_5"),
+    ("battery", "battery", "battery_friendly"),
+    ("windows_like", "windows_like", "_windows_like"),
+    ("windows_like_xfce", "windows_like_xfce", "_windows_like_xfce"),
+    ("old_hw", "old_hw", "good_for_old_hw"),
+]
+TERM_INDEX = {name: i for i, (name, _, _) in enumerate(TERMS)}
+# Pairwise (profile x distro) terms, outside the feature matrix
+PAIRWISE_COEFFICIENTS = ("ram_penalty", "ram_ideal_bonus", "storage_penalty", "desktop")
+
+_USAGE_TERMS = {
+    "gaming": "usage_gaming",
+    "office": "usage_office",
+    "development": "usage_development",
+    "creative": "usage_creative",
+}
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("numpy is required for batch scoring (pip install numpy)")
+
+
+def _feature(d, key: str) -> float:
+    if key == "_fsp_below_5":
+        return 1.0 if d.free_software_purity < 5 else 0.0
+    if key == "_windows_like":
+        return 1.0 if desktop_profile(d.desktop).windows_like else 0.0
+    if key == "_windows_like_xfce":
+        return 1.0 if desktop_profile(d.desktop).xfce else 0.0
+    return float(getattr(d, key, 0))
+
+
+class CompiledCatalog:
+    """
+    A catalog compiled into column arrays.
+    features is (terms x distros), already multiplied by the term
+    coefficients (the engine's COEFFICIENTS unless others are given).
+    """
+
+    def __init__(self, distros: Dict[str, Dict[str, Any]],
+                 coefficients: Optional[Dict[str, float]] = None):
+        _require_numpy()
+        self.coefficients = dict(COEFFICIENTS if coefficients is None else coefficients)
+        if hasattr(distros, "column"):
+            self._from_columns(distros)
+            return
+        self.names: List[str] = list(distros.keys())
+        records = [_record(d) for d in distros.values()]
+        coefs = np.array([self.coefficients[c] for _, c, _ in TERMS], dtype=np.float64)
+        raw = np.array(
+            [[_feature(d, key) for d in records] for _, _, key in TERMS],
+            dtype=np.float64,
+        ).reshape(len(TERMS), len(records))
+        self.features = raw * coefs[:, None]
+        self.min_ram = np.array([d.min_ram_gb for d in records], dtype=np.float64)
+        self.ideal_ram = np.array([d.ideal_ram_gb for d in records], dtype=np.float64)
+        self.min_storage = np.array([d.min_storage_gb for d in records], dtype=np.float64)
+        self.desktops = [desktop_profile(d.desktop) for d in records]
+        self._desktop_rows: Dict[str, Any] = {}
+
+    def _from_columns(self, catalog):
+        """Build from a MappedCatalog without materializing per-distro records."""
+        n = len(catalog)
+        self.names = catalog.strings("name")
+        self.desktops = [desktop_profile(s) for s in catalog.strings("desktop")]
+
+        def col(field):
+            if catalog.kind(field) == "s":
+                raise ValueError(f"{field} is not numeric")
+            return np.asarray(catalog.column(field)).astype(np.float64)
+
+        windows = np.array([desk.windows_like for desk in self.desktops], dtype=np.float64)
+        xfce = np.array([desk.xfce for desk in self.desktops], dtype=np.float64)
+        derived = {
+            "_fsp_below_5": lambda: (col("free_software_purity") < 5).astype(np.float64),
+            "_windows_like": lambda: windows,
+            "_windows_like_xfce": lambda: xfce,
+        }
+        self.features = np.empty((len(TERMS), n), dtype=np.float64)
+        for t, (_, coef, key) in enumerate(TERMS):
+            if key in derived:
+                raw = derived[key]()
+            elif key in catalog.fields:
+                raw = col(key)
+            else:
+                raw = np.zeros(n, dtype=np.float64)
+            self.features[t] = raw * self.coefficients[coef]
+        self.min_ram = col("min_ram_gb")
+        self.ideal_ram = col("ideal_ram_gb")
+        self.min_storage = col("min_storage_gb")
+        self._desktop_rows = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def desktop_row(self, dp: str):
+        """Bonus row for one desktop_pref value (desktop ID match, like recommend())."""
+        row = self._desktop_rows.get(dp)
+        if row is None:
+            if dp == "any":
+                row = np.zeros(len(self.names), dtype=np.float64)
+            else:
+                bonus = self.coefficients["desktop"]
+                row = np.array(
+                    [bonus if dp in desk.ids else 0.0 for desk in self.desktops],
+                    dtype=np.float64,
+                )
+            self._desktop_rows[dp] = row
+        return row
+
+
+_compiled: Optional[CompiledCatalog] = None
+_compiled_for = None
+
+
+def compile_catalog(distros: Optional[Dict[str, Dict[str, Any]]] = None) -> CompiledCatalog:
+    """
+    Compile a catalog (default: the engine's active catalog). The active
+    catalog is compiled once and reused until it is swapped or
+    notify_catalog_changed() is called.
+    """
+    global _compiled, _compiled_for
+    if distros is not None:
+        return CompiledCatalog(distros)
+    active = get_catalog()
+    key = (id(active), len(active), catalog_version())
+    if _compiled is None or _compiled_for != key:
+        _compiled = CompiledCatalog(active)
+        _compiled_for = key
+    return _compiled
+
+
+# ---------- Profile encoding ----------
+PREF_KEYS = (
+    ("usage", "office"),
+    ("gaming_intensity", "none"),
+    ("visual", None),
+    ("experience", "beginner"),
+    ("update_pref", "balanced"),
+    ("privacy", None),
+    ("free_software_only", None),
+    ("battery_priority", None),
+    ("windows_like", None),
+    ("desktop_pref", "any"),
+)
+_PREF_NAMES = tuple(k for k, _ in PREF_KEYS)
+_PREF_GETTER = itemgetter(*_PREF_NAMES)
+_HW_TERMS = ("hw_low", "hw_mid", "hw_high", "old_hw")
+
+
+_STATE_KEYS = ("cpu_score", "gpu_cat", "ram_total_gb", "storage_cat", "storage_free_gb")
+_STATE_GETTER = itemgetter(*_STATE_KEYS)
+
+
+def _rows(records, getter, keys):
+    """Field tuples for many dicts; itemgetter when every key is present."""
+    try:
+        return [getter(r) for r in records]
+    except KeyError:
+        return [tuple(r.get(k) for k in keys) for r in records]
+
+
+def _score_lookup(values, table, default):
+    """Map a categorical column through a score table, one lookup per distinct value."""
+    seen = {v: table.get((v or "").lower(), default) for v in set(values)}
+    return np.array([seen[v] for v in values], dtype=np.float64)
+
+
+def _number_column(values):
+    """float(value or 0) for a whole column."""
+    try:
+        col = np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array([float(v or 0) for v in values], dtype=np.float64)
+    # None becomes NaN above; `or 0` turns it into 0
+    return np.nan_to_num(col, nan=0.0, copy=False)
+
+
+def state_columns(states: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Pull the fields the engine reads out of many state dicts in one pass.
+    Callers that already hold columnar data can build this dict directly.
+    """
+    _require_numpy()
+    if not states:
+        empty = np.zeros(0, dtype=np.float64)
+        return {k: empty for k in ("cpu_score", "gpu_score", "ram_total_gb",
+                                   "storage_score", "storage_free_gb")}
+    cpu, gpu, ram, st, free = zip(*_rows(states, _STATE_GETTER, _STATE_KEYS))
+    return {
+        "cpu_score": _number_column(cpu),
+        "gpu_score": _score_lookup(gpu, _GPU_SCORES, 35),
+        "ram_total_gb": _number_column(ram),
+        "storage_score": _score_lookup(st, _STORAGE_SCORES, 50),
+        "storage_free_gb": _number_column(free),
+    }
+
+
+def hardware_scores(states: Sequence[Dict[str, Any]]):
+    """Vectorized compute_hardware_score() for many states."""
+    cols = state_columns(states)
+    return _hardware_scores_from_columns(
+        cols["cpu_score"], cols["gpu_score"], cols["ram_total_gb"], cols["storage_score"]
+    )
+
+
+def _hardware_scores_from_columns(cpu, gpu, ram_total, storage):
+    ram = np.select(
+        [ram_total >= 32, ram_total >= 16, ram_total >= 8, ram_total >= 4, ram_total >= 2],
+        [100.0, 85.0, 65.0, 45.0, 25.0],
+        default=10.0,
+    )
+    # Same evaluation order as compute_hardware_score(); np.rint rounds half
+    # to even exactly like round().
+    total = np.rint(cpu * 0.30 + gpu * 0.20 + ram * 0.30 + storage * 0.20)
+    return np.clip(total, 0, 100).astype(np.int64)
+
+
+def _lower_column(values):
+    """Lowercase a column of strings, once per distinct value."""
+    seen = {v: v.lower() for v in set(values)}
+    return np.array([seen[v] for v in values], dtype=object)
+
+
+def _prefs_weights(keys) -> Any:
+    """Term weights (U x terms) for distinct prefs tuples (see PREF_KEYS)."""
+    w = np.zeros((len(keys), len(TERMS)), dtype=np.float64)
+    if not keys:
+        return w
+    usage, gi, visual, exp, upd, privacy, fso, battery, windows_like, _dp = (
+        list(c) for c in zip(*keys)
+    )
+    usage = _lower_column(usage)
+    for value, term in _USAGE_TERMS.items():
+        w[:, TERM_INDEX[term]] = usage == value
+    w[:, TERM_INDEX["usage_office"]] += ~np.isin(usage, list(_USAGE_TERMS))
+
+    w[:, TERM_INDEX["gaming_serious"]] = _lower_column(gi) == "serious"
+    exp = _lower_column(exp)
+    w[:, TERM_INDEX["beginner"]] = exp == "beginner"
+    w[:, TERM_INDEX["advanced"]] = exp == "advanced"
+
+    upd = _lower_column(upd)
+    stable = upd == "stable"
+    cutting = upd == "cutting_edge"
+    balanced = ~(stable | cutting)
+    for term, mask in (
+        ("stable_stability", stable), ("stable_lts", stable),
+        ("cutting_cutting_edge", cutting), ("cutting_rolling", cutting),
+        ("balanced_stability", balanced), ("balanced_cutting_edge", balanced),
+    ):
+        w[:, TERM_INDEX[term]] = mask
+
+    # Yes/no answers are compared as-is, like recommend()
+    for terms, col in (
+        (("visual",), visual),
+        (("privacy",), privacy),
+        (("free_software", "free_software_penalty"), fso),
+        (("battery",), battery),
+        (("windows_like", "windows_like_xfce"), windows_like),
+    ):
+        yes = np.array([v == "yes" for v in col], dtype=bool)
+        for term in terms:
+            w[:, TERM_INDEX[term]] = yes
+    return w
+
+
+def prefs_codes(prefs_list: Sequence[Dict[str, Any]]):
+    """
+    Deduplicate prefs dicts. Returns (codes, keys): keys are the distinct
+    prefs tuples (see PREF_KEYS) and codes maps each profile onto them.
+    """
+    uniq: Dict[tuple, int] = {}
+    codes = [
+        uniq.setdefault(key, len(uniq))
+        for key in _rows(prefs_list, _PREF_GETTER, _PREF_NAMES)
+    ]
+    # Missing answers fall back to the same defaults recommend() uses
+    keys = [
+        tuple(default if v is None else v for v, (_, default) in zip(key, PREF_KEYS))
+        if None in key else key
+        for key in uniq
+    ]
+    return np.array(codes, dtype=np.intp), keys
+
+
+def encode_columns(columns: Dict[str, Any], codes, keys):
+    """
+    Turn state columns plus deduplicated prefs into the arrays
+    score_profiles() consumes: one weight vector per distinct prefs tuple
+    (prefs_weights, U x terms) and the hardware band weights per profile.
+    """
+    _require_numpy()
+    hw = _hardware_scores_from_columns(
+        columns["cpu_score"], columns["gpu_score"],
+        columns["ram_total_gb"], columns["storage_score"],
+    )
+    prefs_weights = _prefs_weights(keys)
+    hw_weights = np.stack([hw < 40, (hw >= 40) & (hw < 70), hw >= 70, hw < 30], axis=1)
+    return {
+        "hardware_score": hw,
+        "hardware_weights": hw_weights.astype(np.float64),
+        "prefs_code": codes,
+        "prefs_weights": prefs_weights,
+        "desktop_pref": [key[-1].lower() for key in keys],
+        "ram_gb": columns["ram_total_gb"],
+        "storage_free_gb": columns["storage_free_gb"],
+    }
+
+
+def encode_profiles(states: Sequence[Dict[str, Any]], prefs_list: Sequence[Dict[str, Any]]):
+    """Encode (state, prefs) pairs for score_profiles()."""
+    _require_numpy()
+    if len(states) != len(prefs_list):
+        raise ValueError("states and prefs_list must have the same length")
+    codes, keys = prefs_codes(prefs_list)
+    return encode_columns(state_columns(states), codes, keys)
+
+
+# ---------- Scoring ----------
+# Prefs the encoder lowercases; the other answers are only compared to "yes"
+_LOWERED_PREFS = frozenset({"usage", "gaming_intensity", "experience", "update_pref", "desktop_pref"})
+
+
+def check_profile(state: Dict[str, Any], prefs: Dict[str, Any]):
+    """Raise ValueError, naming the field, if encode_profiles() cannot take this pair."""
+    if not isinstance(state, dict) or not isinstance(prefs, dict):
+        raise ValueError("state and prefs must be objects")
+    for key in ("gpu_cat", "storage_cat"):
+        v = state.get(key)
+        # Falsy scalars read as "" like (v or "") does; containers are unhashable
+        if not isinstance(v, str) and (v or isinstance(v, (list, dict))):
+            raise ValueError(f"{key}: expected a string, got {v!r}")
+    for key in ("cpu_score", "ram_total_gb", "storage_free_gb"):
+        v = state.get(key)
+        try:
+            float(v or 0)
+        except (TypeError, ValueError):
+            raise ValueError(f"{key}: expected a number, got {v!r}") from None
+    for key, _ in PREF_KEYS:
+        v = prefs.get(key)
+        if v is None:
+            continue
+        if key in _LOWERED_PREFS:
+            if not isinstance(v, str):
+                raise ValueError(f"{key}: expected a string, got {v!r}")
+        else:
+            try:
+                hash(v)
+            except TypeError:
+                raise ValueError(f"{key}: expected a string, got {v!r}") from None
+
+
+def find_bad_profiles(states: Sequence[Dict[str, Any]],
+                      prefs_list: Sequence[Dict[str, Any]]) -> Dict[int, str]:
+    """
+    index -> error for the profiles encode_profiles() rejects. Meant for
+    after a batched call failed, so clean input never pays for the checks.
+    """
+    bad = {}
+    for i, (state, prefs) in enumerate(zip(states, prefs_list)):
+        try:
+            check_profile(state, prefs)
+        except ValueError as e:
+            bad[i] = str(e)
+    if not bad:
+        # Something check_profile() does not cover: encode one at a time
+        for i, (state, prefs) in enumerate(zip(states, prefs_list)):
+            try:
+                encode_profiles([state], [prefs])
+            except Exception as e:
+                bad[i] = f"bad state/prefs: {e}"
+    return bad
+
+
+def _desktop_rows(catalog: CompiledCatalog, desktop_pref: Sequence[str]):
+    """Desktop points (U x M) per distinct prefs tuple, one desktop_row() per desktop."""
+    index: Dict[str, int] = {}
+    codes = [index.setdefault(dp, len(index)) for dp in desktop_pref]
+    rows = np.array([catalog.desktop_row(dp) for dp in index], dtype=np.float64)
+    return rows.reshape(len(index), len(catalog))[codes]
+
+
+def score_profiles(catalog: CompiledCatalog, encoded: Dict[str, Any]):
+    """Score matrix (N x M) for encoded profiles."""
+    # Preference part: one row per distinct prefs tuple, then gathered
+    per_prefs = encoded["prefs_weights"] @ catalog.features
+    per_prefs += _desktop_rows(catalog, encoded["desktop_pref"])
+    scores = per_prefs[encoded["prefs_code"]]
+
+    # Hardware band part
+    hw_rows = catalog.features[[TERM_INDEX[t] for t in _HW_TERMS]]
+    scores += encoded["hardware_weights"] @ hw_rows
+
+    c = catalog.coefficients
+    ram_low, ram_ideal, storage_low = _threshold_masks(catalog, encoded)
+    scores += ram_low * c["ram_penalty"]
+    scores += ram_ideal * c["ram_ideal_bonus"]
+    scores += storage_low * c["storage_penalty"]
+    return scores
+
+
+def _threshold_masks(catalog: CompiledCatalog, encoded: Dict[str, Any]):
+    """(N x M) masks: RAM below minimum, RAM at/above ideal, storage below minimum."""
+    ram = encoded["ram_gb"][:, None]
+    # `ram_gb and ...` in the scalar criteria: 0 (unknown) never counts,
+    # negative values do
+    has_ram = ram != 0
+    ram_low = has_ram & (ram < catalog.min_ram[None, :])
+    ram_ideal = has_ram & ~ram_low & (ram >= catalog.ideal_ram[None, :])
+    free = encoded["storage_free_gb"][:, None]
+    storage_low = (free != 0) & (free < catalog.min_storage[None, :])
+    return ram_low, ram_ideal, storage_low
+
+
+def score_components(catalog: CompiledCatalog, encoded: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Scores split per coefficient: {coefficient: (N x M) points per unit of
+    that coefficient}. Compile the catalog with every coefficient at 1.0;
+    then sum(COEFFICIENTS[k] * parts[k]) equals score_profiles() for the
+    engine's coefficients.
+    """
+    codes = encoded["prefs_code"]
+    weights = encoded["prefs_weights"]
+    parts: Dict[str, Any] = {}
+    for t, (term, coef, _) in enumerate(TERMS):
+        if term in _HW_TERMS:
+            col = encoded["hardware_weights"][:, _HW_TERMS.index(term)]
+        else:
+            col = weights[codes, t]
+        if not col.any():
+            continue
+        part = col[:, None] * catalog.features[t][None, :]
+        if coef in parts:
+            parts[coef] += part
+        else:
+            parts[coef] = part
+    parts["desktop"] = _desktop_rows(catalog, encoded["desktop_pref"])[codes]
+    ram_low, ram_ideal, storage_low = _threshold_masks(catalog, encoded)
+    parts["ram_penalty"] = ram_low.astype(np.float64)
+    parts["ram_ideal_bonus"] = ram_ideal.astype(np.float64)
+    parts["storage_penalty"] = storage_low.astype(np.float64)
+    return parts
+
+
+def top_n_indices(scores, top_n: int):
+    """
+    Top-N distro indices per row, best first. Ties keep catalog order, like
+    the stable sort in recommend().
+    """
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :top_n]
+    return order, np.take_along_axis(scores, order, axis=1)
+
+
+def recommend_batch(
+    states: Sequence[Dict[str, Any]],
+    prefs_list: Sequence[Dict[str, Any]],
+    top_n: int = 5,
+    catalog: Optional[CompiledCatalog] = None,
+    chunk_size: int = 65536,
+):
+    """
+    Score many profiles at once.
+    Returns {names, hardware_score (N,), top_idx (N x top_n), top_scores (N x top_n)}.
+    Row i of top_idx holds indices into names, ranked like recommend().
+    """
+    _require_numpy()
+    catalog = catalog or compile_catalog()
+    n = len(states)
+    k = min(top_n, len(catalog))
+    hw = np.empty(n, dtype=np.int64)
+    top_idx = np.empty((n, k), dtype=np.int64)
+    top_scores = np.empty((n, k), dtype=np.float64)
+    # Chunking keeps the N x M temporaries bounded for very large inputs
+    for start in range(0, n, chunk_size):
+        stop = min(n, start + chunk_size)
+        enc = encode_profiles(states[start:stop], prefs_list[start:stop])
+        idx, sc = top_n_indices(score_profiles(catalog, enc), k)
+        hw[start:stop] = enc["hardware_score"]
+        top_idx[start:stop] = idx
+        top_scores[start:stop] = sc
+    return {
+        "names": catalog.names,
+        "hardware_score": hw,
+        "top_idx": top_idx,
+        "top_scores": top_scores,
+    }
+
+
+# ---------- Streaming (JSONL in, JSONL out) ----------
+def _split_record(rec: Dict[str, Any]):
+    """(state, prefs) for one input record: either {state, prefs} or a flat app state."""
+    if "state" in rec:
+        state = rec.get("state") or {}
+        prefs = rec.get("prefs") or prefs_from_state(state)
+        return state, prefs
+    return rec, prefs_from_state(rec)
+
+
+def score_lines(lines: List[str], top_n: int = 5, first_line: int = 1,
+                reasons: bool = False) -> str:
+    """
+    Score a chunk of JSONL lines and return the JSONL output for it.
+    Runs in worker processes; malformed lines and records with field values
+    that cannot be scored produce an error record, {"line", "error"}.
+    With reasons=True each emitted recommendation carries its reasons,
+    built only for those top_n entries.
+    """
+    out: List[Optional[Dict[str, Any]]] = []
+    states, prefs_list, slots = [], [], []
+    for offset, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            rec = json.loads(line)
+            state, prefs = _split_record(rec)
+        except Exception as e:
+            out.append({"line": first_line + offset, "error": str(e)})
+            continue
+        slots.append((len(out), first_line + offset))
+        out.append({"id": rec.get("id")})
+        states.append(state)
+        prefs_list.append(prefs)
+
+    if states and np is not None:
+        try:
+            res = recommend_batch(states, prefs_list, top_n=top_n)
+        except Exception:
+            # A field value the encoder rejects fails the whole chunk: report
+            # those records and score the rest
+            bad = find_bad_profiles(states, prefs_list)
+            for i, error in bad.items():
+                slot, number = slots[i]
+                out[slot] = {"line": number, "error": error}
+            keep = [i for i in range(len(states)) if i not in bad]
+            slots = [slots[i] for i in keep]
+            states = [states[i] for i in keep]
+            prefs_list = [prefs_list[i] for i in keep]
+            res = recommend_batch(states, prefs_list, top_n=top_n) if states else None
+        if res is not None:
+            names = res["names"]
+            records = _records() if reasons else None
+            for (slot, _), state, prefs, hw, idx, sc in zip(
+                slots, states, prefs_list, res["hardware_score"].tolist(),
+                res["top_idx"].tolist(), res["top_scores"].tolist(),
+            ):
+                recs = [{"name": names[j], "score": s} for j, s in zip(idx, sc)]
+                if reasons:
+                    ctx = _context(state, prefs)
+                    for r, j in zip(recs, idx):
+                        r["reasons"] = _reasons(records[j], ctx)
+                out[slot].update({
+                    "hardware_score": hw,
+                    "tier": hardware_tier(hw),
+                    "recommendations": recs,
+                })
+    else:
+        for (slot, number), state, prefs in zip(slots, states, prefs_list):
+            try:
+                r = recommend(state, prefs, top_n=top_n, reasons=reasons)
+            except Exception as e:
+                out[slot] = {"line": number, "error": f"bad state/prefs: {e}"}
+                continue
+            recs = []
+            for x in r["recommendations"]:
+                rec = {"name": x["name"], "score": x["score"]}
+                if reasons:
+                    rec["reasons"] = x["reasons"]
+                recs.append(rec)
+            out[slot].update({
+                "hardware_score": r["hardware_score"],
+                "tier": r["tier"],
+                "recommendations": recs,
+            })
+    return "".join(json.dumps(o, separators=(",", ":")) + "\n" for o in out)
+
+
+def stream_recommendations(src, dst, top_n: int = 5, chunk_size: int = 2000,
+                           workers: Optional[int] = None,
+                           catalog: Optional[str] = None, reasons: bool = False,
+                           coefficients: Optional[Dict[str, float]] = None,
+                           table: Optional[str] = None) -> int:
+    """
+    Read JSONL profiles from src, write JSONL results to dst in input order.
+    Chunks are scored on a process pool (one worker per core by default).
+    At most 2 chunks per worker are in flight, so memory stays bounded no
+    matter how large the input is. Returns the number of lines read.
+    catalog is a distro_catalog file; every worker maps the same file, so
+    they share one page-cache copy. coefficients (default: the active ones)
+    and the ranking table file are applied the same way in every worker.
+    """
+    workers = workers or os.cpu_count() or 1
+    settings = (catalog, dict(COEFFICIENTS) if coefficients is None else coefficients, table)
+    lines_read = 0
+
+    def chunks():
+        nonlocal lines_read
+        while True:
+            lines = list(islice(src, chunk_size))
+            if not lines:
+                return
+            start = lines_read + 1
+            lines_read += len(lines)
+            yield start, lines
+
+    if workers <= 1:
+        configure(*settings)
+        for start, lines in chunks():
+            dst.write(score_lines(lines, top_n, start, reasons))
+        return lines_read
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=configure,
+                             initargs=settings) as pool:
+        pending: deque = deque()
+        for start, lines in chunks():
+            pending.append(pool.submit(score_lines, lines, top_n, start, reasons))
+            if len(pending) >= workers * 2:
+                dst.write(pending.popleft().result())
+        while pending:
+            dst.write(pending.popleft().result())
+    return lines_read
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    rng = random.Random(0)
+    n = 20000
+    states = [
+        {
+            "cpu_score": rng.randint(0, 100),
+            "gpu_cat": rng.choice(list(_GPU_SCORES)),
+            "ram_total_gb": rng.choice([0, 1, 2, 4, 8, 16, 32]),
+            "storage_cat": rng.choice(list(_STORAGE_SCORES)),
+            "storage_free_gb": rng.choice([0, 8, 18, 50, 200]),
+        }
+        for _ in range(n)
+    ]
+    prefs_list = [
+        {
+            "usage": rng.choice(["office", "development", "gaming", "creative"]),
+            "visual": rng.choice(["yes", "no"]),
+            "experience": rng.choice(["beginner", "intermediate", "advanced"]),
+            "update_pref": rng.choice(["stable", "balanced", "cutting_edge"]),
+            "privacy": rng.choice(["yes", "no"]),
+            "free_software_only": rng.choice(["yes", "no"]),
+            "battery_priority": rng.choice(["yes", "no"]),
+            "windows_like": rng.choice(["yes", "no"]),
+            "gaming_intensity": rng.choice(["none", "casual", "serious"]),
+            "desktop_pref": rng.choice(["any", "gnome", "kde", "cinnamon", "xfce", "lxqt", "pantheon"]),
+        }
+        for _ in range(n)
+    ]
+
+    t0 = time.perf_counter()
+    res = recommend_batch(states, prefs_list, top_n=5)
+    t_batch = time.perf_counter() - t0
+
+    # Scoring alone, for callers that already hold encoded/columnar profiles
+    enc = encode_profiles(states, prefs_list)
+    t0 = time.perf_counter()
+    top_n_indices(score_profiles(compile_catalog(), enc), 5)
+    t_score = time.perf_counter() - t0
+
+    sample = range(0, n, 20)
+    t0 = time.perf_counter()
+    mismatches = 0
+    for i in sample:
+        ref = recommend(states[i], prefs_list[i], top_n=5)
+        got = [(res["names"][j], float(s)) for j, s in zip(res["top_idx"][i], res["top_scores"][i])]
+        want = [(r["name"], r["score"]) for r in ref["recommendations"]]
+        if got != want or ref["hardware_score"] != res["hardware_score"][i]:
+            mismatches += 1
+    t_scalar = (time.perf_counter() - t0) / len(sample)
+
+    print(json.dumps({
+        "profiles": n,
+        "batch_us_per_profile": round(t_batch / n * 1e6, 2),
+        "score_only_us_per_profile": round(t_score / n * 1e6, 2),
+        "scalar_us_per_profile": round(t_scalar * 1e6, 2),
+        "mismatches": mismatches,
+    }, indent=2))
@@ -0,0 +1,304 @@
+# recommender_bench.py
+# Benchmarks for the recommendation engine.
+#
+#   python recommender_bench.py                        - every benchmark, JSON on stdout
+#   python recommender_bench.py recommend --sizes 17,1000,100000
+#   python recommender_bench.py -o run.json --compare baseline.json
+#
+# Inputs come from seeded generators, so two runs of the same revision
+# score exactly the same profiles against exactly the same catalogs.
+
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Sequence
+
+from recommender_engine import (
+    DISTROS,
+    _context,
+    compile_scorer,
+    compute_hardware_score,
+    get_catalog,
+    hardware_tier,
+    recommend,
+    recommend_compiled,
+    score_distro,
+    use_catalog,
+)
+
+DEMO_STATE = {
+    "cpu_score": 65,
+    "gpu_cat": "mid",
+    "ram_total_gb": 8,
+    "storage_cat": "fast",
+    "storage_free_gb": 100,
+}
+DEMO_PREFS = {
+    "usage": "development",
+    "visual": "yes",
+    "experience": "intermediate",
+    "update_pref": "balanced",
+    "privacy": "no",
+    "free_software_only": "no",
+    "battery_priority": "no",
+    "windows_like": "no",
+    "gaming_intensity": "casual",
+    "desktop_pref": "any",
+}
+
+# ---------- Generators ----------
+_GPU_CATS = ["strong", "mid", "weak", "nogpu", "unknown"]
+_STORAGE_CATS = ["high", "fast", "mid", "low", "unknown"]
+_RAM_SIZES = [1, 2, 3, 4, 6, 8, 12, 16, 24, 32, 64]
+_PREF_CHOICES = {
+    "usage": ["office", "development", "gaming", "creative", "general"],
+    "visual": ["yes", "no"],
+    "experience": ["beginner", "intermediate", "advanced"],
+    "update_pref": ["stable", "balanced", "cutting_edge"],
+    "privacy": ["yes", "no"],
+    "free_software_only": ["yes", "no"],
+    "battery_priority": ["yes", "no"],
+    "windows_like": ["yes", "no"],
+    "gaming_intensity": ["none", "casual", "serious"],
+    "desktop_pref": ["any", "gnome", "kde", "xfce", "cinnamon"],
+}
+_DESKTOPS = ["GNOME", "KDE Plasma", "XFCE", "Cinnamon", "MATE", "LXQt", "Budgie"]
+
+
+def gen_states(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Hardware states shaped like MainWindow.state after the probes ran."""
+    rng = random.Random(seed)
+    return [
+        {
+            "cpu_score": rng.randint(5, 100),
+            "gpu_cat": rng.choice(_GPU_CATS),
+            "ram_total_gb": rng.choice(_RAM_SIZES),
+            "storage_cat": rng.choice(_STORAGE_CATS),
+            "storage_free_gb": rng.choice([0, 8, 20, 40, 120, 500]),
+        }
+        for _ in range(n)
+    ]
+
+
+def gen_prefs(n: int, seed: int = 0) -> List[Dict[str, str]]:
+    """Answers to the PreferencesScreen questions."""
+    rng = random.Random(seed)
+    return [{k: rng.choice(v) for k, v in _PREF_CHOICES.items()} for _ in range(n)]
+
+
+def gen_catalog(size: int, seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    """
+    DISTROS scaled to size entries. The first 17 are the built-in distros;
+    the rest are variants with jittered weights, RAM/storage minimums and
+    desktops. Field types match DISTROS, so the result can also be written
+    with distro_catalog.write_catalog().
+    """
+    rng = random.Random(seed)
+    base = list(DISTROS.items())
+    catalog = {}
+    for i in range(size):
+        name, d = base[i % len(base)]
+        if i < len(base):
+            catalog[name] = dict(d)
+            continue
+        v = dict(d)
+        for key, value in d.items():
+            if isinstance(value, int) and not isinstance(value, bool):
+                v[key] = max(0, min(10, value + rng.randint(-2, 2)))
+        v["min_ram_gb"] = rng.choice([0.5, 1.0, 1.5, 2.0, 3.0, 4.0])
+        v["ideal_ram_gb"] = v["min_ram_gb"] * rng.choice([2, 4])
+        v["min_storage_gb"] = float(rng.choice([8, 10, 15, 20, 25, 30]))
+        v["good_for_old_hw"] = rng.random() < 0.3
+        v["desktop"] = rng.choice(_DESKTOPS)
+        v["summary"] = f"{d['summary']} (variant {i})"
+        catalog[f"{name} #{i}"] = v
+    return catalog
+
+
+# ---------- Measurement ----------
+def _percentile(sorted_values: Sequence[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[i]
+
+
+def measure(fn: Callable[..., Any], calls: Sequence[tuple], alloc_calls: int = 50) -> Dict[str, Any]:
+    """
+    Time fn(*args) once per entry of calls. Reports throughput, p50/p99
+    latency and the largest peak allocation of a single call (measured in a
+    separate pass, since tracemalloc slows calls down).
+    """
+    fn(*calls[0])  # warm caches
+    perf = time.perf_counter_ns
+    latencies = []
+    start = perf()
+    for args in calls:
+        t0 = perf()
+        fn(*args)
+        latencies.append(perf() - t0)
+    total = (perf() - start) / 1e9
+    latencies.sort()
+
+    peak = 0
+    tracemalloc.start()
+    for args in calls[:alloc_calls]:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        fn(*args)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    return {
+        "calls": len(calls),
+        "per_sec": round(len(calls) / total, 1) if total else 0.0,
+        "p50_us": round(_percentile(latencies, 0.50) / 1000, 2),
+        "p99_us": round(_percentile(latencies, 0.99) / 1000, 2),
+        "peak_alloc_bytes": peak,
+    }
+
+
+def _best_of(fn, repeat=5, number=2000) -> float:
+    """Best per-call time in microseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / number)
+    return best * 1e6
+
+
+# ---------- Benchmarks ----------
+def bench_recommend(sizes=(17, 1000, 10000, 100000), profiles=2000, seed=0, top_n=5):
+    """recommend() per catalog size. Big catalogs get fewer calls, same seeds."""
+    states, prefs = gen_states(profiles, seed), gen_prefs(profiles, seed + 1)
+    previous = get_catalog()
+    out = {}
+    try:
+        for size in sizes:
+            use_catalog(gen_catalog(size, seed))
+            n = max(20, min(profiles, profiles * 17 // size))
+            calls = [(s, p, top_n) for s, p in zip(states[:n], prefs[:n])]
+            out[str(size)] = measure(recommend, calls, alloc_calls=min(50, n))
+    finally:
+        use_catalog(previous)
+    return out
+
+
+def bench_hardware(profiles=20000, seed=0):
+    """compute_hardware_score() and hardware_tier()."""
+    states = gen_states(profiles, seed)
+    scores = [compute_hardware_score(s) for s in states]
+    return {
+        "compute_hardware_score": measure(compute_hardware_score, [(s,) for s in states]),
+        "hardware_tier": measure(hardware_tier, [(h,) for h in scores]),
+    }
+
+
+def bench_compiled(state=DEMO_STATE, prefs=DEMO_PREFS):
+    """Per-distro scoring cost and end-to-end recommend(), interpreted vs compiled."""
+    ctx = _context(state, prefs)
+    records = list(get_catalog().values())
+    scorer = compile_scorer(prefs)
+    hw, ram, free = ctx["hw_score"], ctx["ram_gb"], ctx["storage_free"]
+
+    interpreted = _best_of(lambda: [score_distro(d, ctx) for d in records])
+    compiled = _best_of(lambda: scorer.scores(hw, ram, free))
+    e2e_interpreted = _best_of(lambda: recommend(state, prefs), number=500)
+    e2e_compiled = _best_of(lambda: recommend_compiled(state, prefs), number=500)
+    n = len(records)
+    return {
+        "distros": n,
+        "scoring_ns_per_distro": {
+            "interpreted": round(interpreted / n * 1000, 1),
+            "compiled": round(compiled / n * 1000, 1),
+            "speedup": round(interpreted / compiled, 1),
+        },
+        "recommend_us_per_call": {
+            "interpreted": round(e2e_interpreted, 1),
+            "compiled": round(e2e_compiled, 1),
+            "speedup": round(e2e_interpreted / e2e_compiled, 1),
+        },
+    }
+
+
+BENCHMARKS = {
+    "recommend": bench_recommend,
+    "hardware": bench_hardware,
+    "compiled": bench_compiled,
+}
+
+
+def _flatten(d, prefix=""):
+    for k, v in d.items():
+        if isinstance(v, dict):
+            yield from _flatten(v, f"{prefix}{k}.")
+        else:
+            yield f"{prefix}{k}", v
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """One line per metric present in both runs: baseline -> current (change)."""
+    old = dict(_flatten(baseline.get("results", {})))
+    lines = []
+    for key, value in _flatten(current.get("results", {})):
+        before = old.get(key)
+        if not isinstance(value, (int, float)) or not isinstance(before, (int, float)):
+            continue
+        change = f"{(value - before) / before * 100:+.1f}%" if before else "n/a"
+        lines.append(f"{key:50} {before:>12} -> {value:<12} {change}")
+    return lines
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="recommender_bench",
+                                     description="Benchmark the recommendation engine.")
+    parser.add_argument("benchmarks", nargs="*", help=f"any of {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument("--sizes", default="17,1000,10000,100000", help="catalog sizes for 'recommend'")
+    parser.add_argument("--profiles", type=int, default=2000, help="profiles per catalog size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write the results JSON here (default: stdout)")
+    parser.add_argument("--compare", help="earlier results JSON to diff against")
+    args = parser.parse_args(argv)
+
+    names = args.benchmarks or list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    results = {}
+    for name in names:
+        if name == "recommend":
+            sizes = tuple(int(s) for s in args.sizes.split(","))
+            results[name] = bench_recommend(sizes, args.profiles, args.seed)
+        elif name == "hardware":
+            results[name] = bench_hardware(seed=args.seed)
+        else:
+            results[name] = BENCHMARKS[name]()
+    run = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    text = json.dumps(run, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        # Keep stdout pure JSON when the results go there
+        print("\n".join(compare(run, baseline)), file=sys.stdout if args.output else sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
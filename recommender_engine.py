@@ -7,11 +7,146 @@
 #
 # Returns a ranked list of distros with explanations. (which is more badass)
 
-from typing import Any, Dict, List
+import heapq
+import json
+from bisect import bisect_right
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Tuple
+
+from distro_variants import desktop_matches, desktop_profile, expand_variants
+
+# ---------- Distro records ----------
+DISTRO_FIELDS = (
+    "min_ram_gb", "ideal_ram_gb", "min_storage_gb",
+    "weight_low_hw", "weight_mid_hw", "weight_high_hw",
+    "beginner", "stability", "cutting_edge",
+    "office", "development", "gaming", "creative",
+    "visual_polish", "privacy", "free_software_purity", "lts", "rolling",
+    "desktop", "package_mgr", "good_for_old_hw", "battery_friendly", "summary",
+)
+_FIELD_SET = frozenset(DISTRO_FIELDS)
+
+
+class Distro(MutableMapping):
+    """
+    One catalog entry. Fields are slots, so the scoring code reads them as
+    attributes (d.min_ram_gb) and large catalogs don't pay for a dict per
+    entry. It still behaves like the dict it replaces (d["summary"],
+    d.get(...), dict(d)), so callers that treat entries as dicts keep working.
+    Fields outside DISTRO_FIELDS go to an overflow dict.
+    """
+
+    __slots__ = DISTRO_FIELDS + ("_extra",)
+
+    def __init__(self, fields=None, **kwargs):
+        self._extra = None
+        for key, value in dict(fields or {}, **kwargs).items():
+            self[key] = value
+
+    @classmethod
+    def from_mapping(cls, fields) -> "Distro":
+        return fields if isinstance(fields, cls) else cls(fields)
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in _FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for key in DISTRO_FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self)
+
+    def __repr__(self):
+        return f"Distro({self.to_dict()!r})"
+
+
+def compact_catalog(distros) -> Dict[str, Distro]:
+    """name -> Distro for a name -> dict catalog."""
+    return {name: Distro.from_mapping(d) for name, d in distros.items()}
+
+
+def _records() -> List[Any]:
+    """
+    Catalog entries with attribute access, in catalog order. Plain dicts
+    added to DISTROS after import are converted on the fly.
+    """
+    return list(_iter_records())
+
+
+def _iter_records():
+    # Lazy catalogs (distro_variants.VariantCatalog) yield one record at a time
+    return (d if type(d) is Distro else _record(d) for d in DISTROS.values())
+
+
+def _catalog_entries(indices) -> List[Tuple[str, Any]]:
+    """(name, record) at catalog positions; mapped and lazy catalogs read only those."""
+    if hasattr(DISTROS, "record"):
+        return [(DISTROS.name(j), DISTROS.record(j)) for j in indices]
+    keys = list(DISTROS.keys())
+    return [(keys[j], _record(DISTROS[keys[j]])) for j in indices]
+
+
+def _records_at(indices) -> List[Any]:
+    """Records at catalog positions, without building the rest of the catalog."""
+    if hasattr(DISTROS, "record"):
+        return [DISTROS.record(j) for j in indices]
+    return [d for _, d in _catalog_entries(indices)]
+
+
+def _record(d):
+    # Exact type check first: isinstance() against a MutableMapping subclass
+    # is several times slower than a plain type comparison.
+    if type(d) is Distro or not isinstance(d, dict):
+        return d
+    return Distro(d)
+
 
 # ---------- Distro feature matrix ----------
 # Each distro has a feature vector of attributes.
-# Scores from 0-10 unless noted.
+# Scores from 0-10 unless noted. Distros shipped with several desktops are
+# one base plus desktop overlays (see distro_variants).
 DISTROS: Dict[str, Dict[str, Any]] = {
     "Ubuntu LTS": {
         "min_ram_gb": 2.0,
@@ -38,55 +173,50 @@ DISTROS: Dict[str, Dict[str, Any]] = {
         "battery_friendly": 7,
         "summary": "Wide ecosystem with long-term support; safe default.",
     },
-    "Linux Mint Cinnamon": {
-        "min_ram_gb": 2.0,
-        "ideal_ram_gb": 4.0,
-        "min_storage_gb": 20.0,
-        "weight_low_hw": 5,
-        "weight_mid_hw": 9,
-        "weight_high_hw": 7,
-        "beginner": 10,
-        "stability": 9,
-        "cutting_edge": 3,
-        "office": 9,
-        "development": 7,
-        "gaming": 6,
-        "creative": 6,
-        "visual_polish": 8,
-        "privacy": 6,
-        "free_software_purity": 5,
-        "lts": 9,
-        "rolling": 0,
-        "desktop": "Cinnamon",
-        "package_mgr": "APT/Flatpak",
-        "good_for_old_hw": False,
-        "battery_friendly": 7,
-        "summary": "Newcomer-friendly, Windows-like, stable Ubuntu base.",
-    },
-    "Linux Mint XFCE": {
-        "min_ram_gb": 1.0,
-        "ideal_ram_gb": 2.0,
-        "min_storage_gb": 15.0,
-        "weight_low_hw": 9,
-        "weight_mid_hw": 7,
-        "weight_high_hw": 5,
-        "beginner": 9,
-        "stability": 9,
-        "cutting_edge": 3,
-        "office": 9,
-        "development": 7,
-        "gaming": 5,
-        "creative": 5,
-        "visual_polish": 6,
-        "privacy": 6,
-        "free_software_purity": 5,
-        "lts": 9,
-        "rolling": 0,
-        "desktop": "XFCE",
-        "package_mgr": "APT/Flatpak",
-        "good_for_old_hw": True,
-        "battery_friendly": 8,
-        "summary": "Lightweight, balanced, perfect for older PCs.",
+    "Linux Mint": {
+        "base": {
+            "stability": 9,
+            "cutting_edge": 3,
+            "office": 9,
+            "development": 7,
+            "privacy": 6,
+            "free_software_purity": 5,
+            "lts": 9,
+            "rolling": 0,
+            "package_mgr": "APT/Flatpak",
+        },
+        "desktops": {
+            "Cinnamon": {
+                "min_ram_gb": 2.0,
+                "ideal_ram_gb": 4.0,
+                "min_storage_gb": 20.0,
+                "weight_low_hw": 5,
+                "weight_mid_hw": 9,
+                "weight_high_hw": 7,
+                "beginner": 10,
+                "gaming": 6,
+                "creative": 6,
+                "visual_polish": 8,
+                "good_for_old_hw": False,
+                "battery_friendly": 7,
+                "summary": "Newcomer-friendly, Windows-like, stable Ubuntu base.",
+            },
+            "XFCE": {
+                "min_ram_gb": 1.0,
+                "ideal_ram_gb": 2.0,
+                "min_storage_gb": 15.0,
+                "weight_low_hw": 9,
+                "weight_mid_hw": 7,
+                "weight_high_hw": 5,
+                "beginner": 9,
+                "gaming": 5,
+                "creative": 5,
+                "visual_polish": 6,
+                "good_for_old_hw": True,
+                "battery_friendly": 8,
+                "summary": "Lightweight, balanced, perfect for older PCs.",
+            },
+        },
     },
     "Xubuntu": {
         "min_ram_gb": 1.0,
@@ -439,18 +569,21 @@ DISTROS: Dict[str, Dict[str, Any]] = {
         "summary": "Ultra-light, runs on truly ancient hardware.",
     },
 }
+DISTROS = compact_catalog(expand_variants(DISTROS))
 
 
 # Hardware score (not being generous lol)
+_GPU_SCORES = {"strong": 90, "mid": 60, "weak": 30, "nogpu": 10, "unknown": 35}
+_STORAGE_SCORES = {"high": 90, "fast": 75, "mid": 50, "low": 25, "unknown": 50}
+
+
 def compute_hardware_score(state) -> int:
     """
     Combine cpu/gpu/ram/storage into 0-100.
     """
     cpu_score = state.get("cpu_score") or 0  # already 0-100
     gpu_cat = (state.get("gpu_cat") or "").lower()
-    gpu_score = {"strong": 90, "mid": 60, "weak": 30, "nogpu": 10, "unknown": 35}.get(
-        gpu_cat, 35
-    )
+    gpu_score = _GPU_SCORES.get(gpu_cat, 35)
     ram_total = float(state.get("ram_total_gb") or 0)
     if ram_total >= 32:
         ram_score = 100
@@ -465,9 +598,7 @@ def compute_hardware_score(state) -> int:
     else:
         ram_score = 10
     st_cat = (state.get("storage_cat") or "").lower()
-    storage_score = {"high": 90, "fast": 75, "mid": 50, "low": 25, "unknown": 50}.get(
-        st_cat, 50
-    )
+    storage_score = _STORAGE_SCORES.get(st_cat, 50)
 
     # Weighted average
     total = int(
@@ -481,168 +612,1030 @@ def compute_hardware_score(state) -> int:
     return max(0, min(100, total))
 
 
+# Lowest hardware score of each tier above "very_low"
+_TIER_LIMITS = (12, 25, 40, 55, 70, 85)
+_TIER_NAMES = ("very_low", "low", "mid_low", "mid", "mid_high", "high", "ultra")
+
+
 def hardware_tier(score: int) -> str:
-    if score >= 85:
-        return "ultra"
-    if score >= 70:
-        return "high"
-    if score >= 55:
-        return "mid_high"
-    if score >= 40:
-        return "mid"
-    if score >= 25:
-        return "mid_low"
-    if score >= 12:
-        return "low"
-    return "very_low"
+    return _TIER_NAMES[bisect_right(_TIER_LIMITS, score)]
 
 
 def _hw_weight_for(distro, score: int) -> int:
     if score >= 70:
-        return distro["weight_high_hw"]
+        return distro.weight_high_hw
     if score >= 40:
-        return distro["weight_mid_hw"]
-    return distro["weight_low_hw"]
+        return distro.weight_mid_hw
+    return distro.weight_low_hw
+
+
+# ---------- Coefficients ----------
+# Points per unit of each distro feature (or per matched condition).
+# weight_calibration.py fits these to labelled choices; load the result
+# with load_coefficients(). Every value must stay a multiple of 0.5 so
+# scores remain exact in float arithmetic (see recommender_batch).
+DEFAULT_COEFFICIENTS = {
+    "hardware": 6.0,
+    "ram_penalty": -30.0,
+    "ram_ideal_bonus": 8.0,
+    "storage_penalty": -10.0,
+    "usage": 3.0,
+    "gaming_serious": 2.0,
+    "visual": 2.0,
+    "beginner": 2.5,
+    "advanced": 1.5,
+    "stable_stability": 2.0,
+    "stable_lts": 1.5,
+    "cutting_cutting_edge": 2.0,
+    "cutting_rolling": 1.5,
+    "balanced_stability": 1.0,
+    "balanced_cutting_edge": 1.0,
+    "privacy": 2.0,
+    "free_software": 3.0,
+    "free_software_penalty": -15.0,
+    "battery": 2.0,
+    "windows_like": 12.0,
+    "windows_like_xfce": 6.0,
+    "desktop": 15.0,
+    "old_hw": 12.0,
+}
+# Updated in place, so modules holding a reference see new values
+COEFFICIENTS = dict(DEFAULT_COEFFICIENTS)
+
+
+def _bind_coefficients():
+    # The criteria read module-level copies (_C_<NAME>): a global load is
+    # much cheaper than a dict lookup in the per-distro loop.
+    globals().update({"_C_" + name.upper(): value for name, value in COEFFICIENTS.items()})
+
+
+_bind_coefficients()
+
+
+# ---------- Scoring criteria ----------
+# recommend() is a sum of independent criteria. Each one looks at a distro
+# and the normalized inputs (see _context) and returns the points it adds.
+_USAGE_KEYS = {
+    "gaming": "gaming",
+    "office": "office",
+    "development": "development",
+    "creative": "creative",
+}
+
+
+def _context(state, prefs) -> Dict[str, Any]:
+    """Normalize state + prefs once per call instead of once per distro."""
+    ctx = _prefs_context(prefs)
+    ctx.update({
+        "hw_score": compute_hardware_score(state),
+        "ram_gb": float(state.get("ram_total_gb") or 0),
+        "storage_free": float(state.get("storage_free_gb") or 0),
+    })
+    return ctx
+
+
+def _prefs_context(prefs) -> Dict[str, Any]:
+    usage = prefs.get("usage", "office").lower()
+    return {
+        "usage_key": _USAGE_KEYS.get(usage, "office"),
+        "gaming_serious": prefs.get("gaming_intensity", "none").lower() == "serious",
+        "visual": prefs.get("visual") == "yes",
+        "experience": prefs.get("experience", "beginner").lower(),
+        "update_pref": prefs.get("update_pref", "balanced").lower(),
+        "privacy": prefs.get("privacy") == "yes",
+        "free_software_only": prefs.get("free_software_only") == "yes",
+        "battery": prefs.get("battery_priority") == "yes",
+        "windows_like": prefs.get("windows_like") == "yes",
+        "desktop_pref": prefs.get("desktop_pref", "any").lower(),
+    }
+
+
+# Context keys that come from prefs (the rest come from hardware)
+_PREF_CONTEXT_KEYS = (
+    "usage_key", "gaming_serious", "visual", "experience", "update_pref",
+    "privacy", "free_software_only", "battery", "windows_like", "desktop_pref",
+)
+
+
+def _score_hardware(d, ctx) -> float:
+    return _hw_weight_for(d, ctx["hw_score"]) * _C_HARDWARE
+
+
+def _score_ram(d, ctx) -> float:
+    ram_gb = ctx["ram_gb"]
+    if ram_gb and ram_gb < d.min_ram_gb:
+        return _C_RAM_PENALTY
+    if ram_gb and ram_gb >= d.ideal_ram_gb:
+        return _C_RAM_IDEAL_BONUS
+    return 0.0
+
+
+def _score_storage(d, ctx) -> float:
+    storage_free = ctx["storage_free"]
+    if storage_free and storage_free < d.min_storage_gb:
+        return _C_STORAGE_PENALTY
+    return 0.0
+
+
+def _score_usage(d, ctx) -> float:
+    return getattr(d, ctx["usage_key"], 0) * _C_USAGE
+
+
+def _score_gaming(d, ctx) -> float:
+    return d.gaming * _C_GAMING_SERIOUS if ctx["gaming_serious"] else 0.0
+
+
+def _score_visual(d, ctx) -> float:
+    return d.visual_polish * _C_VISUAL if ctx["visual"] else 0.0
+
+
+def _score_experience(d, ctx) -> float:
+    exp = ctx["experience"]
+    if exp == "beginner":
+        return d.beginner * _C_BEGINNER
+    if exp == "advanced":
+        # Reward cutting-edge & free software for advanced users
+        return d.cutting_edge * _C_ADVANCED
+    return 0.0
+
+
+def _score_updates(d, ctx) -> float:
+    upd = ctx["update_pref"]
+    if upd == "stable":
+        return d.stability * _C_STABLE_STABILITY + d.lts * _C_STABLE_LTS
+    if upd == "cutting_edge":
+        return d.cutting_edge * _C_CUTTING_CUTTING_EDGE + d.rolling * _C_CUTTING_ROLLING
+    return d.stability * _C_BALANCED_STABILITY + d.cutting_edge * _C_BALANCED_CUTTING_EDGE
+
+
+def _score_privacy(d, ctx) -> float:
+    return d.privacy * _C_PRIVACY if ctx["privacy"] else 0.0
+
+
+def _score_free_software(d, ctx) -> float:
+    if not ctx["free_software_only"]:
+        return 0.0
+    score = d.free_software_purity * _C_FREE_SOFTWARE
+    if d.free_software_purity < 5:
+        score += _C_FREE_SOFTWARE_PENALTY
+    return score
+
+
+def _score_battery(d, ctx) -> float:
+    return d.battery_friendly * _C_BATTERY if ctx["battery"] else 0.0
+
+
+def _score_windows_like(d, ctx) -> float:
+    if not ctx["windows_like"]:
+        return 0.0
+    desktop = desktop_profile(d.desktop)
+    if desktop.windows_like:
+        return _C_WINDOWS_LIKE
+    if desktop.xfce:
+        return _C_WINDOWS_LIKE_XFCE
+    return 0.0
+
+
+def _score_desktop(d, ctx) -> float:
+    if desktop_matches(d.desktop, ctx["desktop_pref"]):
+        return _C_DESKTOP
+    return 0.0
+
+
+def _score_old_hw(d, ctx) -> float:
+    # Older hardware bonus
+    if ctx["hw_score"] < 30 and d.good_for_old_hw:
+        return _C_OLD_HW
+    return 0.0
+
+
+# Evaluation order matters only for pruning (see recommend_topk)
+CRITERIA = (
+    ("hardware", _score_hardware),
+    ("ram", _score_ram),
+    ("storage", _score_storage),
+    ("usage", _score_usage),
+    ("gaming", _score_gaming),
+    ("visual", _score_visual),
+    ("experience", _score_experience),
+    ("updates", _score_updates),
+    ("privacy", _score_privacy),
+    ("free_software", _score_free_software),
+    ("battery", _score_battery),
+    ("windows_like", _score_windows_like),
+    ("desktop", _score_desktop),
+    ("old_hw", _score_old_hw),
+)
+
+
+def score_distro(d, ctx) -> float:
+    if type(d) is not Distro:
+        d = _record(d)
+    score = 0.0
+    for _, fn in CRITERIA:
+        score += fn(d, ctx)
+    return score
+
+
+def _reasons(d, ctx) -> List[str]:
+    """Human-readable reasons for one distro, in the order they are scored."""
+    hw_score = ctx["hw_score"]
+    reasons = []
+
+    hw_w = _hw_weight_for(d, hw_score)
+    if hw_w >= 8:
+        reasons.append("Excellent fit for your hardware")
+    elif hw_w >= 5:
+        reasons.append("Good fit for your hardware")
+    elif hw_score < 40:
+        reasons.append("May feel sluggish on this hardware")
+
+    ram_gb = ctx["ram_gb"]
+    if ram_gb and ram_gb < d.min_ram_gb:
+        reasons.append(f"Below minimum RAM ({d['min_ram_gb']} GB)")
+
+    usage_key = ctx["usage_key"]
+    if getattr(d, usage_key, 0) >= 8:
+        reasons.append(f"Strong for {usage_key}")
+
+    if ctx["visual"] and d.visual_polish >= 9:
+        reasons.append("Polished, modern UI")
+
+    if ctx["experience"] == "beginner" and d.beginner >= 9:
+        reasons.append("Beginner-friendly")
+
+    if ctx["update_pref"] == "cutting_edge" and d.rolling >= 8:
+        reasons.append("Rolling release with latest software")
+
+    if ctx["battery"] and d.battery_friendly >= 8:
+        reasons.append("Good battery efficiency")
+
+    if ctx["windows_like"] and desktop_profile(d.desktop).windows_like:
+        reasons.append("Windows-like interface")
+
+    dp = ctx["desktop_pref"]
+    if desktop_matches(d.desktop, dp):
+        reasons.append(f"Uses preferred {dp.upper()} desktop")
+
+    return reasons
+
+
+def _result(name, d, score, ctx, reasons=True) -> Dict[str, Any]:
+    result = {
+        "name": name,
+        "score": round(score, 1),
+        "summary": d.summary,
+        "desktop": d.desktop,
+        "package_mgr": d.package_mgr,
+        "min_ram_gb": d.min_ram_gb,
+        "ideal_ram_gb": d.ideal_ram_gb,
+    }
+    if reasons:
+        result["reasons"] = _reasons(d, ctx)
+    return result
+
+
+def explain(state, prefs, name) -> List[str]:
+    """Reasons for one distro, exactly as recommend() lists them."""
+    return _reasons(_record(DISTROS[name]), _context(state, prefs))
 
 
 # Recommendation
-def recommend(state, prefs, top_n=5):
-    hw_score = compute_hardware_score(state)
-    ram_gb = float(state.get("ram_total_gb") or 0)
-    storage_free = float(state.get("storage_free_gb") or 0)
+def recommend(state, prefs, top_n=5, reasons=True):
+    """
+    Rank the catalog for one machine. With reasons=False the results carry
+    no "reasons" list; fetch it later with explain() for the items shown.
+    """
+    ctx = _context(state, prefs)
+    hw_score = ctx["hw_score"]
+    return {
+        "hardware_score": hw_score,
+        "tier": hardware_tier(hw_score),
+        "recommendations": _rank(ctx, top_n, reasons),
+    }
 
-    results = []
-    for name, d in DISTROS.items():
+
+def rank_indices(ctx, top_n) -> List[Tuple[float, int]]:
+    """
+    Ranking pass only: (rounded score, catalog index) for the top_n, best
+    first. Ties keep catalog order.
+    """
+    table = _active_ranking_table(_catalog_version)
+    if table is not None:
+        hit = table.lookup(ctx, top_n)
+        if hit is not None:
+            records = _records_at(hit)
+            return [(round(score_distro(d, ctx), 1), j) for d, j in zip(records, hit)]
+    scored = ((round(score_distro(d, ctx), 1), j) for j, d in enumerate(_iter_records()))
+    if top_n is not None and 0 <= top_n and top_n * 64 < len(DISTROS):
+        # Large catalog: a heap beats sorting everything, and scores stream
+        # in without a list of the whole catalog. nlargest with a key is
+        # documented to match sorted(..., reverse=True)[:n].
+        return heapq.nlargest(top_n, scored, key=itemgetter(0))
+    # Slicing also keeps recommend()'s behaviour for None/negative top_n
+    scored = sorted(scored, key=itemgetter(0), reverse=True)
+    return scored[:top_n]
+
+
+def _rank(ctx, top_n, reasons=True) -> List[Dict[str, Any]]:
+    ranked = rank_indices(ctx, top_n)
+    if not ranked:
+        return []
+    entries = _catalog_entries([j for _, j in ranked])
+    return [_result(name, d, score, ctx, reasons) for (score, _), (name, d) in zip(ranked, entries)]
+
+
+# ---------- Top-N with upper-bound pruning ----------
+# Representative hardware scores for the three _hw_weight_for bands, plus
+# the "older hardware" band below 30.
+def _hw_band(hw_score: int) -> int:
+    if hw_score >= 70:
+        return 80
+    if hw_score >= 40:
+        return 50
+    if hw_score >= 30:
+        return 35
+    return 0
+
+
+@lru_cache(maxsize=512)
+def _criteria_suffix_bounds(prefs_key, hw_band) -> Tuple[float, ...]:
+    """
+    remaining[i] = the most criteria i..end can still add for any distro,
+    for one prefs combination and hardware band. RAM and storage take the
+    best of their outcomes (unknown, below the minimum, above the ideal),
+    whatever the sign of their coefficients.
+    """
+    ctx = dict(zip(_PREF_CONTEXT_KEYS, prefs_key))
+    ctx["hw_score"] = hw_band
+    contexts = [
+        dict(ctx, ram_gb=ram, storage_free=free)
+        for ram in (0.0, float("-inf"), float("inf"))
+        for free in (0.0, float("-inf"))
+    ]
+    records = _records()
+    maxima = [
+        max((fn(d, c) for c in contexts for d in records), default=0.0)
+        for _, fn in CRITERIA
+    ]
+    remaining = [0.0] * (len(CRITERIA) + 1)
+    for i in range(len(CRITERIA) - 1, -1, -1):
+        remaining[i] = remaining[i + 1] + maxima[i]
+    return tuple(remaining)
+
+
+def recommend_topk(state, prefs, top_n=5, stats=None):
+    """
+    Same result as recommend(), but keeps only a bounded heap of the best
+    top_n candidates. A candidate stops being scored as soon as its partial
+    score plus the best the remaining criteria could add cannot beat the
+    current N-th best. Only the survivors get result dicts and reasons.
+
+    stats (optional dict) is updated with counters:
+    candidates, pruned, criteria_evaluated, criteria_skipped.
+    """
+    if top_n is None or top_n <= 0:
+        return recommend(state, prefs, top_n)
+    ctx = _context(state, prefs)
+    hw_score = ctx["hw_score"]
+    remaining = _criteria_suffix_bounds(
+        tuple(ctx[k] for k in _PREF_CONTEXT_KEYS), _hw_band(hw_score)
+    )
+    n_criteria = len(CRITERIA)
+    steps = list(zip(remaining, (fn for _, fn in CRITERIA)))
+
+    heap: List[Tuple[float, int]] = []  # (rounded score, -index)
+    floor = float("-inf")
+    pruned = evaluated = 0
+    for index, d in enumerate(_iter_records()):
+        full = len(heap) >= top_n
         score = 0.0
-        reasons = []
-
-        # Hardware match (weighted)
-        hw_w = _hw_weight_for(d, hw_score)
-        score += hw_w * 6.0
-        if hw_w >= 8:
-            reasons.append("Excellent fit for your hardware")
-        elif hw_w >= 5:
-            reasons.append("Good fit for your hardware")
+        for bound, fn in steps:
+            # Ties go to the earlier distro, so matching the floor is not
+            # enough. floor is already rounded, so the raw bound can be used.
+            if full and score + bound <= floor:
+                pruned += 1
+                break
+            score += fn(d, ctx)
+            evaluated += 1
         else:
-            reasons.append(
-                "May feel sluggish on this hardware" if hw_score < 40 else ""
-            )
+            entry = (round(score, 1), -index)
+            if not full:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+            if len(heap) >= top_n:
+                floor = heap[0][0]
 
-        # RAM check (penalty if below minimum)
-        if ram_gb and ram_gb < d["min_ram_gb"]:
-            score -= 30
-            reasons.append(f"Below minimum RAM ({d['min_ram_gb']} GB)")
-        elif ram_gb and ram_gb >= d["ideal_ram_gb"]:
-            score += 8
-
-        # Storage minimum
-        if storage_free and storage_free < d["min_storage_gb"]:
-            score -= 10
-
-        # Usage
-        usage = prefs.get("usage", "office").lower()
-        usage_key = {
-            "gaming": "gaming",
-            "office": "office",
-            "development": "development",
-            "creative": "creative",
-        }.get(usage, "office")
-        score += d.get(usage_key, 0) * 3
-        if d.get(usage_key, 0) >= 8:
-            reasons.append(f"Strong for {usage_key}")
-
-        # Gaming intensity
-        gi = prefs.get("gaming_intensity", "none").lower()
-        if gi == "serious":
-            score += d["gaming"] * 2
-
-        # Visual polish
-        if prefs.get("visual") == "yes":
-            score += d["visual_polish"] * 2
-            if d["visual_polish"] >= 9:
-                reasons.append("Polished, modern UI")
-
-        # Experience
-        exp = prefs.get("experience", "beginner").lower()
-        if exp == "beginner":
-            score += d["beginner"] * 2.5
-            if d["beginner"] >= 9:
-                reasons.append("Beginner-friendly")
-        elif exp == "advanced":
-            # Reward cutting-edge & free software for advanced users
-            score += d["cutting_edge"] * 1.5
-
-        # Update preference
-        upd = prefs.get("update_pref", "balanced").lower()
-        if upd == "stable":
-            score += d["stability"] * 2 + d["lts"] * 1.5
-        elif upd == "cutting_edge":
-            score += d["cutting_edge"] * 2 + d["rolling"] * 1.5
-            if d["rolling"] >= 8:
-                reasons.append("Rolling release with latest software")
-        else:
-            score += d["stability"] * 1.0 + d["cutting_edge"] * 1.0
-
-        # Privacy
-        if prefs.get("privacy") == "yes":
-            score += d["privacy"] * 2
-
-        # Free software only
-        if prefs.get("free_software_only") == "yes":
-            score += d["free_software_purity"] * 3
-            if d["free_software_purity"] < 5:
-                score -= 15
-
-        # Battery
-        if prefs.get("battery_priority") == "yes":
-            score += d["battery_friendly"] * 2
-            if d["battery_friendly"] >= 8:
-                reasons.append("Good battery efficiency")
-
-        # Windows-like
-        if prefs.get("windows_like") == "yes":
-            if d["desktop"].lower().startswith(("cinnamon", "kde", "gnome (custom)")):
-                score += 12
-                reasons.append("Windows-like interface")
-            elif d["desktop"].lower().startswith(("xfce",)):
-                score += 6
-
-        # Desktop preference
-        dp = prefs.get("desktop_pref", "any").lower()
-        if dp != "any":
-            if dp in d["desktop"].lower():
-                score += 15
-                reasons.append(f"Uses preferred {dp.upper()} desktop")
-
-        # Older hardware bonus
-        if hw_score < 30 and d["good_for_old_hw"]:
-            score += 12
-
-        results.append(
-            {
-                "name": name,
-                "score": round(score, 1),
-                "summary": d["summary"],
-                "desktop": d["desktop"],
-                "package_mgr": d["package_mgr"],
-                "reasons": [r for r in reasons if r],
-                "min_ram_gb": d["min_ram_gb"],
-                "ideal_ram_gb": d["ideal_ram_gb"],
-            }
+    if stats is not None:
+        stats["candidates"] = stats.get("candidates", 0) + len(DISTROS)
+        stats["pruned"] = stats.get("pruned", 0) + pruned
+        stats["criteria_evaluated"] = stats.get("criteria_evaluated", 0) + evaluated
+        stats["criteria_skipped"] = (
+            stats.get("criteria_skipped", 0) + len(DISTROS) * n_criteria - evaluated
         )
 
-    results.sort(key=lambda r: r["score"], reverse=True)
+    heap.sort(reverse=True)
+    results = []
+    for name, d in _catalog_entries([-i for _, i in heap]):
+        results.append(_result(name, d, score_distro(d, ctx), ctx))
     return {
         "hardware_score": hw_score,
         "tier": hardware_tier(hw_score),
-        "recommendations": results[:top_n],
+        "recommendations": results,
     }
 
 
-if __name__ == "__main__":
-    import json
+# ---------- Hard-constraint index ----------
+# The RAM/storage criteria only ask which side of a threshold the machine
+# is on. With the thresholds sorted, one bisection per threshold splits the
+# catalog into the penalized / ideal-RAM partitions, and callers only touch
+# the partition that differs from their starting row.
+_HW_WEIGHT_FIELDS = ("weight_low_hw", "weight_mid_hw", "weight_high_hw")
+
+
+class ConstraintIndex:
+    """Sorted min_ram_gb / ideal_ram_gb / min_storage_gb and hardware-weight buckets."""
+
+    def __init__(self, records):
+        def sorted_by(field):
+            pairs = sorted((getattr(d, field), j) for j, d in enumerate(records))
+            return tuple(v for v, _ in pairs), tuple(j for _, j in pairs)
+
+        self.size = len(records)
+        self.min_ram, self._min_ram_idx = sorted_by("min_ram_gb")
+        self.ideal_ram, self._ideal_ram_idx = sorted_by("ideal_ram_gb")
+        self.min_storage, self._min_storage_idx = sorted_by("min_storage_gb")
+        # weight field -> {weight: [distro indices]}, one per _hw_weight_for band
+        self.hw_buckets: Dict[str, Dict[int, List[int]]] = {}
+        for field in _HW_WEIGHT_FIELDS:
+            buckets: Dict[int, List[int]] = {}
+            for j, d in enumerate(records):
+                buckets.setdefault(getattr(d, field), []).append(j)
+            self.hw_buckets[field] = buckets
+        self.old_hw = tuple(j for j, d in enumerate(records) if d.good_for_old_hw)
+
+    def ram_penalized(self, ram_gb: float) -> Tuple[int, ...]:
+        """Distros with ram_gb < min_ram_gb."""
+        return self._min_ram_idx[bisect_right(self.min_ram, ram_gb):]
+
+    def ram_ideal(self, ram_gb: float) -> Tuple[int, ...]:
+        """Distros with ram_gb >= ideal_ram_gb (some may also be penalized)."""
+        return self._ideal_ram_idx[:bisect_right(self.ideal_ram, ram_gb)]
+
+    def ram_below_ideal(self, ram_gb: float) -> Tuple[int, ...]:
+        return self._ideal_ram_idx[bisect_right(self.ideal_ram, ram_gb):]
+
+    def storage_penalized(self, storage_free: float) -> Tuple[int, ...]:
+        """Distros with storage_free < min_storage_gb."""
+        return self._min_storage_idx[bisect_right(self.min_storage, storage_free):]
+
+    def storage_ok(self, storage_free: float) -> Tuple[int, ...]:
+        return self._min_storage_idx[:bisect_right(self.min_storage, storage_free)]
+
+    def band_buckets(self, hw_score: int) -> Dict[int, List[int]]:
+        """{weight: indices} for the _hw_weight_for band hw_score falls in."""
+        if hw_score >= 70:
+            return self.hw_buckets["weight_high_hw"]
+        if hw_score >= 40:
+            return self.hw_buckets["weight_mid_hw"]
+        return self.hw_buckets["weight_low_hw"]
+
+
+@lru_cache(maxsize=1)
+def _constraint_index(version) -> ConstraintIndex:
+    return ConstraintIndex(_records())
+
+
+def constraint_index() -> ConstraintIndex:
+    """Index over the active catalog, rebuilt after notify_catalog_changed()."""
+    return _constraint_index(_catalog_version)
+
+
+# ---------- Compiled per-prefs scorers ----------
+# For fixed prefs, every criterion except hardware/RAM/storage/old-hw is a
+# constant per distro. compile_scorer() folds those constants (and the
+# hardware-band weights) into flat tables once, so scoring a machine is a
+# table lookup plus fix-ups on the RAM/storage partitions from the
+# constraint index.
+_HARDWARE_CRITERIA = ("hardware", "ram", "storage", "old_hw")
+
+
+class CompiledScorer:
+    """Scoring function specialized for one prefs combination."""
+
+    def __init__(self, prefs_ctx: Dict[str, Any]):
+        self.prefs_ctx = prefs_ctx
+        self.names = list(DISTROS.keys())
+        records = _records()
+        pref_fns = [fn for name, fn in CRITERIA if name not in _HARDWARE_CRITERIA]
+        const = [sum(fn(d, prefs_ctx) for fn in pref_fns) for d in records]
+        # One base row per hardware band (see _hw_band): low+old, low, mid, high.
+        # Hardware points are added per weight bucket, the old-hardware bonus
+        # to the good_for_old_hw partition.
+        self._index = index = constraint_index()
+        c = COEFFICIENTS
+        self._ram_penalty = c["ram_penalty"]
+        self._ram_ideal_bonus = c["ram_ideal_bonus"]
+        self._storage_penalty = c["storage_penalty"]
+        self._bases = {}
+        for band in (0, 35, 50, 80):
+            row = list(const)
+            for weight, members in index.band_buckets(band).items():
+                points = weight * c["hardware"]
+                for j in members:
+                    row[j] += points
+            if band < 30:
+                for j in index.old_hw:
+                    row[j] += c["old_hw"]
+            self._bases[band] = row
+        self._ideal_bases: Dict[int, List[float]] = {}
+
+    def scores(self, hw_score: int, ram_gb: float, storage_free: float) -> List[float]:
+        """Raw scores for every distro, in catalog order."""
+        band = _hw_band(hw_score)
+        base = self._bases[band]
+        index = self._index
+        if ram_gb:
+            # Start from whichever row (plain or with the ideal-RAM bonus)
+            # already matches the larger partition, then fix up the smaller one.
+            bonus = self._ram_ideal_bonus
+            ideal = index.ram_ideal(ram_gb)
+            if len(ideal) * 2 > len(base):
+                out = list(self._ideal_base(band))
+                for j in index.ram_below_ideal(ram_gb):
+                    out[j] -= bonus
+            else:
+                out = list(base)
+                for j in ideal:
+                    out[j] += bonus
+            penalty = self._ram_penalty
+            for j in index.ram_penalized(ram_gb):
+                out[j] = base[j] + penalty
+        else:
+            out = list(base)
+        if storage_free:
+            penalty = self._storage_penalty
+            penalized = index.storage_penalized(storage_free)
+            if len(penalized) * 2 > len(out):
+                out = [s + penalty for s in out]
+                for j in index.storage_ok(storage_free):
+                    out[j] -= penalty
+            else:
+                for j in penalized:
+                    out[j] += penalty
+        return out
+
+    def _ideal_base(self, band: int) -> List[float]:
+        row = self._ideal_bases.get(band)
+        if row is None:
+            bonus = self._ram_ideal_bonus
+            row = self._ideal_bases[band] = [b + bonus for b in self._bases[band]]
+        return row
+
+    def recommend(self, state, top_n=5):
+        ctx = dict(self.prefs_ctx)
+        ctx.update({
+            "hw_score": compute_hardware_score(state),
+            "ram_gb": float(state.get("ram_total_gb") or 0),
+            "storage_free": float(state.get("storage_free_gb") or 0),
+        })
+        scores = self.scores(ctx["hw_score"], ctx["ram_gb"], ctx["storage_free"])
+        order = sorted(range(len(scores)), key=lambda i: round(scores[i], 1), reverse=True)
+        results = []
+        for i in order[:top_n]:
+            name = self.names[i]
+            results.append(_result(name, _record(DISTROS[name]), scores[i], ctx))
+        return {
+            "hardware_score": ctx["hw_score"],
+            "tier": hardware_tier(ctx["hw_score"]),
+            "recommendations": results,
+        }
+
+
+@lru_cache(maxsize=128)
+def _compiled_scorer(prefs_key, version) -> CompiledScorer:
+    return CompiledScorer(dict(zip(_PREF_CONTEXT_KEYS, prefs_key)))
+
+
+def compile_scorer(prefs) -> CompiledScorer:
+    """Compiled scorer for prefs, cached by the normalized prefs."""
+    ctx = _prefs_context(prefs)
+    return _compiled_scorer(tuple(ctx[k] for k in _PREF_CONTEXT_KEYS), _catalog_version)
+
+
+def recommend_compiled(state, prefs, top_n=5):
+    """Same result as recommend(), through a cached compiled scorer."""
+    return compile_scorer(prefs).recommend(state, top_n)
+
+
+# ---------- Provisional ranking (probes still running) ----------
+# While probes are running, some state fields are not known yet.
+# score_bounds() gives every distro the lowest and highest score it can
+# still end up with, over every value the missing fields could take.
+# recommend_provisional() ranks by the middle of that range and reports the
+# best and worst rank each pick can still reach. With nothing pending it
+# ranks exactly like recommend().
+PROBE_FIELDS = {
+    "cpu": ("cpu_score",),
+    "ram": ("ram_total_gb",),
+    "gpu": ("gpu_cat",),
+    "storage": ("storage_cat", "storage_free_gb"),
+    "battery": (),
+}
+
+
+def pending_fields(probes) -> Tuple[str, ...]:
+    """State fields still unknown while the named probes (PROBE_FIELDS keys) run."""
+    return tuple(sorted({f for p in probes for f in PROBE_FIELDS[p]}))
+
+
+def _ram_candidates(state, unknown) -> List[float]:
+    """
+    One RAM value per region between thresholds the scoring branches on
+    (compute_hardware_score buckets, catalog min/ideal RAM). 0 stands for
+    a RAM probe that fails.
+    """
+    if "ram_total_gb" not in unknown:
+        return [float(state.get("ram_total_gb") or 0)]
+    index = constraint_index()
+    edges = sorted({2.0, 4.0, 8.0, 16.0, 32.0} | set(index.min_ram) | set(index.ideal_ram))
+    edges = [e for e in edges if e > 0]
+    return [0.0, edges[0] / 2] + edges if edges else [0.0, 1.0]
+
+
+def _reachable_hw_scores(state, unknown, ram_gb: float) -> set:
+    """Hardware scores the machine can still end up with, for one RAM value."""
+    cpus = (0, 100) if "cpu_score" in unknown else (state.get("cpu_score") or 0,)
+    gpus = tuple(_GPU_SCORES) if "gpu_cat" in unknown else (state.get("gpu_cat"),)
+    disks = tuple(_STORAGE_SCORES) if "storage_cat" in unknown else (state.get("storage_cat"),)
+    reachable = set()
+    for gpu in gpus:
+        for disk in disks:
+            scores = [
+                compute_hardware_score(
+                    {"cpu_score": cpu, "gpu_cat": gpu, "ram_total_gb": ram_gb, "storage_cat": disk}
+                )
+                for cpu in cpus
+            ]
+            # One CPU point moves the total by 0.3, so every score in between occurs
+            reachable.update(range(min(scores), max(scores) + 1))
+    return reachable
+
+
+def score_bounds(state, prefs, unknown=()) -> Tuple[List[float], List[float]]:
+    """
+    (low, high) score per distro, in catalog order, over every value the
+    unknown state fields (see PROBE_FIELDS) could still take.
+    """
+    unknown = set(unknown)
+    scorer = compile_scorer(prefs)
+    free = 0.0 if "storage_free_gb" in unknown else float(state.get("storage_free_gb") or 0)
+    low = high = None
+    for ram in _ram_candidates(state, unknown):
+        for band in {_hw_band(h) for h in _reachable_hw_scores(state, unknown, ram)}:
+            row = scorer.scores(band, ram, free)
+            if low is None:
+                low, high = list(row), list(row)
+                continue
+            for j, v in enumerate(row):
+                if v < low[j]:
+                    low[j] = v
+                elif v > high[j]:
+                    high[j] = v
+    if "storage_free_gb" in unknown:
+        # Any free space below a distro's minimum is possible, and so is none
+        # reported at all (no penalty)
+        penalty = COEFFICIENTS["storage_penalty"]
+        for j, d in enumerate(_records()):
+            if d.min_storage_gb > 0:
+                low[j] += min(0.0, penalty)
+                high[j] += max(0.0, penalty)
+    return low, high
+
+
+def _rank_range(j, low, high) -> Tuple[int, int]:
+    """Best and worst 1-based rank distro j can still reach; ties go to the earlier distro."""
+    best = worst = 1
+    for o in range(len(low)):
+        if o == j:
+            continue
+        if low[o] > high[j] or (low[o] == high[j] and o < j):
+            best += 1
+        if high[o] > low[j] or (high[o] == low[j] and o < j):
+            worst += 1
+    return best, worst
+
+
+def recommend_provisional(state, prefs, top_n=5, pending=()):
+    """
+    Ranking while the probes named in pending (PROBE_FIELDS keys) have not
+    reported yet. Each recommendation carries score (the middle of its
+    range), score_low / score_high and rank_best / rank_worst;
+    hardware_score_range bounds the final hardware score. "final" is True
+    once nothing is pending; the ranking then equals recommend().
+    """
+    unknown = pending_fields(pending)
+    ctx = _context(state, prefs)
+    low, high = score_bounds(state, prefs, unknown)
+    mid = [round((lo + hi) / 2, 1) for lo, hi in zip(low, high)]
+    order = sorted(range(len(mid)), key=mid.__getitem__, reverse=True)[:top_n]
+    results = []
+    for j, (name, d) in zip(order, _catalog_entries(order)):
+        entry = _result(name, d, mid[j], ctx, reasons=False)
+        best, worst = _rank_range(j, low, high)
+        entry.update({
+            "score_low": round(low[j], 1),
+            "score_high": round(high[j], 1),
+            "rank_best": best,
+            "rank_worst": worst,
+        })
+        results.append(entry)
+    reachable = set()
+    for ram in _ram_candidates(state, unknown):
+        reachable |= _reachable_hw_scores(state, unknown, ram)
+    return {
+        "hardware_score": ctx["hw_score"],
+        "tier": hardware_tier(ctx["hw_score"]),
+        "hardware_score_range": [min(reachable), max(reachable)],
+        "pending": sorted(pending),
+        "final": not unknown,
+        "recommendations": results,
+    }
+
+
+# ---------- Memoization ----------
+# Most machines land in a handful of RAM/GPU/storage buckets, so rankings
+# repeat a lot. The cache key holds only what the criteria branch on:
+# the hardware band, where RAM/storage sit relative to the catalog's
+# min/ideal thresholds, and the normalized prefs.
+_catalog_version = 0
+
+
+def notify_catalog_changed():
+    """
+    Call after editing DISTROS in place. Drops everything derived from the
+    catalog (pruning bounds, thresholds, cached rankings).
+    """
+    global _catalog_version
+    _catalog_version += 1
+    _criteria_suffix_bounds.cache_clear()
+    _constraint_index.cache_clear()
+    _compiled_scorer.cache_clear()
+
+
+def use_coefficients(coefficients):
+    """
+    Replace scoring coefficients (names from DEFAULT_COEFFICIENTS; missing
+    ones go back to their defaults) and drop everything derived from them.
+    """
+    unknown = set(coefficients) - set(DEFAULT_COEFFICIENTS)
+    if unknown:
+        raise ValueError(f"unknown coefficients: {sorted(unknown)}")
+    merged = dict(DEFAULT_COEFFICIENTS)
+    for name, value in coefficients.items():
+        value = float(value)
+        if value * 2 != int(value * 2):
+            raise ValueError(f"{name}: {value} is not a multiple of 0.5")
+        merged[name] = value
+    COEFFICIENTS.clear()
+    COEFFICIENTS.update(merged)
+    _bind_coefficients()
+    notify_catalog_changed()
+
 
-    state = {
+def load_coefficients(path: str) -> Dict[str, float]:
+    """Load a coefficients file written by weight_calibration.py."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    use_coefficients(data.get("coefficients", data))
+    return dict(COEFFICIENTS)
+
+
+def get_catalog():
+    """The active catalog (DISTROS unless load_catalog()/use_catalog() replaced it)."""
+    return DISTROS
+
+
+def catalog_version() -> int:
+    return _catalog_version
+
+
+def use_catalog(catalog):
+    """
+    Make a name -> fields mapping the active catalog. A dict catalog is
+    converted to Distro records (compact_catalog, variant entries expanded);
+    a MappedCatalog or VariantCatalog is used as is.
+    """
+    global DISTROS
+    DISTROS = compact_catalog(expand_variants(catalog)) if isinstance(catalog, dict) else catalog
+    notify_catalog_changed()
+
+
+def load_catalog(path: str):
+    """
+    Map a catalog file built by distro_catalog.py and make it active. A .json
+    path is read as a variant spec and expanded lazily (distro_variants).
+    """
+    if path.endswith(".json"):
+        from distro_variants import VariantCatalog
+
+        catalog = VariantCatalog.from_file(path)
+    else:
+        from distro_catalog import open_catalog
+
+        catalog = open_catalog(path)
+    use_catalog(catalog)
+    return catalog
+
+
+# ---------- Precomputed rankings ----------
+# A table built by ranking_table.py answers rank_indices() with a lookup
+# while it matches the active catalog and coefficients; anything it does
+# not cover is scored live.
+_ranking_table = None
+
+
+def use_ranking_table(table):
+    """Make a RankingTable (or None) the one rank_indices() consults."""
+    global _ranking_table
+    _ranking_table = table
+    _active_ranking_table.cache_clear()
+
+
+def load_ranking_table(path: str):
+    """Map a table file built by ranking_table.py and use it."""
+    from ranking_table import open_table
+
+    table = open_table(path)
+    use_ranking_table(table)
+    return table
+
+
+def get_ranking_table():
+    """The table rank_indices() consults (None unless one was loaded)."""
+    return _ranking_table
+
+
+def configure(catalog: Optional[str] = None, coefficients: Optional[Dict[str, float]] = None,
+              table: Optional[str] = None):
+    """
+    Activate a catalog file, coefficients and a ranking table file, skipping
+    any already active. The batch workers and the server are handed what the
+    CLI loaded and apply it here, in the module they actually import.
+    """
+    if catalog and getattr(DISTROS, "path", None) != catalog:
+        load_catalog(catalog)
+    if coefficients is not None and coefficients != COEFFICIENTS:
+        use_coefficients(coefficients)
+    if table and getattr(_ranking_table, "path", None) != table:
+        load_ranking_table(table)
+
+
+@lru_cache(maxsize=1)
+def _active_ranking_table(version):
+    table = _ranking_table
+    if table is None or not table.matches(DISTROS, COEFFICIENTS):
+        return None
+    return table
+
+
+def _profile_key(ctx, top_n) -> tuple:
+    index = constraint_index()
+    mins, ideals, storage_mins = index.min_ram, index.ideal_ram, index.min_storage
+    ram_gb = ctx["ram_gb"]
+    free = ctx["storage_free"]
+    # bisect_right(x, v) = how many thresholds are <= v; two values with the
+    # same count fall on the same side of every threshold.
+    ram_pos = (bisect_right(mins, ram_gb), bisect_right(ideals, ram_gb)) if ram_gb else None
+    storage_pos = bisect_right(storage_mins, free) if free else None
+    return (
+        _hw_band(ctx["hw_score"]),
+        ram_pos,
+        storage_pos,
+        tuple(ctx[k] for k in _PREF_CONTEXT_KEYS),
+        top_n,
+    )
+
+
+def _copy_results(recs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Callers may edit results; never hand out the cached objects
+    return [dict(r, reasons=list(r["reasons"])) if "reasons" in r else dict(r) for r in recs]
+
+
+class RecommendCache:
+    """
+    LRU cache in front of recommend(). Only the ranking is cached; the exact
+    hardware score and tier are recomputed per call.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[tuple, List[Dict[str, Any]]]" = OrderedDict()
+        self._shape = None
+        self._version = _catalog_version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _check_catalog(self):
+        # Adding/removing distros (or swapping the dict) is caught here;
+        # in-place edits of an entry need notify_catalog_changed().
+        shape = (id(DISTROS), len(DISTROS))
+        if self._shape is not None and shape != self._shape:
+            notify_catalog_changed()
+        self._shape = shape
+        if self._version != _catalog_version:
+            self._data.clear()
+            self._version = _catalog_version
+
+    def key(self, ctx, top_n=5, reasons=True) -> tuple:
+        """Cache key for a _context() dict; profiles with equal keys rank identically."""
+        self._check_catalog()
+        return _profile_key(ctx, top_n) + (reasons,)
+
+    def get(self, key) -> "List[Dict[str, Any]] | None":
+        """Copy of the cached ranking for key, or None (counted as a miss)."""
+        recs = self._data.get(key)
+        if recs is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._data.move_to_end(key)
+        return _copy_results(recs)
+
+    def put(self, key, recs: List[Dict[str, Any]]):
+        if self.maxsize <= 0:
+            return
+        self._data[key] = _copy_results(recs)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def recommend(self, state, prefs, top_n=5, reasons=True):
+        ctx = _context(state, prefs)
+        hw_score = ctx["hw_score"]
+        key = self.key(ctx, top_n, reasons)
+        recs = self.get(key)
+        if recs is None:
+            recs = _rank(ctx, top_n, reasons)
+            self.put(key, recs)
+        return {
+            "hardware_score": hw_score,
+            "tier": hardware_tier(hw_score),
+            "recommendations": recs,
+        }
+
+    def resize(self, maxsize: int):
+        self.maxsize = maxsize
+        while len(self._data) > max(0, maxsize):
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self):
+        self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+recommend_cache = RecommendCache()
+
+
+def recommend_cached(state, prefs, top_n=5, reasons=True):
+    """recommend() through the shared recommend_cache."""
+    return recommend_cache.recommend(state, prefs, top_n, reasons)
+
+
+def prefs_from_state(s) -> Dict[str, str]:
+    """
+    Build the prefs dict recommend() expects from the app state
+    (answers that were never given fall back to the questionnaire defaults).
+    """
+    return {
+        "usage": s.get("usage") or "office",
+        "visual": s.get("visual") or "no",
+        "experience": s.get("experience") or "beginner",
+        "update_pref": s.get("update_pref") or "balanced",
+        "privacy": s.get("privacy") or "no",
+        "free_software_only": s.get("free_software_only") or "no",
+        "battery_priority": s.get("battery_priority") or "no",
+        "windows_like": s.get("windows_like") or "no",
+        "gaming_intensity": s.get("gaming_intensity") or "none",
+        "desktop_pref": (s.get("desktop_pref") or "any").lower(),
+    }
+
+
+def _demo(state=None):
+    state = state or {
         "cpu_score": 65,
         "gpu_cat": "mid",
         "ram_total_gb": 8,
@@ -662,3 +1655,111 @@ if __name__ == "__main__":
         "desktop_pref": "any",
     }
     print(json.dumps(recommend(state, prefs), indent=2))
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="recommender_engine",
+        description="Rank Linux distributions for a hardware profile.",
+    )
+    sub = parser.add_subparsers(dest="command")
+
+    batch = sub.add_parser(
+        "batch",
+        help="score newline-delimited JSON profiles",
+        description=(
+            "Read JSONL records ({\"id\", \"state\", \"prefs\"} or a flat app "
+            "state with the answers inside) and write one JSON result per line, "
+            "in input order."
+        ),
+    )
+    batch.add_argument("input", nargs="?", default="-", help="JSONL file (default: stdin)")
+    batch.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    batch.add_argument("--top", type=int, default=5, help="recommendations per record")
+    batch.add_argument("--chunk-size", type=int, default=2000, help="records per work item")
+    batch.add_argument("--workers", type=int, default=0,
+                       help="worker processes (0 = one per core, 1 = no pool)")
+    batch.add_argument("--reasons", action="store_true",
+                       help="include the reasons for each emitted recommendation")
+
+    serve = sub.add_parser(
+        "serve",
+        help="answer POST /recommend over local HTTP",
+        description="Local recommendation service with request micro-batching and /metrics.",
+    )
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--window-ms", type=float, default=2.0,
+                       help="how long to collect requests into one scoring batch")
+    serve.add_argument("--max-batch", type=int, default=256, help="flush a batch at this many requests")
+    serve.add_argument("--cache-size", type=int, default=4096, help="cached rankings")
+    parser.add_argument("--catalog", help="catalog file built by distro_catalog.py")
+    parser.add_argument("--table", help="precomputed rankings built by ranking_table.py")
+    parser.add_argument("--coefficients", help="scoring coefficients from weight_calibration.py")
+    parser.add_argument("--probe", action="store_true",
+                        help="rank for this machine (runs the hardware probes) instead of the demo profile")
+
+    args = parser.parse_args(argv)
+    if args.catalog:
+        load_catalog(args.catalog)
+    if args.coefficients:
+        load_coefficients(args.coefficients)
+    if args.table:
+        load_ranking_table(args.table)
+    if args.command == "batch":
+        import sys
+
+        from recommender_batch import stream_recommendations
+
+        src = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+        dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+        try:
+            stream_recommendations(
+                src, dst,
+                top_n=args.top,
+                chunk_size=args.chunk_size,
+                workers=args.workers or None,
+                catalog=args.catalog,
+                coefficients=dict(COEFFICIENTS),
+                table=args.table,
+                reasons=args.reasons,
+            )
+        except BrokenPipeError:
+            # The reader went away (| head): stop quietly, and keep the
+            # interpreter's final flush of stdout from failing again
+            import os
+
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return 1
+        finally:
+            if src is not sys.stdin:
+                src.close()
+            if dst is not sys.stdout:
+                dst.close()
+        return 0
+
+    if args.command == "serve":
+        from recommender_server import serve as run_server
+
+        run_server(args.host, args.port, args.window_ms, args.max_batch, args.cache_size,
+                   catalog=args.catalog, coefficients=dict(COEFFICIENTS), table=args.table)
+        return 0
+
+    state = None
+    if args.probe:
+        from probe_orchestrator import probe_all
+
+        state = probe_all().state
+    _demo(state)
+    return 0
+
+
+if __name__ == "__main__":
+    # Run main() in the importable module: under `python -m` this file is
+    # __main__, a second copy whose globals recommender_batch and
+    # recommender_server (which import recommender_engine) never see.
+    import recommender_engine
+
+    raise SystemExit(recommender_engine.main())
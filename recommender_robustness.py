@@ -0,0 +1,204 @@
+# recommender_robustness.py
+# How much does a ranking depend on what the probes could not see?
+#
+# Probes often come back partial: gpu_cat "unknown", storage_cat "mid" (the
+# storage probe's fallback when it cannot tell the drive type), max_ghz 0
+# in VMs, RAM or free space missing. recommend() ranks as if those inputs
+# were exact. robustness() instead draws plausible hardware states for the
+# uncertain fields, scores every sample in one vectorized batch and reports
+# each recommended distro's expected rank and how often it stays in the
+# top N. Recommendations that drop out too often are marked fragile.
+#
+#   robustness(state, prefs, samples=10000, top_n=5)
+#
+# Scores only depend on the hardware band, RAM and free space, so the
+# samples collapse to a few distinct profiles before scoring; ten thousand
+# samples cost a few milliseconds.
+
+from typing import Any, Dict, List, Optional, Sequence
+
+from recommender_batch import (
+    _hardware_scores_from_columns,
+    _require_numpy,
+    compile_catalog,
+    encode_columns,
+    np,
+    prefs_codes,
+    score_profiles,
+    state_columns,
+    top_n_indices,
+)
+from recommender_engine import _GPU_SCORES, _STORAGE_SCORES, _context, rank_indices
+from cpu_probe import _score_cpu
+
+# ---------- Priors for fields the probes could not measure ----------
+# (value, weight) pairs; weights need not sum to 1.
+GPU_PRIOR = (("nogpu", 1), ("weak", 4), ("mid", 3), ("strong", 2))
+# "mid" is what storage_probe reports when it cannot classify the drive
+STORAGE_PRIOR = (("low", 3), ("fast", 4), ("high", 3))
+RAM_PRIOR_GB = ((2, 1), (4, 2), (8, 4), (16, 3), (32, 1))
+FREE_PRIOR_GB = ((10, 1), (25, 2), (60, 3), (150, 3), (400, 1))
+CPU_SCORE_RANGE = (15, 85)    # no CPU probe result at all
+CPU_GHZ_RANGE = (1.6, 4.8)    # model known, clock unknown (max_ghz 0)
+
+FRAGILE_SHARE = 0.8           # below this share of samples in the top N
+CONTENDER_SHARE = 0.05        # non-recommended distros reported from this share
+
+
+def uncertain_fields(state: Dict[str, Any]) -> List[str]:
+    """State fields robustness() will sample instead of trusting."""
+    out = []
+    if state.get("cpu_score") is None:
+        out.append("cpu_score")
+    elif not state.get("max_ghz") and state.get("cpu_model"):
+        out.append("max_ghz")
+    if (state.get("gpu_cat") or "unknown").lower() == "unknown":
+        out.append("gpu_cat")
+    if (state.get("storage_cat") or "unknown").lower() in ("unknown", "mid"):
+        out.append("storage_cat")
+    if not state.get("ram_total_gb"):
+        out.append("ram_total_gb")
+    if not state.get("storage_free_gb"):
+        out.append("storage_free_gb")
+    return out
+
+
+def _draw(rng, prior, n):
+    values, weights = zip(*prior)
+    p = np.asarray(weights, dtype=np.float64)
+    return np.asarray(values)[rng.choice(len(values), size=n, p=p / p.sum())]
+
+
+def sample_columns(state: Dict[str, Any], n: int, seed: Optional[int] = 0,
+                   fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    n plausible hardware states around state, as state_columns() output.
+    Fields not listed (default: uncertain_fields(state)) keep their value.
+    """
+    _require_numpy()
+    rng = np.random.default_rng(seed)
+    fields = uncertain_fields(state) if fields is None else fields
+    cols = {k: np.repeat(v, n) for k, v in state_columns([state]).items()}
+
+    if "cpu_score" in fields:
+        lo, hi = CPU_SCORE_RANGE
+        cols["cpu_score"] = rng.integers(lo, hi + 1, size=n).astype(np.float64)
+    elif "max_ghz" in fields:
+        # Score each candidate clock with the probe's own formula
+        lo, hi = CPU_GHZ_RANGE
+        clocks = np.round(np.arange(lo, hi + 0.05, 0.1), 1)
+        table = np.array([
+            _score_cpu(state.get("cpu_model") or "", float(ghz),
+                       int(state.get("cores") or 1), int(state.get("threads") or 1))
+            for ghz in clocks
+        ], dtype=np.float64)
+        cols["cpu_score"] = table[rng.integers(0, len(clocks), size=n)]
+    if "gpu_cat" in fields:
+        cols["gpu_score"] = _draw(rng, [(_GPU_SCORES[c], w) for c, w in GPU_PRIOR], n).astype(np.float64)
+    if "storage_cat" in fields:
+        cols["storage_score"] = _draw(rng, [(_STORAGE_SCORES[c], w) for c, w in STORAGE_PRIOR],
+                                      n).astype(np.float64)
+    if "ram_total_gb" in fields:
+        cols["ram_total_gb"] = _draw(rng, RAM_PRIOR_GB, n).astype(np.float64)
+    if "storage_free_gb" in fields:
+        cols["storage_free_gb"] = _draw(rng, FREE_PRIOR_GB, n).astype(np.float64)
+    return cols
+
+
+def _ranks(scores, columns: Sequence[int]):
+    """(U x len(columns)) 0-based ranks, ties in catalog order like recommend()."""
+    out = np.empty((scores.shape[0], len(columns)), dtype=np.int64)
+    order = np.arange(scores.shape[1])
+    for i, j in enumerate(columns):
+        s = scores[:, j:j + 1]
+        out[:, i] = (scores > s).sum(axis=1) + ((scores == s) & (order < j)).sum(axis=1)
+    return out
+
+
+def robustness(state: Dict[str, Any], prefs: Dict[str, Any], samples: int = 10000,
+               top_n: int = 5, seed: Optional[int] = 0,
+               fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    Rank stability of recommend(state, prefs, top_n) under sampled hardware.
+
+    Returns {samples, uncertain, hardware_score, hardware_score_range
+    (10th-90th percentile of the sampled scores, widened to include
+    hardware_score), recommendations, contenders}. Each
+    recommendation carries name, score, rank (as recommend() ranks it),
+    expected_rank, rank_std, top_share (share of samples where it stays in
+    the top_n) and fragile. Contenders are other distros that reach the
+    top_n in at least CONTENDER_SHARE of the samples.
+    """
+    _require_numpy()
+    catalog = compile_catalog()
+    fields = uncertain_fields(state) if fields is None else list(fields)
+    cols = sample_columns(state, samples, seed, fields)
+    hw = _hardware_scores_from_columns(
+        cols["cpu_score"], cols["gpu_score"], cols["ram_total_gb"], cols["storage_score"]
+    )
+
+    # Collapse to distinct (hardware band, RAM, free space) profiles
+    band = (hw >= 30).astype(np.float64) + (hw >= 40) + (hw >= 70)
+    key = np.stack([band, cols["ram_total_gb"], cols["storage_free_gb"]], axis=1)
+    _, first, counts = np.unique(key, axis=0, return_index=True, return_counts=True)
+    _, keys = prefs_codes([prefs])
+    distinct = {k: v[first] for k, v in cols.items()}
+    enc = encode_columns(distinct, np.zeros(len(first), dtype=np.intp), keys)
+    scores = score_profiles(catalog, enc)
+    weights = counts / float(samples)
+
+    ctx = _context(state, prefs)
+    nominal = rank_indices(ctx, top_n)
+    top_idx, _ = top_n_indices(scores, top_n)
+    hits = np.zeros(len(catalog), dtype=np.float64)
+    np.add.at(hits, top_idx.ravel(), np.repeat(weights, top_idx.shape[1]))
+    chosen = [j for _, j in nominal]
+    others = [int(j) for j in np.flatnonzero(hits >= CONTENDER_SHARE) if j not in set(chosen)]
+
+    ranks = _ranks(scores, chosen + others)
+    mean = weights @ ranks
+    std = np.sqrt(np.maximum(weights @ (ranks * ranks) - mean * mean, 0.0))
+
+    def entry(i, j):
+        return {
+            "name": catalog.names[j],
+            "expected_rank": round(float(mean[i]) + 1, 2),
+            "rank_std": round(float(std[i]), 2),
+            "top_share": round(float(hits[j]), 3),
+        }
+
+    recs = []
+    for i, (score, j) in enumerate(nominal):
+        e = entry(i, j)
+        e.update({"score": score, "rank": i + 1, "fragile": bool(hits[j] < FRAGILE_SHARE)})
+        recs.append(e)
+    contenders = [entry(len(chosen) + i, j) for i, j in enumerate(others)]
+    contenders.sort(key=lambda e: (e["expected_rank"], -e["top_share"]))
+    # The nominal state scores "unknown" as itself, which no sample does
+    p10, p90 = np.percentile(hw, [10, 90])
+    nominal_hw = ctx["hw_score"]
+    return {
+        "samples": samples,
+        "uncertain": fields,
+        "hardware_score": nominal_hw,
+        "hardware_score_range": [min(int(p10), nominal_hw), max(int(p90), nominal_hw)],
+        "recommendations": recs,
+        "contenders": contenders,
+    }
+
+
+if __name__ == "__main__":
+    import json
+    import time
+
+    # A VM: no clock, unknown GPU, drive type not detected
+    state = {
+        "cpu_model": "Intel(R) Core(TM) i5-8250U CPU", "cpu_score": 45, "max_ghz": 0.0,
+        "cores": 4, "threads": 8, "gpu_cat": "unknown", "ram_total_gb": 8,
+        "storage_cat": "mid", "storage_free_gb": 40,
+    }
+    prefs = {"usage": "office", "experience": "beginner", "windows_like": "yes"}
+    t0 = time.perf_counter()
+    report = robustness(state, prefs, samples=10000, top_n=5)
+    report["elapsed_ms"] = round((time.perf_counter() - t0) * 1e3, 2)
+    print(json.dumps(report, indent=2))
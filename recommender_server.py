@@ -0,0 +1,424 @@
+# recommender_server.py
+# Local HTTP service so kiosks can ask one box for rankings.
+#
+#   python -m recommender_engine serve --port 8765
+#   curl -s localhost:8765/recommend -d '{"state": {...}, "prefs": {...}}'
+#   curl -s localhost:8765/metrics
+#
+# Plain asyncio + stdlib HTTP/1.1 (keep-alive, Content-Length bodies).
+# Requests that miss the cache and arrive within --window-ms of each other
+# are scored together in one batched call (recommender_batch when numpy is
+# installed, recommend() per profile otherwise).
+
+import asyncio
+import json
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from recommender_engine import (
+    RecommendCache,
+    _context,
+    _catalog_entries,
+    _rank,
+    _result,
+    configure,
+    constraint_index,
+    get_catalog,
+    hardware_tier,
+    prefs_from_state,
+)
+
+try:
+    from recommender_batch import compile_catalog, np, recommend_batch
+except Exception:
+    np = None
+
+MAX_BODY = 1 << 20
+MAX_TOP_N = 50
+# Upper bounds in seconds, Prometheus style
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 500: "Internal Server Error",
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# ---------- Metrics ----------
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.n += 1
+
+    def lines(self, name: str, labels: str = "") -> List[str]:
+        sep = "," if labels else ""
+        out, running = [], 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            running += count
+            out.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {running}')
+        out.append(f"{name}_sum{{{labels}}} {self.total:.6f}" if labels else f"{name}_sum {self.total:.6f}")
+        out.append(f"{name}_count{{{labels}}} {self.n}" if labels else f"{name}_count {self.n}")
+        return out
+
+
+class Metrics:
+    def __init__(self):
+        self.latency: Dict[str, Histogram] = {}
+        self.responses: Dict[Tuple[str, int], int] = {}
+        self.batch_size = Histogram(BATCH_BUCKETS)
+        self.batch_seconds = Histogram(LATENCY_BUCKETS)
+        self.started = time.time()
+
+    def request(self, path: str, status: int, seconds: float):
+        self.latency.setdefault(path, Histogram(LATENCY_BUCKETS)).observe(seconds)
+        self.responses[(path, status)] = self.responses.get((path, status), 0) + 1
+
+    def render(self, cache: RecommendCache) -> str:
+        lines = ["# TYPE recommender_request_seconds histogram"]
+        for path, hist in sorted(self.latency.items()):
+            lines += hist.lines("recommender_request_seconds", f'path="{path}"')
+        lines.append("# TYPE recommender_responses_total counter")
+        for (path, status), n in sorted(self.responses.items()):
+            lines.append(f'recommender_responses_total{{path="{path}",status="{status}"}} {n}')
+        lines.append("# TYPE recommender_batch_size histogram")
+        lines += self.batch_size.lines("recommender_batch_size")
+        lines.append("# TYPE recommender_batch_seconds histogram")
+        lines += self.batch_seconds.lines("recommender_batch_seconds")
+        stats = cache.stats()
+        for key in ("hits", "misses", "evictions"):
+            lines.append(f"# TYPE recommender_cache_{key}_total counter")
+            lines.append(f"recommender_cache_{key}_total {stats[key]}")
+        lines.append(f"recommender_cache_size {stats['size']}")
+        lines.append(f"recommender_catalog_distros {len(get_catalog())}")
+        lines.append(f"recommender_uptime_seconds {time.time() - self.started:.1f}")
+        return "\n".join(lines) + "\n"
+
+
+# ---------- Scoring ----------
+def _score_one(item: tuple):
+    ctx, _, _, top_n, reasons = item
+    try:
+        return _rank(ctx, top_n, reasons)
+    except Exception as e:
+        return e
+
+
+def score_requests(items: List[tuple]) -> List[Any]:
+    """
+    Rankings for many (ctx, state, prefs, top_n, reasons) items in one call. Same
+    results as recommend() for each item. An item that fails gets its exception
+    in place of a ranking, so it cannot fail the rest of the batch.
+    """
+    if np is None or len(items) == 1:
+        return [_score_one(item) for item in items]
+    states = [item[1] for item in items]
+    prefs_list = [item[2] for item in items]
+    k = max(item[3] for item in items)
+    try:
+        res = recommend_batch(states, prefs_list, top_n=k)
+    except Exception:
+        # Some profile broke the batched call: find it by scoring one by one
+        return [_score_one(item) for item in items]
+    top_idx = res["top_idx"].tolist()
+    # Only the distros some item returns, not the whole catalog
+    needed = sorted({j for item, idx in zip(items, top_idx) for j in idx[:item[3]]})
+    entries = dict(zip(needed, _catalog_entries(needed)))
+    out: List[Any] = []
+    for (ctx, _, _, top_n, reasons), idx, sc in zip(items, top_idx, res["top_scores"].tolist()):
+        try:
+            out.append([
+                _result(*entries[j], s, ctx, reasons)
+                for j, s in zip(idx[:top_n], sc[:top_n])
+            ])
+        except Exception as e:
+            out.append(e)
+    return out
+
+
+class MicroBatcher:
+    """
+    Collects submissions for up to `window` seconds (or max_batch items) and
+    scores them with one score_requests() call on a worker thread, so the
+    event loop keeps accepting requests meanwhile.
+    """
+
+    def __init__(self, metrics: Metrics, window: float = 0.002, max_batch: int = 256):
+        self.window = window
+        self.max_batch = max_batch
+        self.metrics = metrics
+        self._pending: List[Tuple[tuple, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scorer")
+
+    async def submit(self, item: tuple):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((item, fut))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await fut
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        loop = asyncio.get_running_loop()
+        t0 = time.perf_counter()
+        try:
+            results = await loop.run_in_executor(
+                self._executor, score_requests, [item for item, _ in batch]
+            )
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        self.metrics.batch_size.observe(len(batch))
+        self.metrics.batch_seconds.observe(time.perf_counter() - t0)
+        for (_, fut), recs in zip(batch, results):
+            if fut.done():
+                continue
+            if isinstance(recs, Exception):
+                fut.set_exception(recs)
+            else:
+                fut.set_result(recs)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+# ---------- HTTP ----------
+class RecommendServer:
+    def __init__(self, window_ms: float = 2.0, max_batch: int = 256, cache_size: int = 4096):
+        self.metrics = Metrics()
+        self.cache = RecommendCache(cache_size)
+        self.batcher = MicroBatcher(self.metrics, window_ms / 1000.0, max_batch)
+
+    def warm(self):
+        """Build everything derived from the catalog before the first request."""
+        constraint_index()
+        if np is not None:
+            compile_catalog()
+
+    async def recommend(self, body: bytes) -> Dict[str, Any]:
+        try:
+            req = json.loads(body or b"{}")
+        except ValueError as e:
+            raise HttpError(400, f"invalid JSON: {e}")
+        if not isinstance(req, dict):
+            raise HttpError(400, "expected a JSON object")
+        state = req.get("state")
+        if not isinstance(state, dict):
+            raise HttpError(400, '"state" must be an object')
+        prefs = req.get("prefs")
+        if prefs is None:
+            prefs = prefs_from_state(state)
+        if not isinstance(prefs, dict):
+            raise HttpError(400, '"prefs" must be an object')
+        top_n = req.get("top_n", 5)
+        if not isinstance(top_n, int) or not 0 <= top_n <= MAX_TOP_N:
+            raise HttpError(400, f'"top_n" must be an integer 0-{MAX_TOP_N}')
+        reasons = bool(req.get("reasons", True))
+        try:
+            ctx = _context(state, prefs)
+        except (AttributeError, TypeError, ValueError) as e:
+            raise HttpError(400, f"bad state/prefs: {e}")
+
+        key = self.cache.key(ctx, top_n, reasons)
+        recs = self.cache.get(key)
+        if recs is None:
+            recs = await self.batcher.submit((ctx, state, prefs, top_n, reasons))
+            self.cache.put(key, recs)
+        hw = ctx["hw_score"]
+        return {"hardware_score": hw, "tier": hardware_tier(hw), "recommendations": recs}
+
+    async def handle(self, method: str, path: str, body: bytes) -> Tuple[int, str, bytes]:
+        if path == "/recommend":
+            if method != "POST":
+                raise HttpError(405, "use POST")
+            payload = await self.recommend(body)
+            return 200, "application/json", json.dumps(payload).encode("utf-8")
+        if path == "/metrics":
+            return 200, "text/plain; version=0.0.4", self.metrics.render(self.cache).encode("utf-8")
+        if path == "/healthz":
+            return 200, "application/json", b'{"ok": true}'
+        raise HttpError(404, f"no route for {path}")
+
+    async def client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                t0 = time.perf_counter()
+                keep_alive = True
+                path = "?"
+                try:
+                    try:
+                        method, target, version = line.decode("latin-1").split()
+                    except ValueError:
+                        raise HttpError(400, "bad request line")
+                    path = target.split("?", 1)[0]
+                    headers = {}
+                    while True:
+                        h = await reader.readline()
+                        if h in (b"\r\n", b"\n", b""):
+                            break
+                        name, _, value = h.decode("latin-1").partition(":")
+                        headers[name.strip().lower()] = value.strip()
+                    keep_alive = (
+                        headers.get("connection", "").lower() != "close"
+                        and version.upper() == "HTTP/1.1"
+                    )
+                    length = int(headers.get("content-length") or 0)
+                    if length > MAX_BODY:
+                        keep_alive = False
+                        raise HttpError(413, "body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    status, ctype, data = await self.handle(method.upper(), path, body)
+                except HttpError as e:
+                    status, ctype = e.status, "application/json"
+                    data = json.dumps({"error": str(e)}).encode("utf-8")
+                except Exception as e:  # keep serving other requests
+                    status, ctype, keep_alive = 500, "application/json", False
+                    data = json.dumps({"error": f"{type(e).__name__}: {e}"}).encode("utf-8")
+                if path not in ("/recommend", "/metrics", "/healthz"):
+                    path = "other"
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                    f"Content-Type: {ctype}\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                    + data
+                )
+                await writer.drain()
+                self.metrics.request(path, status, time.perf_counter() - t0)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, ready=None):
+        self.warm()
+        server = await asyncio.start_server(self.client, host, port)
+        if ready is not None:
+            ready(server)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.batcher.close()
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, window_ms: float = 2.0,
+          max_batch: int = 256, cache_size: int = 4096, catalog: Optional[str] = None,
+          coefficients: Optional[Dict[str, float]] = None, table: Optional[str] = None):
+    configure(catalog, coefficients, table)
+    server = RecommendServer(window_ms, max_batch, cache_size)
+
+    def ready(srv):
+        addrs = ", ".join(f"{s.getsockname()[0]}:{s.getsockname()[1]}" for s in srv.sockets)
+        print(f"recommender listening on {addrs} ({len(get_catalog())} distros)", flush=True)
+
+    try:
+        asyncio.run(server.serve(host, port, ready))
+    except KeyboardInterrupt:
+        pass
+
+
+# ---------- Local load-test client ----------
+async def _post(host, port, body: bytes, conn):
+    reader, writer = conn
+    writer.write(
+        f"POST /recommend HTTP/1.1\r\nHost: {host}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1")
+        + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        h = await reader.readline()
+        if h in (b"\r\n", b""):
+            break
+        if h.lower().startswith(b"content-length:"):
+            length = int(h.split(b":")[1])
+    return status, await reader.readexactly(length)
+
+
+async def load_test(host: str = "127.0.0.1", port: int = 8765, requests: int = 2000,
+                    concurrency: int = 32, seed: int = 0) -> Dict[str, Any]:
+    """Fire seeded profiles at a running server over keep-alive connections."""
+    from recommender_bench import gen_prefs, gen_states
+
+    bodies = [
+        json.dumps({"state": s, "prefs": p, "top_n": 5}).encode("utf-8")
+        for s, p in zip(gen_states(requests, seed), gen_prefs(requests, seed + 1))
+    ]
+    latencies: List[float] = []
+    errors = 0
+    queue = iter(bodies)
+
+    async def worker():
+        nonlocal errors
+        conn = await asyncio.open_connection(host, port)
+        try:
+            for body in queue:
+                t0 = time.perf_counter()
+                status, _ = await _post(host, port, body, conn)
+                latencies.append(time.perf_counter() - t0)
+                errors += status != 200
+        finally:
+            conn[1].close()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    pick = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": pick(0.50),
+        "p99_ms": pick(0.99),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load-test a running recommender server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(load_test(args.host, args.port, args.requests,
+                                           args.concurrency, args.seed)), indent=2))
@@ -29,6 +29,19 @@ def _categorize(media_type: str, model: str) -> str:
     return "mid"
 
 
+def probe_free_space() -> float:
+    """Free GB on the system drive (/ or %SystemDrive%), 0.0 if unknown. Cheap enough to repeat."""
+    if platform.system().lower() == "windows":
+        root = os.environ.get("SystemDrive", "C:")[0] + ":\\"
+    else:
+        root = "/"
+    try:
+        total, used, free = shutil.disk_usage(root)
+        return round(free / (1024 ** 3), 2)
+    except Exception:
+        return 0.0
+
+
 def _probe_windows():
     system_drive = os.environ.get("SystemDrive", "C:")[0]
     ps = f"""
@@ -52,12 +65,7 @@ def _probe_windows():
             except Exception:
                 size_gb = 0.0
 
-            # Free space on system drive
-            try:
-                total, used, free = shutil.disk_usage(f"{system_drive}:\\")
-                free_gb = round(free / (1024 ** 3), 2)
-            except Exception:
-                free_gb = 0.0
+            free_gb = probe_free_space()
 
             type_str = f"{model} ({media_type}/{bus})"
             category = _categorize(f"{media_type} {bus}", model)
@@ -117,11 +125,7 @@ def _probe_linux():
     elif "mmcblk" in dev_basename:
         media_type = "eMMC"
 
-    try:
-        total, used, free = shutil.disk_usage("/")
-        free_gb = round(free / (1024 ** 3), 2)
-    except Exception:
-        free_gb = 0.0
+    free_gb = probe_free_space()
 
     type_str = f"{model} ({media_type})"
     category = _categorize(media_type, model)
@@ -163,11 +167,7 @@ def _probe_macos():
                     size_gb = float(m.group(1))
                 except Exception:
                     pass
-    try:
-        total, used, free = shutil.disk_usage("/")
-        free_gb = round(free / (1024 ** 3), 2)
-    except Exception:
-        free_gb = 0.0
+    free_gb = probe_free_space()
 
     type_str = f"{model} ({media_type})"
     category = _categorize(media_type, model)
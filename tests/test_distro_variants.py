@@ -0,0 +1,80 @@
+# tests/test_distro_variants.py
+# A variant spec loaded lazily (VariantCatalog), expanded into a dict and
+# built into a distro_catalog file must rank exactly like DISTROS does.
+
+import os
+import tempfile
+import unittest
+
+import recommender_engine
+from distro_catalog import open_catalog, write_catalog
+from distro_variants import VariantCatalog, expand_variants
+from recommender_bench import gen_prefs, gen_states
+
+
+def _spec(catalog):
+    """Every distro as a base with an extra desktop and an Edge edition."""
+    spec = {}
+    for name, d in catalog.items():
+        base = dict(d)
+        spec[name] = {
+            "base": base,
+            "desktops": {
+                "": {},
+                "LXQt": {
+                    "min_ram_gb": max(0.5, base["min_ram_gb"] - 1.0),
+                    "weight_low_hw": min(10, base["weight_low_hw"] + 2),
+                    "good_for_old_hw": True,
+                },
+            },
+            "editions": {"": {}, "Edge": {"cutting_edge": min(10, base["cutting_edge"] + 3)}},
+        }
+    return spec
+
+
+class VariantCatalogTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.catalog = recommender_engine.get_catalog()
+        cls.profiles = list(zip(gen_states(200, 5), gen_prefs(200, 6)))
+
+    def tearDown(self):
+        recommender_engine.use_catalog(self.catalog)
+
+    def rankings(self, catalog):
+        recommender_engine.use_catalog(catalog)
+        return [recommender_engine.recommend(s, p, 5) for s, p in self.profiles]
+
+    def test_plain_spec_matches_distros(self):
+        lazy = VariantCatalog({name: dict(d) for name, d in self.catalog.items()})
+        self.assertEqual(list(lazy), list(self.catalog))
+        for name, d in self.catalog.items():
+            self.assertEqual(dict(lazy[name]), dict(d))
+        self.assertEqual(self.rankings(lazy), self.rankings(self.catalog))
+
+    def test_lazy_expanded_and_mapped_agree(self):
+        spec = _spec(self.catalog)
+        lazy = VariantCatalog(spec)
+        expanded = expand_variants(spec)
+        self.assertEqual(len(lazy), 4 * len(self.catalog))
+        self.assertEqual(list(lazy), list(expanded))
+        for i, name in enumerate(lazy):
+            self.assertEqual(lazy.name(i), name)
+            self.assertEqual(lazy.index(name), i)
+            self.assertEqual(dict(lazy.record(i)), expanded[name])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "variants.lhcat")
+            write_catalog(lazy, path)
+            want = self.rankings(expanded)
+            self.assertEqual(self.rankings(lazy), want)
+            mapped = self.rankings(open_catalog(path))
+            recommender_engine.use_catalog(self.catalog)  # unmap before cleanup
+            self.assertEqual(mapped, want)
+        self.assertTrue(any(
+            r["name"].endswith(("LXQt", "Edge")) for res in want for r in res["recommendations"]
+        ))
+
+
+if __name__ == "__main__":
+    unittest.main()
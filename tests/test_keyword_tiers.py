@@ -0,0 +1,132 @@
+# tests/test_keyword_tiers.py
+# KeywordTiers against testing the tiers one by one, and the GPU/CPU
+# classifiers against what their old if/elif chains returned.
+
+import random
+import re
+import unittest
+
+import cpu_probe
+import gpu_probe
+from keyword_tiers import KeywordTiers
+
+
+def _naive_best(tiers, text):
+    for i, tier in enumerate(tiers):
+        for k in tier:
+            if (k in text) if isinstance(k, str) else k.search(text):
+                return i
+    return None
+
+
+def _names(tiers, n, seed=0):
+    """Names built from every keyword, glued with noise and overlapping."""
+    rng = random.Random(seed)
+    literals = [k for tier in tiers for k in tier if isinstance(k, str)]
+    literals += ["rtx 3060", "rtx4090", "gtx  1650", "rtx 9", "m1 pro", "m3 max"]
+
+    def noise():
+        return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz0123456789 -[]()/") for _ in range(rng.randint(0, 8)))
+
+    names = [noise() + k + noise() for k in literals]
+    names += [noise().join(rng.sample(literals, rng.randint(1, 3))) + noise() for _ in range(n)]
+    # Cut keywords short and run them into each other
+    names += [k[:rng.randint(1, len(k))] + rng.choice(literals) for k in literals]
+    return names
+
+
+class KeywordTiersTest(unittest.TestCase):
+    def check(self, table):
+        for name in _names(table.tiers, 3000):
+            self.assertEqual(table.best(name), _naive_best(table.tiers, name), name)
+
+    def test_gpu_tiers(self):
+        self.check(gpu_probe._NAME_TIERS)
+
+    def test_cpu_model_tiers(self):
+        self.check(cpu_probe._MODEL_BONUS)
+
+    def test_prefix_priority(self):
+        self.assertEqual(KeywordTiers([["m1 pro"], ["m1"]]).best("apple m1 pro"), 0)
+        self.assertEqual(KeywordTiers([["m1"], ["m1 pro"]]).best("apple m1 pro"), 0)
+        self.assertEqual(KeywordTiers([["x"], ["m1"], ["m1 pro"]]).best("apple m1 pro"), 1)
+        self.assertIsNone(KeywordTiers([["m1 pro"]]).best("apple m1"))
+
+    def test_regex_between_literals(self):
+        tiers = KeywordTiers([["titan"], [re.compile(r"rtx\s*\d{4}")], ["geforce"]])
+        self.assertEqual(tiers.best("geforce rtx 4090"), 1)
+        self.assertEqual(tiers.best("geforce rtx 40"), 2)
+        self.assertEqual(tiers.best("geforce titan rtx 4090"), 0)
+
+    def test_rejects_capturing_groups(self):
+        with self.assertRaises(ValueError):
+            KeywordTiers([[re.compile(r"(rtx)")]])
+
+
+# Categories at VRAM 0 / 2000 / 5000 / 9000 MB from the old _categorize()
+GPU_CASES = {
+    "nvidia corporation ad102 [geforce rtx 4090]": ("strong", "strong", "strong", "strong"),
+    "NVIDIA GeForce RTX 4050 Laptop GPU": ("mid", "mid", "mid", "mid"),
+    "nvidia geforce rtx 3060": ("mid", "mid", "mid", "mid"),
+    "Quadro RTX 4000": ("strong", "weak", "mid", "strong"),
+    "NVIDIA GeForce GTX 1650 SUPER": ("mid", "mid", "mid", "mid"),
+    "gtx 1180": ("mid", "weak", "mid", "strong"),
+    "rtx 9090": ("strong", "weak", "mid", "strong"),
+    "RTX  5060": ("strong", "weak", "mid", "strong"),
+    "AMD Radeon RX 7900 XTX": ("strong", "strong", "strong", "strong"),
+    "Radeon RX 6800/6800 XT / 6900 XT": ("strong", "strong", "strong", "strong"),
+    "Intel(R) UHD Graphics 620": ("weak", "weak", "mid", "strong"),
+    "Intel Iris Xe Graphics": ("weak", "weak", "weak", "weak"),
+    "AMD Radeon Vega 8 Graphics": ("weak", "weak", "weak", "weak"),
+    "llvmpipe (LLVM 15.0.7, 256 bits)": ("weak", "weak", "weak", "weak"),
+    "VMware SVGA 3D": ("weak", "weak", "weak", "weak"),
+    "Microsoft Basic Display Adapter": ("weak", "weak", "weak", "weak"),
+    "virtio-gpu": ("weak", "weak", "weak", "weak"),
+    "Apple M1 Pro": ("strong", "strong", "strong", "strong"),
+    "Apple M2": ("mid", "mid", "mid", "mid"),
+    "Matrox G200eR2": ("unknown", "weak", "mid", "strong"),
+}
+
+# Vendor, then scores at (3.0 GHz, 4 cores, 8 threads) and (clock unknown,
+# 8 cores, 16 threads) from the old _detect_vendor() and _score_cpu()
+CPU_CASES = {
+    "Intel(R) Core(TM) i9-13900K": ("Intel", 72, 54),
+    "Intel(R) Core(TM) i7-8550U CPU @ 1.80GHz": ("Intel", 67, 49),
+    "Intel(R) Core(TM) i5-1135G7 @ 2.40GHz": ("Intel", 63, 45),
+    "Intel(R) Xeon(R) W-2245 CPU": ("Intel", 57, 39),
+    "Intel(R) Celeron(R) N4020 CPU @ 1.10GHz": ("Intel", 47, 29),
+    "Intel(R) Pentium(R) Silver N5000": ("Intel", 47, 29),
+    "Intel(R) Atom(TM) x5-Z8350": ("Intel", 47, 29),
+    "Intel(R) N100": ("Intel", 52, 34),
+    "AMD Ryzen 7 5800X 8-Core Processor": ("AMD", 67, 49),
+    "AMD Ryzen 3 3200G": ("AMD", 60, 42),
+    "AMD EPYC 7763 64-Core Processor": ("AMD", 72, 54),
+    "AMD Ryzen Threadripper 3970X": ("AMD", 72, 54),
+    "Apple M1 Pro": ("Apple", 67, 49),
+    "Apple M2": ("Apple", 63, 45),
+    "Apple M3 Max": ("Apple", 72, 54),
+    "ARM Cortex-A72": ("ARM", 57, 39),
+    "Qualcomm Snapdragon X Elite": ("ARM", 57, 39),
+    "Some Unknown CPU": ("Unknown", 57, 39),
+}
+
+
+class ClassifierTest(unittest.TestCase):
+    def test_gpu_categories(self):
+        for name, want in GPU_CASES.items():
+            got = tuple(gpu_probe._categorize(name, vram) for vram in (0, 2000, 5000, 9000))
+            self.assertEqual(got, want, name)
+        self.assertEqual(gpu_probe._categorize("", 0), "nogpu")
+
+    def test_cpu_vendor_and_score(self):
+        for model, want in CPU_CASES.items():
+            got = (
+                cpu_probe._detect_vendor(model),
+                cpu_probe._score_cpu(model, 3.0, 4, 8),
+                cpu_probe._score_cpu(model, 0, 8, 16),
+            )
+            self.assertEqual(got, want, model)
+
+
+if __name__ == "__main__":
+    unittest.main()
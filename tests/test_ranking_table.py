@@ -0,0 +1,62 @@
+# tests/test_ranking_table.py
+# Rankings answered from a ranking table against live scoring, for the
+# built-in catalog and the same catalog mapped from a distro_catalog file.
+
+import os
+import tempfile
+import unittest
+
+import recommender_engine
+from distro_catalog import open_catalog, write_catalog
+from ranking_table import build_table, open_table
+from recommender_bench import gen_prefs, gen_states
+
+
+class RankingTableTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.catalog = recommender_engine.get_catalog()
+        # One desktop keeps the build to a few seconds
+        cls.table_path = os.path.join(cls.tmp.name, "rankings.lhtab")
+        build_table(cls.table_path, top_n=5, desktops=("any",))
+        cls.mapped_path = os.path.join(cls.tmp.name, "catalog.lhcat")
+        write_catalog(cls.catalog, cls.mapped_path)
+        prefs_list = gen_prefs(300, 2)
+        for prefs in prefs_list:
+            prefs["desktop_pref"] = "any"
+        cls.profiles = list(zip(gen_states(300, 1), prefs_list))
+
+    @classmethod
+    def tearDownClass(cls):
+        recommender_engine.use_ranking_table(None)
+        recommender_engine.use_catalog(cls.catalog)
+        cls.tmp.cleanup()
+
+    def rankings(self, top_n):
+        return [recommender_engine.recommend(s, p, top_n) for s, p in self.profiles]
+
+    def check(self):
+        table = open_table(self.table_path)
+        for top_n in (3, 5):
+            recommender_engine.use_ranking_table(None)
+            live = self.rankings(top_n)
+            recommender_engine.use_ranking_table(table)
+            hits = sum(
+                table.lookup(recommender_engine._context(s, p), top_n) is not None
+                for s, p in self.profiles
+            )
+            self.assertGreater(hits, 0)
+            self.assertEqual(self.rankings(top_n), live)
+
+    def test_builtin_catalog(self):
+        recommender_engine.use_catalog(self.catalog)
+        self.check()
+
+    def test_mapped_catalog(self):
+        recommender_engine.use_catalog(open_catalog(self.mapped_path))
+        self.check()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+# tests/test_recommender_batch.py
+# recommend_batch() and the batch CLI against recommend(), one profile at a
+# time. Every score is a multiple of 0.5, so they must agree exactly.
+#
+#   python -m unittest discover tests
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import recommender_engine
+from recommender_batch import np, recommend_batch, score_lines
+from recommender_bench import gen_prefs, gen_states
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _ranking(recs):
+    return [(r["name"], r["score"]) for r in recs]
+
+
+# Partial and extreme states the generated profiles do not cover
+EDGE_PROFILES = [
+    ({}, {}),
+    ({"gpu_cat": "unknown", "storage_cat": "mid"}, {"usage": "gaming"}),
+    ({"cpu_score": None, "ram_total_gb": None}, {"desktop_pref": "kde", "windows_like": "yes"}),
+    ({"cpu_score": 100, "gpu_cat": "strong", "ram_total_gb": 64, "storage_cat": "fast",
+      "storage_free_gb": 1000}, {"usage": "creative", "update_pref": "cutting_edge"}),
+]
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class RecommendBatchTest(unittest.TestCase):
+    def test_matches_recommend(self):
+        profiles = list(zip(gen_states(500, 3), gen_prefs(500, 4))) + EDGE_PROFILES
+        states, prefs_list = zip(*profiles)
+        m = len(recommender_engine.get_catalog())
+        res = recommend_batch(states, prefs_list, top_n=m)
+        names = res["names"]
+        for i, (state, prefs) in enumerate(profiles):
+            want = recommender_engine.recommend(state, prefs, m)
+            got = [(names[j], s) for j, s in zip(res["top_idx"][i].tolist(), res["top_scores"][i].tolist())]
+            self.assertEqual(got, _ranking(want["recommendations"]), (state, prefs))
+            self.assertEqual(int(res["hardware_score"][i]), want["hardware_score"])
+
+
+class ScoreLinesTest(unittest.TestCase):
+    def test_bad_records_do_not_fail_the_chunk(self):
+        good = list(zip(gen_states(5, 7), gen_prefs(5, 8)))
+        lines = [json.dumps({"id": i, "state": s, "prefs": p}) for i, (s, p) in enumerate(good)]
+        bad = [
+            '{"state": {"gpu_cat": 7}, "prefs": {}}',
+            '{"state": {"ram_total_gb": "lots"}}',
+            '{"state": {}, "prefs": {"usage": ["office"]}}',
+            '{"state": {}, "prefs": {"visual": {"a": 1}}}',
+            "not json",
+        ]
+        for k, line in enumerate(bad):
+            lines.insert(2 * k + 1, line)
+        out = [json.loads(line) for line in score_lines(lines, top_n=3).splitlines()]
+        self.assertEqual(len(out), len(lines))
+        errors = [o for o in out if "error" in o]
+        self.assertEqual([o["line"] for o in errors], [2, 4, 6, 8, 10])
+        scored = [o for o in out if "error" not in o]
+        self.assertEqual([o["id"] for o in scored], list(range(len(good))))
+        for o, (state, prefs) in zip(scored, good):
+            want = recommender_engine.recommend(state, prefs, 3)
+            self.assertEqual(_ranking(o["recommendations"]), _ranking(want["recommendations"]))
+
+
+class BatchCliTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.profiles = list(zip(gen_states(200, 1), gen_prefs(200, 2)))
+        self.input = os.path.join(self.tmp.name, "profiles.jsonl")
+        with open(self.input, "w", encoding="utf-8") as f:
+            for state, prefs in self.profiles:
+                f.write(json.dumps({"state": state, "prefs": prefs}) + "\n")
+        self.coefficients = os.path.join(self.tmp.name, "coefficients.json")
+        with open(self.coefficients, "w", encoding="utf-8") as f:
+            json.dump({"desktop": 100}, f)
+
+    def tearDown(self):
+        recommender_engine.use_coefficients({})
+        self.tmp.cleanup()
+
+    def batch(self, workers, *options):
+        out = subprocess.run(
+            [sys.executable, "-m", "recommender_engine", *options,
+             "batch", self.input, "--top", "5", "--workers", workers],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout
+        return [_ranking(json.loads(line)["recommendations"]) for line in out.splitlines()]
+
+    def expected(self):
+        return [
+            _ranking(recommender_engine.recommend(state, prefs, 5)["recommendations"])
+            for state, prefs in self.profiles
+        ]
+
+    def test_default_coefficients(self):
+        self.assertEqual(self.batch("1"), self.expected())
+
+    def test_coefficients_reach_batch(self):
+        recommender_engine.load_coefficients(self.coefficients)
+        expected = self.expected()
+        for workers in ("1", "2"):
+            got = self.batch(workers, "--coefficients", self.coefficients)
+            self.assertEqual(got, expected, f"--workers {workers}")
+        recommender_engine.use_coefficients({})
+        self.assertNotEqual(expected, self.expected())
+
+
+if __name__ == "__main__":
+    unittest.main()
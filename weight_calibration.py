@@ -0,0 +1,242 @@
+# weight_calibration.py
+# Fit the scoring coefficients (recommender_engine.COEFFICIENTS) to
+# labelled choices.
+#
+#   python weight_calibration.py choices.jsonl -o coefficients.json
+#   python weight_calibration.py choices.jsonl --search grid --grid usage=2,3,4 --grid hardware=4,6,8
+#   python -m recommender_engine --coefficients coefficients.json
+#
+# Dataset: one JSON object per line, {"state", "prefs", "chosen"} (or a flat
+# app state with the answers inside, plus "chosen"), where chosen is the
+# distro the user went with.
+#
+# Scores are linear in the coefficients, so the dataset becomes one
+# (samples x distros x coefficients) array up front
+# (recommender_batch.score_components) and each block of candidate
+# coefficient vectors is ranked with a single matrix product. Blocks are
+# spread over a process pool.
+
+import itertools
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from recommender_batch import (
+    CompiledCatalog,
+    _require_numpy,
+    _split_record,
+    check_profile,
+    encode_profiles,
+    np,
+    score_components,
+)
+from recommender_engine import DEFAULT_COEFFICIENTS, get_catalog, load_catalog
+
+COEFFICIENT_NAMES = tuple(DEFAULT_COEFFICIENTS)
+METRICS = ("mrr", "top1", "top3")
+STEP = 0.5  # coefficients stay multiples of 0.5, see use_coefficients()
+_BLOCK_BYTES = 64 << 20
+
+
+def load_dataset(path: str):
+    """
+    (states, prefs_list, labels, skipped): labels are catalog indices.
+    Unparseable lines, unknown choices and records whose fields cannot be
+    scored are skipped.
+    """
+    index = {name: j for j, name in enumerate(get_catalog().keys())}
+    states, prefs_list, labels = [], [], []
+    skipped = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+                label = index[rec["chosen"]]
+                state, prefs = _split_record(rec)
+                check_profile(state, prefs)
+            except Exception:
+                skipped += 1
+                continue
+            states.append(state)
+            prefs_list.append(prefs)
+            labels.append(label)
+    return states, prefs_list, labels, skipped
+
+
+def design_matrix(states: Sequence[Dict[str, Any]], prefs_list: Sequence[Dict[str, Any]]):
+    """
+    (N x M x K) float32 array: points each coefficient gives each distro for
+    each sample, per unit of coefficient. Every entry is a multiple of 0.5
+    and small, so float32 sums stay exact.
+    """
+    _require_numpy()
+    unit = CompiledCatalog(get_catalog(), coefficients={k: 1.0 for k in COEFFICIENT_NAMES})
+    parts = score_components(unit, encode_profiles(states, prefs_list))
+    x = np.zeros((len(states), len(unit), len(COEFFICIENT_NAMES)), dtype=np.float32)
+    for k, name in enumerate(COEFFICIENT_NAMES):
+        if name in parts:
+            x[:, :, k] = parts[name]
+    return x
+
+
+def evaluate(x, labels, candidates) -> Dict[str, Any]:
+    """
+    Rank the chosen distro under every candidate (C x K) at once. Ranks
+    follow recommend(): higher score first, ties in catalog order.
+    Returns {"mrr", "top1", "top3"}, each a (C,) array.
+    """
+    n, m, k = x.shape
+    labels = np.asarray(labels)
+    scores = (x.reshape(n * m, k) @ np.asarray(candidates, dtype=np.float32).T).reshape(n, m, -1)
+    chosen = scores[np.arange(n), labels][:, None, :]
+    earlier = (np.arange(m)[None, :] < labels[:, None])[:, :, None]
+    rank = (scores > chosen).sum(axis=1) + ((scores == chosen) & earlier).sum(axis=1)
+    return {
+        "mrr": (1.0 / (rank + 1)).mean(axis=0),
+        "top1": (rank == 0).mean(axis=0),
+        "top3": (rank < 3).mean(axis=0),
+    }
+
+
+def random_candidates(count: int, seed: int = 0, spread: float = 1.0) -> List[List[float]]:
+    """
+    Defaults first, then random vectors: each coefficient drawn from
+    default * [1 - spread, 1 + spread] (clipped at zero, so penalties stay
+    penalties), rounded to STEP.
+    """
+    rng = random.Random(seed)
+    base = [DEFAULT_COEFFICIENTS[k] for k in COEFFICIENT_NAMES]
+    out = [base]
+    for _ in range(count - 1):
+        row = []
+        for v in base:
+            lo, hi = sorted((v * (1 - spread), v * (1 + spread)))
+            if v > 0:
+                lo = max(lo, 0.0)
+            elif v < 0:
+                hi = min(hi, 0.0)
+            row.append(round(rng.uniform(lo, hi) / STEP) * STEP)
+        out.append(row)
+    return out
+
+
+def grid_candidates(grid: Dict[str, Sequence[float]]) -> List[List[float]]:
+    """Every combination of the given values; other coefficients keep their defaults."""
+    unknown = set(grid) - set(COEFFICIENT_NAMES)
+    if unknown:
+        raise ValueError(f"unknown coefficients: {sorted(unknown)}")
+    names = list(grid)
+    out = []
+    for values in itertools.product(*(grid[n] for n in names)):
+        row = dict(DEFAULT_COEFFICIENTS)
+        row.update(zip(names, values))
+        out.append([row[k] for k in COEFFICIENT_NAMES])
+    return out
+
+
+_x = _labels = None
+
+
+def _init_worker(x, labels):
+    global _x, _labels
+    _x, _labels = x, labels
+
+
+def _evaluate_block(block):
+    return evaluate(_x, _labels, block)
+
+
+def search(x, labels, candidates, workers: Optional[int] = None) -> Dict[str, Any]:
+    """evaluate() for many candidates, in memory-bounded blocks on a process pool."""
+    n, m, _ = x.shape
+    size = max(1, _BLOCK_BYTES // max(1, n * m * 4))
+    blocks = [candidates[i:i + size] for i in range(0, len(candidates), size)]
+    workers = min(workers or os.cpu_count() or 1, len(blocks))
+    if workers <= 1:
+        results = [evaluate(x, labels, b) for b in blocks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(x, labels)) as pool:
+            results = list(pool.map(_evaluate_block, blocks))
+    return {name: np.concatenate([r[name] for r in results]) for name in METRICS}
+
+
+def best_candidate(results: Dict[str, Any], metric: str = "mrr") -> int:
+    """Index of the best candidate by metric, then MRR; earliest wins ties."""
+    order = np.lexsort((-results["mrr"], -results[metric]))
+    return int(order[0])
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="weight_calibration",
+                                     description="Fit the scoring coefficients to labelled choices.")
+    parser.add_argument("dataset", help="JSONL of {state, prefs, chosen}")
+    parser.add_argument("-o", "--output", help="write the coefficients JSON here (default: stdout)")
+    parser.add_argument("--search", choices=("random", "grid"), default="random")
+    parser.add_argument("--candidates", type=int, default=2000, help="random search: vectors to try")
+    parser.add_argument("--spread", type=float, default=1.0,
+                        help="random search: relative range around each default")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2,...",
+                        help="grid search: values for one coefficient (repeatable)")
+    parser.add_argument("--metric", choices=METRICS, default="mrr")
+    parser.add_argument("--workers", type=int, default=0, help="processes (0 = one per core)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--catalog", help="catalog file built by distro_catalog.py")
+    args = parser.parse_args(argv)
+
+    _require_numpy()
+    if args.catalog:
+        load_catalog(args.catalog)
+    states, prefs_list, labels, skipped = load_dataset(args.dataset)
+    if not labels:
+        parser.error("no samples with a chosen distro from the catalog")
+    if args.search == "grid":
+        if not args.grid:
+            parser.error("--search grid needs at least one --grid NAME=V1,V2,...")
+        grid = {}
+        for spec in args.grid:
+            name, _, values = spec.partition("=")
+            grid[name] = [float(v) for v in values.split(",")]
+        try:
+            candidates = [[DEFAULT_COEFFICIENTS[k] for k in COEFFICIENT_NAMES]] + grid_candidates(grid)
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        candidates = random_candidates(args.candidates, args.seed, args.spread)
+    for row in candidates:
+        for v in row:
+            if v * 2 != int(v * 2):
+                parser.error(f"{v} is not a multiple of {STEP}")
+
+    x = design_matrix(states, prefs_list)
+    results = search(x, np.array(labels), candidates, args.workers or None)
+    best = best_candidate(results, args.metric)
+    report = {
+        "coefficients": dict(zip(COEFFICIENT_NAMES, candidates[best])),
+        "metric": args.metric,
+        "score": {k: round(float(results[k][best]), 4) for k in METRICS},
+        "baseline": {k: round(float(results[k][0]), 4) for k in METRICS},
+        "samples": len(labels),
+        "skipped": skipped,
+        "candidates": len(candidates),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"{args.metric}: {report['baseline'][args.metric]} -> {report['score'][args.metric]} "
+              f"({len(candidates)} candidates, {len(labels)} samples)", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())